@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+
+import argparse
+import errno
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+from typing import Dict, List
+
+from src.utils.benchmark import (
+    BENCHMARK_STAGES,
+    benchmark_environment,
+    compare_to_baseline,
+    run_benchmark,
+)
+from src.utils.load_data import get_images_in_folder
+from src.utils.synthetic_data import generate_camera_dataset
+
+
+def main(args, loglevel):
+    logging.basicConfig(format="%(levelname)s: %(message)s", level=loglevel)
+
+    generated_path = None
+    if args.data_path is None:
+        generated_path = tempfile.mkdtemp(prefix="benchmark_dataset_")
+        files_by_camera_id: Dict[str, List[str]] = generate_camera_dataset(
+            generated_path,
+            args.frames_per_camera,
+            args.duplicate_ratio,
+            scale=args.scale,
+            seed=args.seed,
+        )
+        data_path = generated_path
+        logging.info("Generated a synthetic dataset in %s", data_path)
+    else:
+        # check if args.data_path is a valid path
+        if not os.path.exists(args.data_path):
+            raise FileNotFoundError(
+                errno.ENOENT, os.strerror(errno.ENOENT), args.data_path
+            )
+        files_by_camera_id = get_images_in_folder(args.data_path)
+        data_path = args.data_path
+        logging.info("Loaded images from %s", data_path)
+
+    try:
+        results = run_benchmark(files_by_camera_id, data_path, args.stages, args.repeat)
+    finally:
+        if generated_path is not None:
+            shutil.rmtree(generated_path, ignore_errors=True)
+
+    for stage, stage_results in results.items():
+        logging.info(
+            "Stage %s: %.1f frames/s, %.1f MB/s, peak RSS %.1f MB.",
+            stage,
+            stage_results["frames_per_second"],
+            stage_results["bytes_per_second"] / 1024**2,
+            stage_results["peak_rss_bytes"] / 1024**2,
+        )
+
+    if args.output_path is not None:
+        with open(args.output_path, "w") as f:
+            json.dump(
+                {"environment": benchmark_environment(), "results": results},
+                f,
+                indent=2,
+            )
+        logging.info("Benchmark results have been saved to %s", args.output_path)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        for regression in regressions:
+            logging.error("Regression in %s", regression)
+        if regressions:
+            sys.exit(1)
+        logging.info("No regressions compared to %s", args.baseline)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="This program measures the throughput and the peak memory of the stages of the pipeline.",
+        epilog="As an alternative to the commandline, params can be placed in a file, \
+            one per line, and specified on the commandline like '%(prog)s @params.conf'.",
+        fromfile_prefix_chars="@",
+    )
+
+    parser.add_argument(
+        "-v", "--verbose", help="Increase the output verbosity", action="store_true"
+    )
+
+    parser.add_argument(
+        "--data_path",
+        help="Absolute path to a dataset. If not set, a synthetic dataset is generated.",
+        type=str,
+        required=False,
+    )
+
+    parser.add_argument(
+        "--frames_per_camera",
+        help="The number of frames per camera of the synthetic dataset",
+        type=int,
+        default=100,
+    )
+
+    parser.add_argument(
+        "--duplicate_ratio",
+        help="The share of frames of the synthetic dataset that repeat the scene of their predecessor",
+        type=float,
+        default=0.8,
+    )
+
+    parser.add_argument(
+        "--scale",
+        help="A factor for the resolutions of the synthetic dataset",
+        type=float,
+        default=1.0,
+    )
+
+    parser.add_argument(
+        "--seed",
+        help="The seed of the synthetic dataset",
+        type=int,
+        default=0,
+    )
+
+    parser.add_argument(
+        "--stages",
+        help="The stages to measure",
+        type=str,
+        nargs="+",
+        choices=BENCHMARK_STAGES,
+        default=list(BENCHMARK_STAGES),
+    )
+
+    parser.add_argument(
+        "--repeat",
+        help="The number of runs per stage, the fastest run is reported",
+        type=int,
+        default=1,
+    )
+
+    parser.add_argument(
+        "--output_path",
+        help="The path to the json file to save the results in",
+        type=str,
+        required=False,
+    )
+
+    parser.add_argument(
+        "--baseline",
+        help="The path to the json file of a previous run. The program fails if a stage got slower or \
+            needs more memory than the --tolerance allows.",
+        type=str,
+        required=False,
+    )
+
+    parser.add_argument(
+        "--tolerance",
+        help="The relative change compared to the --baseline that is accepted",
+        type=float,
+        default=0.1,
+    )
+
+    args = parser.parse_args()
+
+    # Setup logging
+    if args.verbose:
+        loglevel = logging.DEBUG
+    else:
+        loglevel = logging.INFO
+
+    main(args, loglevel)
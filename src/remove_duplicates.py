@@ -4,14 +4,29 @@ import argparse
 import errno
 import logging
 import os
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
+from src.utils.archive import is_archive
+from src.utils.checkpoint import ComparisonCheckpoint
+from src.utils.file_ops import COPY_MODES
+from src.utils.frame_cache import FrameCache
 from src.utils.handle_files import (
+    compare_images_from_scores,
     compare_images_parallel,
-    copy_images_parallel,
-    remove_images,
+    compare_images_streaming,
+    count_decision_differences,
+    ImageFileOperations,
+    scale_parameters_to_reduction,
 )
+from src.utils.image_index import index_images, log_image_index
 from src.utils.load_data import get_images_in_folder
+from src.utils.manifest import write_listing
+from src.utils.near_duplicates import NearDuplicateIndex, filter_near_duplicates
+from src.utils.prefilter import PrefilterCascade
+from src.utils.preprocessing import CAMERA_CONFIG_PATH, load_camera_config
+from src.utils.profiling import StageProfiler, profile_stage
+from src.utils.shards import ShardedImageWriter
+from src.utils.watch import IncrementalDeduplicator
 
 
 def main(args, loglevel):
@@ -21,29 +36,318 @@ def main(args, loglevel):
     if not os.path.exists(args.data_path):
         raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), args.data_path)
 
-    files_by_camera_id: Dict[str, List[str]] = get_images_in_folder(args.data_path)
-    logging.info("Loaded images from %s", args.data_path)
+    camera_config = load_camera_config(args.camera_config)
 
-    # call compare_image with files_by_camera_id and args parameters
-    delete_frame, keep_frames = compare_images_parallel(
-        files_by_camera_id,
-        args.data_path,
-        args.gaussian_blur_radius_list,
-        args.min_contour_area,
-        args.score_threshold,
-    )
-    logging.info("Image comparison for all cameras finished.")
+    if args.watch:
+        # only compare the frames that arrive after the last poll
+        deduplicator = IncrementalDeduplicator(
+            args.data_path,
+            args.gaussian_blur_radius_list,
+            args.min_contour_area,
+            args.score_threshold,
+            output_path=args.output_path,
+            delete=args.delete,
+            copy_mode=args.copy_mode,
+            state_path=args.state_path,
+            reduction_factor=args.reduction_factor,
+            camera_config=camera_config,
+            scorer=args.scorer,
+        )
+        deduplicator.run(args.poll_interval)
+        return
 
-    if args.delete:
-        # delete images that are not unique
-        remove_images(delete_frame, args.data_path)
-        logging.info("Images that are not unique have been deleted.")
-    else:
+    profiler = None
+    if args.profile or args.profile_path is not None:
+        profiler = StageProfiler()
+
+    cache = None
+    if args.cache_dir is not None:
+        cache = FrameCache(args.cache_dir, max_bytes=args.cache_size * 1024**2)
+
+    prefilter = None
+    if any(
+        limit is not None
+        for limit in (
+            args.prefilter_identical_mad,
+            args.prefilter_different_mad,
+            args.prefilter_identical_hash_distance,
+            args.prefilter_different_hash_distance,
+        )
+    ):
+        prefilter = PrefilterCascade(
+            identical_mean_abs_diff=args.prefilter_identical_mad,
+            different_mean_abs_diff=args.prefilter_different_mad,
+            identical_hash_distance=args.prefilter_identical_hash_distance,
+            different_hash_distance=args.prefilter_different_hash_distance,
+        )
+
+    # the images are deleted or copied in the background as soon as their decision is final
+    file_operations = None
+    if not args.dry_run:
         if args.output_path is None:
             args.output_path = os.path.join(".", "data", "unique_images")
-        # copy images to keep into data/unique_images/
-        copy_images_parallel(keep_frames, args.data_path, args.output_path)
-        logging.info("Images that are unique have been copied to %s", args.output_path)
+        if args.output_format == "shards":
+            # the unique images of every camera are written into tar shards instead of single files
+            file_operations = ShardedImageWriter(
+                args.data_path,
+                args.output_path,
+                max_shard_bytes=args.shard_size * 1024**2,
+                max_workers=args.io_workers,
+            )
+        else:
+            file_operations = ImageFileOperations(
+                args.data_path,
+                delete=args.delete,
+                unique_images_path=args.output_path,
+                copy_mode=args.copy_mode,
+                max_workers=args.io_workers,
+                skip_done=args.resume,
+            )
+
+    # the full resolution comparison and the near-duplicate search read the images again,
+    # they are only deleted or copied after them
+    stream_decisions = (
+        not args.from_scores
+        and not (args.compare_full_resolution and args.reduction_factor != 1)
+        and args.near_duplicate_distance is None
+    )
+    on_decision = file_operations if stream_decisions else None
+
+    # the number of images to keep and to delete per camera
+    num_images_by_camera_id: Dict[str, Tuple[int, int]] = dict()
+
+    if args.from_scores:
+        # only apply the score threshold to the scores of a previous run, no image is read
+        # the scores were saved at the reduced resolution of the previous run
+        delete_frame, keep_frames = compare_images_from_scores(
+            args.scores_path,
+            scale_parameters_to_reduction(
+                None, None, args.score_threshold, args.reduction_factor
+            )[2],
+        )
+        logging.info(
+            "Applied the score threshold to the scores in %s", args.scores_path
+        )
+    elif args.manifest_path is not None:
+        # the listing and the decisions are streamed through files, the memory does not grow with the dataset
+        write_listing(args.data_path, args.manifest_path)
+        logging.info("Listed images from %s in %s", args.data_path, args.manifest_path)
+
+        num_images_by_camera_id = compare_images_streaming(
+            args.manifest_path,
+            args.data_path,
+            args.gaussian_blur_radius_list,
+            args.min_contour_area,
+            args.score_threshold,
+            chunk_size=args.chunk_size,
+            cache=cache,
+            reduction_factor=args.reduction_factor,
+            prefilter=prefilter,
+            profiler=profiler,
+            read_ahead=args.read_ahead,
+            batch_size=args.batch_size,
+            camera_config=camera_config,
+            scorer=args.scorer,
+            on_decision=on_decision,
+            stride=args.stride,
+            decode_workers=args.decode_workers,
+        )
+        logging.info("Image comparison for all cameras finished.")
+    else:
+        files_by_camera_id: Dict[str, List[str]] = get_images_in_folder(args.data_path)
+        logging.info("Loaded images from %s", args.data_path)
+
+        if args.validate_images or args.min_image_size is not None:
+            # only the png headers are read, invalid images never reach the comparison
+            index_by_camera_id, invalid_images = index_images(
+                args.data_path,
+                files_by_camera_id,
+                min_size=args.min_image_size,
+                max_workers=args.io_workers,
+            )
+            log_image_index(index_by_camera_id)
+            files_by_camera_id = {
+                camera_id: index.filenames
+                for camera_id, index in index_by_camera_id.items()
+                if len(index) > 0
+            }
+            if invalid_images:
+                logging.info(
+                    "%d images are not valid and were skipped.",
+                    sum(len(filenames) for filenames in invalid_images.values()),
+                )
+
+        checkpoint = None
+        if args.checkpoint_path is not None:
+            # a checkpoint can only be resumed with the parameters that decide the images
+            checkpoint = ComparisonCheckpoint(
+                args.checkpoint_path,
+                parameters={
+                    "data_path": os.path.abspath(args.data_path),
+                    "gaussian_blur_radius_list": args.gaussian_blur_radius_list,
+                    "min_contour_area": args.min_contour_area,
+                    "score_threshold": args.score_threshold,
+                    "reduction_factor": args.reduction_factor,
+                    "camera_config": args.camera_config,
+                    "scorer": args.scorer,
+                    "stride": args.stride,
+                    "prefilter": [
+                        args.prefilter_identical_mad,
+                        args.prefilter_different_mad,
+                        args.prefilter_identical_hash_distance,
+                        args.prefilter_different_hash_distance,
+                    ],
+                },
+                interval_seconds=args.checkpoint_interval,
+                resume=args.resume,
+            )
+        quarantined_images: Dict[str, List[str]] = dict()
+
+        # call compare_image with files_by_camera_id and args parameters
+        delete_frame, keep_frames = compare_images_parallel(
+            files_by_camera_id,
+            args.data_path,
+            args.gaussian_blur_radius_list,
+            args.min_contour_area,
+            args.score_threshold,
+            chunk_size=args.chunk_size,
+            cache=cache,
+            scores_path=args.scores_path,
+            reduction_factor=args.reduction_factor,
+            prefilter=prefilter,
+            profiler=profiler,
+            read_ahead=args.read_ahead,
+            batch_size=args.batch_size,
+            camera_config=camera_config,
+            scorer=args.scorer,
+            on_decision=on_decision,
+            checkpoint=checkpoint,
+            quarantined_images=quarantined_images,
+            stride=args.stride,
+            decode_workers=args.decode_workers,
+        )
+        logging.info("Image comparison for all cameras finished.")
+
+        if quarantined_images:
+            logging.info(
+                "%d images cannot be read and were skipped.",
+                sum(len(filenames) for filenames in quarantined_images.values()),
+            )
+
+        if args.compare_full_resolution and args.reduction_factor != 1:
+            full_resolution_decisions = compare_images_parallel(
+                files_by_camera_id,
+                args.data_path,
+                args.gaussian_blur_radius_list,
+                args.min_contour_area,
+                args.score_threshold,
+                chunk_size=args.chunk_size,
+                cache=cache,
+                camera_config=camera_config,
+                scorer=args.scorer,
+                stride=args.stride,
+            )
+            differences = count_decision_differences(
+                full_resolution_decisions, (delete_frame, keep_frames)
+            )
+            for camera_id, (num_decided, num_different) in differences.items():
+                logging.info(
+                    "Camera %s: %d of %d decisions differ from the full resolution.",
+                    camera_id,
+                    num_different,
+                    num_decided,
+                )
+
+    if args.near_duplicate_distance is not None:
+        # kept images that return to an earlier state are near-duplicates of a kept image
+        if args.signature_path is not None:
+            signature_index = NearDuplicateIndex.load(
+                args.signature_path,
+                args.near_duplicate_distance,
+                args.near_duplicate_across_cameras,
+            )
+        else:
+            signature_index = NearDuplicateIndex(
+                args.near_duplicate_distance, args.near_duplicate_across_cameras
+            )
+
+        near_duplicates = filter_near_duplicates(
+            delete_frame,
+            keep_frames,
+            args.data_path,
+            signature_index,
+            camera_config=camera_config,
+            max_workers=args.io_workers,
+        )
+        for camera_id, matches in sorted(near_duplicates.items()):
+            logging.info(
+                "Camera %s: %d kept images are near-duplicates of earlier images.",
+                camera_id,
+                len(matches),
+            )
+
+        if args.signature_path is not None:
+            signature_index.save(args.signature_path)
+            logging.info(
+                "Signatures of %d images have been saved to %s",
+                len(signature_index),
+                args.signature_path,
+            )
+
+    if args.manifest_path is None:
+        num_images_by_camera_id = {
+            camera_id: (
+                len(keep_frames.get(camera_id, [])),
+                len(delete_frame.get(camera_id, [])),
+            )
+            for camera_id in set(delete_frame) | set(keep_frames)
+        }
+
+    for camera_id, (num_keep, num_delete) in sorted(num_images_by_camera_id.items()):
+        logging.info(
+            "Camera %s: %d images to keep, %d images to delete.",
+            camera_id,
+            num_keep,
+            num_delete,
+        )
+
+    if file_operations is not None:
+        if not stream_decisions:
+            for decided_images, keep in ((delete_frame, False), (keep_frames, True)):
+                for camera_id, filenames in decided_images.items():
+                    for filename in filenames:
+                        file_operations(camera_id, filename, keep)
+
+        # only the time the file operations take after the comparison is measured
+        with profile_stage(
+            profiler,
+            "remove" if args.delete else "copy",
+            "all",
+            calls=file_operations.num_files,
+        ):
+            errors = file_operations.close()
+
+        if args.delete:
+            logging.info("Images that are not unique have been deleted.")
+        elif args.output_format == "shards":
+            logging.info(
+                "Images that are unique have been written into %d shards in %s",
+                len(file_operations.shard_paths),
+                args.output_path,
+            )
+        else:
+            logging.info(
+                "Images that are unique have been copied to %s", args.output_path
+            )
+
+        if errors:
+            logging.error("%d images could not be deleted or copied.", len(errors))
+
+    if profiler is not None:
+        profiler.log_summary()
+        if args.profile_path is not None:
+            profiler.save(args.profile_path)
+            logging.info("Profile has been saved to %s", args.profile_path)
 
 
 if __name__ == "__main__":
@@ -60,7 +364,7 @@ if __name__ == "__main__":
 
     parser.add_argument(
         "--data_path",
-        help="Absolute path to the dataset",
+        help="Absolute path to the dataset, a folder or an uncompressed tar or a zip archive of the images",
         type=str,
         required=True,
     )
@@ -87,6 +391,248 @@ if __name__ == "__main__":
         required=False,
     )
 
+    parser.add_argument(
+        "--camera_config",
+        help="The path to a json file with the mask and crop settings of every camera",
+        type=str,
+        default=CAMERA_CONFIG_PATH,
+    )
+
+    parser.add_argument(
+        "--chunk_size",
+        help="The max number of image pairs compared per job. By default the images of every camera are \
+            split into a few chunks per CPU core.",
+        type=int,
+        required=False,
+    )
+
+    parser.add_argument(
+        "--cache_dir",
+        help="The path to a folder to cache the preprocessed images in. Re-runs on the same images \
+            with the same gaussian blur radii skip reading the images.",
+        type=str,
+        required=False,
+    )
+
+    parser.add_argument(
+        "--cache_size",
+        help="The max size of the cache in MB",
+        type=int,
+        default=10240,
+    )
+
+    parser.add_argument(
+        "--scores_path",
+        help="The path to a folder to save the scores of all image pairs in. Together with --from_scores, \
+            the folder to load the scores from.",
+        type=str,
+        required=False,
+    )
+
+    parser.add_argument(
+        "--from_scores",
+        help="Skip the image comparison and only apply the --score_threshold to the scores saved in \
+            --scores_path by a previous run.",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--dry_run",
+        help="Only report the number of images to keep and delete per camera.",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--reduction_factor",
+        help="Decode the images directly into grayscale images reduced by this factor in width and height. \
+            The gaussian blur radii, the min contour area and the score threshold are scaled accordingly. \
+            --from_scores needs the --reduction_factor the scores were saved with.",
+        type=int,
+        choices=[1, 2, 4, 8],
+        default=1,
+    )
+
+    parser.add_argument(
+        "--compare_full_resolution",
+        help="Additionally compare the images in full resolution and report how many decisions of the \
+            --reduction_factor differ.",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--manifest_path",
+        help="The path to a folder to stream the sorted listing of the images and the keep/delete decisions \
+            through, instead of holding them in memory. For datasets with millions of images.",
+        type=str,
+        required=False,
+    )
+
+    parser.add_argument(
+        "--read_ahead",
+        help="The number of images every worker reads and preprocesses ahead of its comparison on as many \
+            threads. Hides the latency of network storage.",
+        type=int,
+        default=0,
+    )
+
+    parser.add_argument(
+        "--decode_workers",
+        help="The number of processes every worker reads and preprocesses the images on. The frames are \
+            passed to the comparison through shared memory. The number of workers is divided by 1 + \
+            decode_workers.",
+        type=int,
+        default=0,
+    )
+
+    parser.add_argument(
+        "--batch_size",
+        help="The number of consecutive images of the same resolution that are compared as one stack. \
+            Pairs without any change skip the contour search. Not used together with a prefilter.",
+        type=int,
+        default=16,
+    )
+
+    parser.add_argument(
+        "--scorer",
+        help="How the changed areas of a pair are summed up to its score: the areas of the contours or the \
+            pixel counts of the connected components.",
+        choices=["contours", "connected_components"],
+        default="contours",
+    )
+
+    parser.add_argument(
+        "--stride",
+        help="Compare every image with the image stride images later first and only bisect the intervals \
+            that reach the score threshold, which skips most comparisons of static stretches.",
+        type=int,
+        default=1,
+    )
+
+    parser.add_argument(
+        "--prefilter_identical_mad",
+        help="Pairs with a mean absolute difference of their 32x32 thumbnails at or below this value are \
+            considered identical without comparing the contours.",
+        type=float,
+        required=False,
+    )
+
+    parser.add_argument(
+        "--prefilter_different_mad",
+        help="Pairs with a mean absolute difference of their 32x32 thumbnails at or above this value are \
+            considered different without comparing the contours.",
+        type=float,
+        required=False,
+    )
+
+    parser.add_argument(
+        "--prefilter_identical_hash_distance",
+        help="Pairs with a hamming distance of their 64 bit difference hashes at or below this value are \
+            considered identical without comparing the contours.",
+        type=int,
+        required=False,
+    )
+
+    parser.add_argument(
+        "--prefilter_different_hash_distance",
+        help="Pairs with a hamming distance of their 64 bit difference hashes at or above this value are \
+            considered different without comparing the contours.",
+        type=int,
+        required=False,
+    )
+
+    parser.add_argument(
+        "--validate_images",
+        help="Read the png headers of all images before the comparison and skip the images that are no png \
+            or truncated, and log the dimensions of every camera.",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--min_image_size",
+        help="The min width and height of an image, smaller images are skipped. Implies --validate_images.",
+        type=int,
+        nargs=2,
+        required=False,
+    )
+
+    parser.add_argument(
+        "--near_duplicate_distance",
+        help="The max hamming distance of the difference hashes of a kept image and any earlier kept image \
+            for it to be deleted as a near-duplicate. Not set by default.",
+        type=int,
+        required=False,
+    )
+
+    parser.add_argument(
+        "--near_duplicate_across_cameras",
+        help="Search the near-duplicates in the kept images of all cameras instead of the same camera.",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--signature_path",
+        help="The path to a npz file to load and save the signatures of the kept images in, so that later \
+            runs find near-duplicates of the images kept before.",
+        type=str,
+        required=False,
+    )
+
+    parser.add_argument(
+        "--checkpoint_path",
+        help="The path to a folder to save the progress of the comparison in, so that a crashed run can be \
+            continued with --resume. The images are only deleted or copied once their decisions are saved.",
+        type=str,
+        required=False,
+    )
+
+    parser.add_argument(
+        "--checkpoint_interval",
+        help="The min seconds between two checkpoints",
+        type=float,
+        default=60.0,
+    )
+
+    parser.add_argument(
+        "--resume",
+        help="Continue the comparison from the checkpoint in --checkpoint_path instead of starting over.",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--profile",
+        help="Record the time, the number of calls and the bytes read of every stage per camera and log \
+            a summary after the run.",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--profile_path",
+        help="The path to a json file to save the --profile stats in. Implies --profile.",
+        type=str,
+        required=False,
+    )
+
+    parser.add_argument(
+        "--watch",
+        help="Keep watching the --data_path and deduplicate the images as they arrive, until interrupted.",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--poll_interval",
+        help="The seconds between two scans of the --data_path in --watch mode",
+        type=float,
+        default=5.0,
+    )
+
+    parser.add_argument(
+        "--state_path",
+        help="The path to a folder to save the state of the --watch mode in, so that a restart continues \
+            where it stopped.",
+        type=str,
+        required=False,
+    )
+
     parser.add_argument(
         "--output_path",
         help="The path to the folder to save the unique images",
@@ -94,6 +640,37 @@ if __name__ == "__main__":
         required=False,
     )
 
+    parser.add_argument(
+        "--copy_mode",
+        help="How the unique images are copied to the output_path. hardlink and reflink do not copy any data \
+            if the output_path is on the same filesystem.",
+        type=str,
+        choices=COPY_MODES,
+        default="copy",
+    )
+
+    parser.add_argument(
+        "--output_format",
+        help="Copy the unique images as single files or write them into tar shards per camera, with a csv \
+            index of the filename, offset, size and timestamp of the images next to every shard.",
+        choices=["files", "shards"],
+        default="files",
+    )
+
+    parser.add_argument(
+        "--shard_size",
+        help="The max size of a shard in MB",
+        type=int,
+        default=1024,
+    )
+
+    parser.add_argument(
+        "--io_workers",
+        help="The number of threads copying or deleting images",
+        type=int,
+        required=False,
+    )
+
     parser.add_argument(
         "--delete",
         help="Determines if the images that are not unique should be deleted. \
@@ -104,6 +681,75 @@ if __name__ == "__main__":
 
     args = parser.parse_args()
 
+    if args.from_scores and args.scores_path is None:
+        parser.error("--from_scores requires --scores_path")
+
+    if args.manifest_path is not None and (
+        args.from_scores or args.scores_path is not None or args.compare_full_resolution
+    ):
+        parser.error(
+            "--manifest_path cannot be used with --scores_path, --from_scores or --compare_full_resolution"
+        )
+
+    if (args.validate_images or args.min_image_size is not None) and (
+        args.watch or args.from_scores or args.manifest_path is not None
+    ):
+        parser.error(
+            "--validate_images and --min_image_size cannot be used with --watch, --from_scores or --manifest_path"
+        )
+
+    if args.near_duplicate_distance is None and (
+        args.near_duplicate_across_cameras or args.signature_path is not None
+    ):
+        parser.error(
+            "--near_duplicate_across_cameras and --signature_path require --near_duplicate_distance"
+        )
+
+    if args.near_duplicate_distance is not None and (
+        args.watch or args.manifest_path is not None
+    ):
+        parser.error(
+            "--near_duplicate_distance cannot be used with --watch or --manifest_path"
+        )
+
+    if args.stride < 1:
+        parser.error("--stride has to be at least 1")
+
+    if args.stride > 1 and (args.watch or args.scores_path is not None):
+        parser.error("--stride cannot be used with --watch or --scores_path")
+
+    if args.decode_workers < 0:
+        parser.error("--decode_workers cannot be negative")
+
+    if args.decode_workers > 0 and (args.watch or args.stride > 1):
+        parser.error("--decode_workers cannot be used with --watch or --stride")
+
+    if is_archive(args.data_path) and (args.watch or args.delete):
+        parser.error(
+            "--watch and --delete cannot be used with an archive as --data_path"
+        )
+
+    if args.output_format == "shards" and (args.watch or args.delete or args.resume):
+        parser.error(
+            "--output_format shards cannot be used with --watch, --delete or --resume"
+        )
+
+    if args.shard_size < 1:
+        parser.error("--shard_size has to be at least 1")
+
+    if args.resume and args.checkpoint_path is None:
+        parser.error("--resume requires --checkpoint_path")
+
+    if args.checkpoint_path is not None and (
+        args.watch
+        or args.from_scores
+        or args.scores_path is not None
+        or args.manifest_path is not None
+    ):
+        parser.error(
+            "--checkpoint_path cannot be used with --watch, --scores_path, --from_scores or --manifest_path"
+        )
+
     # Setup logging
     if args.verbose:
         loglevel = logging.DEBUG
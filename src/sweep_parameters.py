@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+
+import argparse
+import csv
+import errno
+import logging
+import os
+import sys
+from typing import Dict, List, Tuple
+
+from src.utils.load_data import get_images_in_folder
+from src.utils.sweep import sweep_parameters
+
+
+def radius_list(value: str) -> Tuple[int, ...]:
+    """Parses a comma separated list of radii, i.e. '5,11,21'."""
+    try:
+        return tuple(int(radius) for radius in value.split(",") if radius)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(
+            f"'{value}' is not a comma separated list of radii."
+        ) from e
+
+
+def main(args, loglevel):
+    logging.basicConfig(format="%(levelname)s: %(message)s", level=loglevel)
+
+    # check if args.data_path is a valid path
+    if not os.path.exists(args.data_path):
+        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), args.data_path)
+
+    files_by_camera_id: Dict[str, List[str]] = get_images_in_folder(args.data_path)
+    logging.info("Loaded images from %s", args.data_path)
+
+    rows = sweep_parameters(
+        files_by_camera_id,
+        args.data_path,
+        args.gaussian_blur_radius_lists,
+        args.min_contour_areas,
+        args.score_thresholds,
+        chunk_size=args.chunk_size,
+    )
+    logging.info("Parameter sweep finished.")
+
+    fieldnames = [
+        "gaussian_blur_radius_list",
+        "min_contour_area",
+        "score_threshold",
+        "camera_id",
+        "keep",
+        "delete",
+    ]
+
+    if args.output_path is None:
+        writer = csv.DictWriter(sys.stdout, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        with open(args.output_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+        logging.info("Sweep results have been saved to %s", args.output_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="This program counts the images to keep and to delete for a grid of parameters \
+            while reading every image only once.",
+        epilog="As an alternative to the commandline, params can be placed in a file, \
+            one per line, and specified on the commandline like '%(prog)s @params.conf'.",
+        fromfile_prefix_chars="@",
+    )
+
+    parser.add_argument(
+        "-v", "--verbose", help="Increase the output verbosity", action="store_true"
+    )
+
+    parser.add_argument(
+        "--data_path",
+        help="Absolute path to the dataset",
+        type=str,
+        required=True,
+    )
+
+    parser.add_argument(
+        "--gaussian_blur_radius_lists",
+        help="The lists with radii to be applied onto the image, each list separated by commas \
+            (i.e. 5,11,21 5,11)",
+        type=radius_list,
+        nargs="+",
+        required=True,
+    )
+
+    parser.add_argument(
+        "--min_contour_areas",
+        help="The min areas for contours to be considered",
+        type=int,
+        nargs="+",
+        required=True,
+    )
+
+    parser.add_argument(
+        "--score_thresholds",
+        help="The thresholds for the score for two images to be considered similar",
+        type=int,
+        nargs="+",
+        required=True,
+    )
+
+    parser.add_argument(
+        "--chunk_size",
+        help="The max number of image pairs compared per job",
+        type=int,
+        required=False,
+    )
+
+    parser.add_argument(
+        "--output_path",
+        help="The path to the csv file to save the results in. If not set, the results are printed.",
+        type=str,
+        required=False,
+    )
+
+    args = parser.parse_args()
+
+    # Setup logging
+    if args.verbose:
+        loglevel = logging.DEBUG
+    else:
+        loglevel = logging.INFO
+
+    main(args, loglevel)
@@ -0,0 +1,425 @@
+import logging
+import os
+import tarfile
+import threading
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+# the extensions of the archives that can be read without extracting them, compared case-insensitively
+ARCHIVE_EXTENSIONS: Tuple[str, ...] = (".tar", ".zip")
+
+# the size of a tar header and the unit the data of a tar member is padded to
+_TAR_BLOCK: int = 512
+# the tar types of regular files
+_TAR_FILE_TYPES: Tuple[bytes, ...] = (b"0", b"\0", b"7")
+# the tar types of headers that extend the next header, i.e. with a long name
+_TAR_EXTENSION_TYPES: Tuple[bytes, ...] = (b"x", b"g", b"L", b"K")
+# the tar types of links, directories and devices, which have no data
+_TAR_NO_DATA_TYPES: Tuple[bytes, ...] = (b"1", b"2", b"3", b"4", b"5", b"6")
+
+# the opened archives of this process by their absolute path, None for a path that is no archive
+_archives: Dict[str, Optional["ImageArchive"]] = dict()
+_archives_lock = threading.Lock()
+
+
+class ImageArchive:
+    """The members of a tar or zip archive of images, read without extracting them.
+
+    The members are listed once by their headers and kept by their basename, so an image in the archive has \
+    the same filename as the extracted image. The data of a tar member is read with a single pread at its \
+    offset, so the images of a camera that were added in the order of their timestamps are read sequentially. \
+    Compressed tars cannot be read at an offset and are not supported, the members of a zip can be compressed. \
+    The file is opened again in every process, i.e. in the workers of compare_images_parallel.
+    """
+
+    def __init__(self, archive_path: Union[str, Path]):
+        """
+        Args:
+            archive_path (Union[str, Path]): The path to the tar or zip file.
+
+        Raises:
+            ValueError: If the file is no uncompressed tar or zip.
+        """
+        self.archive_path = os.path.abspath(archive_path)
+        self.is_zip = zipfile.is_zipfile(self.archive_path)
+
+        # the offset and size of the data of every tar member or the info of every zip member
+        self._members: Dict[str, Union[Tuple[int, int], zipfile.ZipInfo]] = dict()
+        if self.is_zip:
+            with zipfile.ZipFile(self.archive_path) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir():
+                        self._add_member(info.filename, info)
+        else:
+            members = _scan_tar_headers(self.archive_path)
+            if members is None:
+                members = _read_tar_headers(self.archive_path)
+            for name, offset, size in members:
+                self._add_member(name, (offset, size))
+
+        # the open file and the process it was opened in
+        self._file: Optional[Union[int, zipfile.ZipFile]] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _add_member(
+        self, name: str, member: Union[Tuple[int, int], zipfile.ZipInfo]
+    ) -> None:
+        filename = os.path.basename(name)
+        if filename in self._members:
+            logging.warning(
+                "Skipping %s in %s, an earlier member has the same filename.",
+                name,
+                self.archive_path,
+            )
+            return
+        self._members[filename] = member
+
+    def __contains__(self, filename: str) -> bool:
+        return filename in self._members
+
+    def names(self) -> List[str]:
+        """The function returns the filenames of all members in the order of the archive.
+
+        Returns:
+            List[str]: The basenames of the members.
+        """
+        return list(self._members)
+
+    def size(self, filename: str) -> int:
+        """The function returns the uncompressed size of a member.
+
+        Args:
+            filename (str): The filename of the member.
+
+        Raises:
+            KeyError: If the archive has no member with the filename.
+
+        Returns:
+            int: The size in bytes.
+        """
+        member = self._members[filename]
+        return member.file_size if self.is_zip else member[1]
+
+    def _open(self) -> Union[int, zipfile.ZipFile]:
+        # a forked process must not share the file position of the zip with its parent
+        with self._lock:
+            if self._pid != os.getpid():
+                if self.is_zip:
+                    self._file = zipfile.ZipFile(self.archive_path)
+                else:
+                    self._file = os.open(self.archive_path, os.O_RDONLY)
+                self._pid = os.getpid()
+            return self._file
+
+    def read(self, filename: str) -> bytes:
+        """The function reads the data of a member.
+
+        Args:
+            filename (str): The filename of the member.
+
+        Raises:
+            KeyError: If the archive has no member with the filename.
+
+        Returns:
+            bytes: The uncompressed data.
+        """
+        member = self._members[filename]
+        archive = self._open()
+
+        if self.is_zip:
+            return archive.read(member)
+
+        offset, size = member
+        return os.pread(archive, size, offset)
+
+    def extract(self, filename: str, dst_path: Union[str, Path]) -> None:
+        """The function writes the data of a member into a file.
+
+        Args:
+            filename (str): The filename of the member.
+            dst_path (Union[str, Path]): The path to the destination file.
+
+        Raises:
+            KeyError: If the archive has no member with the filename.
+        """
+        data = self.read(filename)
+        with open(dst_path, "wb") as f:
+            f.write(data)
+
+
+def _parse_pax_records(data: bytes) -> Dict[bytes, bytes]:
+    """The function parses the 'length key=value\\n' records of a pax header."""
+    records: Dict[bytes, bytes] = dict()
+    position = 0
+    while position < len(data) and data[position] != 0:
+        space = data.index(b" ", position)
+        length = int(data[position:space])
+        record_start, record_end = space + 1, position + length - 1
+        key, value = data[record_start:record_end].split(b"=", 1)
+        records[key] = value
+        position += length
+
+    return records
+
+
+def _scan_tar_headers(archive_path: str) -> Optional[List[Tuple[str, int, int]]]:
+    """The function lists the regular files of a tar by parsing the headers directly, which is many times \
+    faster than tarfile for millions of small members. Only the headers are read, the data is skipped. The \
+    path and size of pax headers and the long names of gnu tar are applied to the next member.
+
+    Args:
+        archive_path (str): The path to the tar file.
+
+    Returns:
+        Optional[List[Tuple[str, int, int]]]: The name, the offset of the data and the size of every regular \
+            file or None if the archive needs tarfile, i.e. it is damaged or has a global pax path.
+    """
+    members: List[Tuple[str, int, int]] = []
+    offset = 0
+    # the values of the extension headers for the next member
+    next_name: Optional[bytes] = None
+    next_size: Optional[int] = None
+
+    with open(archive_path, "rb") as f:
+        while True:
+            f.seek(offset)
+            header = f.read(_TAR_BLOCK)
+            if len(header) < _TAR_BLOCK:
+                return None
+            # the archive ends with empty blocks
+            if header[0] == 0:
+                return members
+
+            typeflag = header[156:157]
+            try:
+                checksum = int(header[148:156].strip(b" \0") or b"0", 8)
+                size = (
+                    next_size
+                    if next_size is not None
+                    else int(header[124:136].strip(b" \0") or b"0", 8)
+                )
+            except ValueError:
+                # i.e. a size in base-256 of a member larger than 8 GiB
+                return None
+            # the checksum is computed with spaces in its own field
+            if checksum != sum(header[:148]) + 256 + sum(header[156:]):
+                return None
+
+            data_offset = offset + _TAR_BLOCK
+            offset = data_offset + -(-size // _TAR_BLOCK) * _TAR_BLOCK
+
+            if typeflag in _TAR_EXTENSION_TYPES:
+                data = f.read(size)
+                if typeflag == b"L":
+                    next_name = data.rstrip(b"\0")
+                elif typeflag in (b"x", b"g"):
+                    try:
+                        records = _parse_pax_records(data)
+                        if b"size" in records:
+                            next_size = int(records[b"size"])
+                    except ValueError:
+                        return None
+                    if typeflag == b"g" and (b"path" in records or b"size" in records):
+                        return None
+                    next_name = records.get(b"path", next_name)
+                continue
+
+            name = header[:100].split(b"\0", 1)[0]
+            if header[257:263] == b"ustar\0":
+                prefix = header[345:500].split(b"\0", 1)[0]
+                if prefix:
+                    name = prefix + b"/" + name
+            if next_name is not None:
+                name = next_name
+
+            if typeflag in _TAR_FILE_TYPES:
+                members.append(
+                    (name.decode("utf-8", "surrogateescape"), data_offset, size)
+                )
+            elif typeflag in _TAR_NO_DATA_TYPES:
+                # the size of a link or a directory is no data that follows the header
+                offset = data_offset
+            elif typeflag == b"S":
+                # the data of a sparse file is not stored in one piece
+                return None
+            next_name, next_size = None, None
+
+
+def _read_tar_headers(archive_path: str) -> List[Tuple[str, int, int]]:
+    """The function lists the regular files of a tar with tarfile, like _scan_tar_headers.
+
+    Raises:
+        ValueError: If the file is no uncompressed tar.
+    """
+    try:
+        with tarfile.open(archive_path, "r:") as archive:
+            return [
+                (info.name, info.offset_data, info.size)
+                for info in archive
+                if info.isfile()
+            ]
+    except tarfile.ReadError as e:
+        raise ValueError(
+            f"'{archive_path}' is no zip or uncompressed tar archive."
+        ) from e
+
+
+def is_archive(path: Union[str, Path]) -> bool:
+    """The function checks if a path is an archive file that can be used as data path.
+
+    Args:
+        path (Union[str, Path]): The path.
+
+    Returns:
+        bool: True if the path is a file with one of the ARCHIVE_EXTENSIONS.
+    """
+    return str(path).lower().endswith(ARCHIVE_EXTENSIONS) and os.path.isfile(path)
+
+
+def open_archive(archive_path: Union[str, Path]) -> ImageArchive:
+    """The function returns the ImageArchive of a path, every archive is only listed once per process.
+
+    Args:
+        archive_path (Union[str, Path]): The path to the tar or zip file.
+
+    Raises:
+        ValueError: If the file is no uncompressed tar or zip.
+
+    Returns:
+        ImageArchive: The archive.
+    """
+    archive = find_archive(archive_path)
+    if archive is None:
+        raise ValueError(f"'{archive_path}' is no zip or uncompressed tar archive.")
+    return archive
+
+
+def find_archive(archive_path: Union[str, Path]) -> Optional[ImageArchive]:
+    """The function returns the ImageArchive of a path or None if the path is no archive. The result is cached.
+
+    Args:
+        archive_path (Union[str, Path]): The path.
+
+    Raises:
+        ValueError: If the file has an archive extension, but is no uncompressed tar or zip.
+
+    Returns:
+        Optional[ImageArchive]: The archive.
+    """
+    key = os.path.abspath(archive_path)
+    with _archives_lock:
+        if key not in _archives:
+            _archives[key] = ImageArchive(key) if is_archive(key) else None
+        return _archives[key]
+
+
+def find_archive_member(
+    image_path: Union[str, Path],
+) -> Optional[Tuple[ImageArchive, str]]:
+    """The function splits the path of an image inside an archive, i.e. 'data/c10.tar/c10-1616778760501.png', \
+    into the archive and the filename of the member.
+
+    Args:
+        image_path (Union[str, Path]): The path to the image.
+
+    Returns:
+        Optional[Tuple[ImageArchive, str]]: The archive and the filename or None if the image is no member \
+            of an archive.
+    """
+    directory, filename = os.path.split(str(image_path))
+    # most paths are no members, they do not need a system call
+    if not directory.lower().endswith(ARCHIVE_EXTENSIONS):
+        return None
+
+    archive = find_archive(directory)
+    if archive is None:
+        return None
+    return archive, filename
+
+
+def read_image(image_path: Union[str, Path], flags: int) -> Optional[np.ndarray]:
+    """The function reads an image like cv2.imread, an image inside an archive is decoded from memory with \
+    cv2.imdecode.
+
+    Args:
+        image_path (Union[str, Path]): The path to the image file or the path of the archive joined with the \
+            filename of the member.
+        flags (int): The cv2.imread flags.
+
+    Returns:
+        Optional[np.ndarray]: The image or None if it cannot be read.
+    """
+    member = find_archive_member(image_path)
+    if member is None:
+        return cv2.imread(str(image_path), flags)
+
+    archive, filename = member
+    try:
+        data = archive.read(filename)
+    except (KeyError, OSError, zipfile.BadZipFile):
+        return None
+
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flags)
+
+
+def image_size(image_path: Union[str, Path]) -> int:
+    """The function returns the size of an image file or of a member of an archive.
+
+    Args:
+        image_path (Union[str, Path]): The path to the image, see read_image.
+
+    Raises:
+        FileNotFoundError: If the image does not exist.
+
+    Returns:
+        int: The size in bytes.
+    """
+    member = find_archive_member(image_path)
+    if member is None:
+        return os.path.getsize(image_path)
+
+    archive, filename = member
+    if filename not in archive:
+        raise FileNotFoundError(f"'{filename}' is no member of {archive.archive_path}")
+    return archive.size(filename)
+
+
+def source_path(image_path: Union[str, Path]) -> str:
+    """The function returns the file that holds the data of an image, the archive for a member of an archive.
+
+    Args:
+        image_path (Union[str, Path]): The path to the image, see read_image.
+
+    Returns:
+        str: The path to the file.
+    """
+    member = find_archive_member(image_path)
+    return str(image_path) if member is None else member[0].archive_path
+
+
+def read_file(image_path: Union[str, Path]) -> bytes:
+    """The function reads the encoded data of an image file or of a member of an archive.
+
+    Args:
+        image_path (Union[str, Path]): The path to the image, see read_image.
+
+    Raises:
+        FileNotFoundError: If the image does not exist.
+
+    Returns:
+        bytes: The data of the file.
+    """
+    member = find_archive_member(image_path)
+    if member is None:
+        with open(image_path, "rb") as f:
+            return f.read()
+
+    archive, filename = member
+    if filename not in archive:
+        raise FileNotFoundError(f"'{filename}' is no member of {archive.archive_path}")
+    return archive.read(filename)
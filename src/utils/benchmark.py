@@ -0,0 +1,209 @@
+import os
+import platform
+import resource
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple, Union
+
+import cv2
+
+from src.utils.archive import image_size, read_image
+from src.utils.handle_files import compare_images_parallel, copy_images_parallel
+from src.utils.preprocessing import get_camera_settings, get_preprocessing_plan
+
+BENCHMARK_STAGES: Tuple[str, ...] = ("decode", "preprocess", "compare", "copy")
+
+# the metrics that are compared to a baseline and if higher values are better
+_REGRESSION_METRICS: Dict[str, bool] = {
+    "frames_per_second": True,
+    "bytes_per_second": True,
+    "peak_rss_bytes": False,
+}
+
+
+def _decode_stage(
+    files_by_camera_id: Dict[str, List[str]], data_path: Union[str, Path]
+) -> None:
+    """The function reads all frames."""
+    for files in files_by_camera_id.values():
+        for filename in files:
+            read_image(os.path.join(data_path, filename), cv2.IMREAD_COLOR)
+
+
+def _preprocess_stage(
+    files_by_camera_id: Dict[str, List[str]], data_path: Union[str, Path]
+) -> None:
+    """The function reads and preprocesses all frames like the comparison does."""
+    for camera_id, files in files_by_camera_id.items():
+        settings = get_camera_settings(camera_id)
+        for filename in files:
+            frame = read_image(os.path.join(data_path, filename), cv2.IMREAD_COLOR)
+            plan = get_preprocessing_plan(
+                frame.shape, (5, 11, 21), settings.mask, settings.crop
+            )
+            plan.apply(frame)
+
+
+def _compare_stage(
+    files_by_camera_id: Dict[str, List[str]], data_path: Union[str, Path]
+) -> None:
+    """The function compares all frames with the default parameters."""
+    compare_images_parallel(files_by_camera_id, data_path)
+
+
+def _copy_stage(
+    files_by_camera_id: Dict[str, List[str]], data_path: Union[str, Path]
+) -> None:
+    """The function copies all frames to a temporary folder."""
+    output_path = tempfile.mkdtemp(prefix="benchmark_copy_")
+    try:
+        copy_images_parallel(files_by_camera_id, data_path, output_path)
+    finally:
+        shutil.rmtree(output_path, ignore_errors=True)
+
+
+_STAGE_FUNCTIONS: Dict[
+    str, Callable[[Dict[str, List[str]], Union[str, Path]], None]
+] = {
+    "decode": _decode_stage,
+    "preprocess": _preprocess_stage,
+    "compare": _compare_stage,
+    "copy": _copy_stage,
+}
+
+
+def _peak_rss_bytes() -> int:
+    """The function returns the peak resident set size of this process or one of its finished children."""
+    peak_rss = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # linux reports kilobytes, macOS bytes
+    return peak_rss if platform.system() == "Darwin" else peak_rss * 1024
+
+
+def _run_stage(
+    stage: str, files_by_camera_id: Dict[str, List[str]], data_path: Union[str, Path]
+) -> Tuple[float, int]:
+    """The function runs a stage and returns the seconds it took and the peak RSS of the process in bytes."""
+    start = time.perf_counter()
+    _STAGE_FUNCTIONS[stage](files_by_camera_id, data_path)
+    return time.perf_counter() - start, _peak_rss_bytes()
+
+
+def run_benchmark(
+    files_by_camera_id: Dict[str, List[str]],
+    data_path: Union[str, Path],
+    stages: List[str] = BENCHMARK_STAGES,
+    repeat: int = 1,
+) -> Dict[str, Dict[str, float]]:
+    """The function measures the throughput and the peak memory of the stages of the pipeline.
+
+    Every run of a stage starts in a fresh process, so the peak RSS only contains the stage (and the worker \
+    processes it started). The fastest of the repeated runs is reported.
+
+    Args:
+        files_by_camera_id (Dict[str, List[str]]): A dictionary with the camera_id as key and a list of filenames \
+            from the images.
+        data_path (Union[str, Path]): The data path to the folder for the camera images.
+        stages (List[str], optional): The stages to run, see BENCHMARK_STAGES. Defaults to all stages.
+        repeat (int, optional): The number of runs per stage. Defaults to 1.
+
+    Raises:
+        ValueError: If a stage is unknown.
+
+    Returns:
+        Dict[str, Dict[str, float]]: The frames, bytes, seconds, frames_per_second, bytes_per_second and \
+            peak_rss_bytes by stage.
+    """
+    unknown_stages = [stage for stage in stages if stage not in _STAGE_FUNCTIONS]
+    if unknown_stages:
+        raise ValueError(
+            f"The stages have to be in {BENCHMARK_STAGES}, got {unknown_stages}."
+        )
+
+    num_frames = sum(len(files) for files in files_by_camera_id.values())
+    num_bytes = sum(
+        image_size(os.path.join(data_path, filename))
+        for files in files_by_camera_id.values()
+        for filename in files
+    )
+
+    results: Dict[str, Dict[str, float]] = dict()
+    for stage in stages:
+        seconds = float("inf")
+        peak_rss = 0
+        for _ in range(repeat):
+            with ProcessPoolExecutor(
+                max_workers=1, mp_context=get_context("spawn")
+            ) as executor:
+                run_seconds, run_peak_rss = executor.submit(
+                    _run_stage, stage, files_by_camera_id, data_path
+                ).result()
+            seconds = min(seconds, run_seconds)
+            peak_rss = max(peak_rss, run_peak_rss)
+
+        results[stage] = {
+            "frames": num_frames,
+            "bytes": num_bytes,
+            "seconds": seconds,
+            "frames_per_second": num_frames / seconds,
+            "bytes_per_second": num_bytes / seconds,
+            "peak_rss_bytes": peak_rss,
+        }
+
+    return results
+
+
+def benchmark_environment() -> Dict[str, Union[str, int]]:
+    """The function describes the machine the benchmark ran on, to judge if results are comparable.
+
+    Returns:
+        Dict[str, Union[str, int]]: The python and OpenCV versions, the platform and the number of CPU cores.
+    """
+    return {
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare_to_baseline(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float = 0.1,
+) -> List[str]:
+    """The function finds the metrics of the stages that got worse than the baseline by more than the tolerance.
+
+    Args:
+        results (Dict[str, Dict[str, float]]): The results of run_benchmark.
+        baseline (Dict[str, Dict[str, float]]): The results of a previous run_benchmark.
+        tolerance (float, optional): The relative change that is accepted, i.e. 0.1 for 10%. Defaults to 0.1.
+
+    Returns:
+        List[str]: A message per regression, empty if there are none. Stages that are not in both are skipped.
+    """
+    regressions: List[str] = []
+    for stage, stage_results in results.items():
+        if stage not in baseline:
+            continue
+
+        for metric, higher_is_better in _REGRESSION_METRICS.items():
+            value = stage_results[metric]
+            baseline_value = baseline[stage][metric]
+            if higher_is_better:
+                regressed = value < baseline_value * (1 - tolerance)
+            else:
+                regressed = value > baseline_value * (1 + tolerance)
+
+            if regressed:
+                regressions.append(
+                    f"{stage} {metric}: {value:.6g} (baseline {baseline_value:.6g})"
+                )
+
+    return regressions
@@ -0,0 +1,219 @@
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO, Tuple, Union
+
+CHECKPOINT_FILENAME: str = "checkpoint.json"
+# the decisions of a camera, one line per image: 1 (keep) or 0 (delete), a tab and the filename
+DECISIONS_SUFFIX: str = ".decisions"
+
+
+class CameraProgress:
+    """The progress of the comparison of a camera at a checkpoint."""
+
+    def __init__(
+        self,
+        num_decided: int = 0,
+        resume_filename: Optional[str] = None,
+        prev_frame_same: bool = False,
+        last_kept_filename: Optional[str] = None,
+        decisions_offset: int = 0,
+        quarantined: Optional[List[str]] = None,
+        finished: bool = False,
+    ):
+        """
+        Args:
+            num_decided (int, optional): The number of decided images. Defaults to 0.
+            resume_filename (Optional[str], optional): The image a resumed comparison continues with, the last \
+                readable image that is not decided yet. Defaults to None, the first image.
+            prev_frame_same (bool, optional): The state of the keep/delete decisions. Defaults to False.
+            last_kept_filename (Optional[str], optional): The last image that is kept. Defaults to None.
+            decisions_offset (int, optional): The size of the decisions file at the checkpoint. Defaults to 0.
+            quarantined (Optional[List[str]], optional): The images that could not be read. Defaults to None.
+            finished (bool, optional): If all images of the camera are decided. Defaults to False.
+        """
+        self.num_decided = num_decided
+        self.resume_filename = resume_filename
+        self.prev_frame_same = prev_frame_same
+        self.last_kept_filename = last_kept_filename
+        self.decisions_offset = decisions_offset
+        self.quarantined = quarantined if quarantined is not None else []
+        self.finished = finished
+
+
+class ComparisonCheckpoint:
+    """Saves the progress of the comparison per camera into a folder, so that a crashed run can be resumed.
+
+    Every decision is appended to <camera_id>.decisions as soon as it is made. In intervals, the decision files \
+    are flushed to the disk and checkpoint.json is replaced atomically with the progress of every camera: the \
+    number of decided images, the image the comparison continues with, the state of the keep/delete \
+    decisions, the last kept image, the size of the decision file and the quarantined images. A resumed run \
+    truncates the decision files to the sizes of the last checkpoint, so decisions made after it are made again.
+    """
+
+    def __init__(
+        self,
+        checkpoint_path: Union[str, Path],
+        parameters: Dict[str, Any],
+        interval_seconds: float = 60.0,
+        resume: bool = False,
+    ):
+        """
+        Args:
+            checkpoint_path (Union[str, Path]): The path to the folder to save the checkpoint in.
+            parameters (Dict[str, Any]): The json serializable parameters of the comparison. A run can only \
+                be resumed with the same parameters.
+            interval_seconds (float, optional): The min seconds between two checkpoints. Defaults to 60.0.
+            resume (bool, optional): Continue from the checkpoint in the folder, otherwise an existing \
+                checkpoint is discarded. Defaults to False.
+
+        Raises:
+            ValueError: If the checkpoint to resume was saved with other parameters.
+        """
+        self.checkpoint_path = checkpoint_path
+        self.parameters = parameters
+        self.interval_seconds = interval_seconds
+        self.progress_by_camera_id: Dict[str, CameraProgress] = dict()
+
+        self._decision_files: Dict[str, TextIO] = dict()
+        self._last_save = time.monotonic()
+
+        os.makedirs(checkpoint_path, exist_ok=True)
+
+        if resume and os.path.exists(self._checkpoint_file()):
+            self._load()
+        else:
+            for filename in os.listdir(checkpoint_path):
+                if (
+                    filename.endswith(DECISIONS_SUFFIX)
+                    or filename == CHECKPOINT_FILENAME
+                ):
+                    os.remove(os.path.join(checkpoint_path, filename))
+
+    def _checkpoint_file(self) -> str:
+        return os.path.join(self.checkpoint_path, CHECKPOINT_FILENAME)
+
+    def _decisions_file(self, camera_id: str) -> str:
+        return os.path.join(self.checkpoint_path, f"{camera_id}{DECISIONS_SUFFIX}")
+
+    def _load(self) -> None:
+        """The function loads the checkpoint and truncates the decision files to it."""
+        with open(self._checkpoint_file()) as f:
+            checkpoint = json.load(f)
+
+        if checkpoint["parameters"] != self.parameters:
+            raise ValueError(
+                f"The checkpoint in '{self.checkpoint_path}' was saved with the parameters "
+                f"{checkpoint['parameters']}, got {self.parameters}."
+            )
+
+        for camera_id, progress in checkpoint["cameras"].items():
+            self.progress_by_camera_id[camera_id] = CameraProgress(**progress)
+
+            # the decisions after the checkpoint are made again
+            with open(self._decisions_file(camera_id), "a") as f:
+                f.truncate(progress["decisions_offset"])
+
+        logging.info(
+            "Resuming from the checkpoint in %s, %d images were decided.",
+            self.checkpoint_path,
+            sum(p.num_decided for p in self.progress_by_camera_id.values()),
+        )
+
+    def progress(self, camera_id: str) -> CameraProgress:
+        """The function returns the progress of a camera, which is empty for a camera that was not started.
+
+        Args:
+            camera_id (str): The camera id string (i.e. 'c21')
+
+        Returns:
+            CameraProgress: The progress of the camera.
+        """
+        return self.progress_by_camera_id.setdefault(camera_id, CameraProgress())
+
+    def restored_decisions(self, camera_id: str) -> List[Tuple[str, bool]]:
+        """The function reads the decisions of a camera that were made before the checkpoint.
+
+        Args:
+            camera_id (str): The camera id string (i.e. 'c21')
+
+        Returns:
+            List[Tuple[str, bool]]: The filename and if the image is kept, in the order of the decisions.
+        """
+        if not os.path.exists(self._decisions_file(camera_id)):
+            return []
+
+        with open(self._decisions_file(camera_id)) as f:
+            return [
+                (line[2:].rstrip("\n"), line[0] == "1") for line in f if line.strip()
+            ]
+
+    def record_decision(self, camera_id: str, filename: str, keep: bool) -> None:
+        """The function appends a decision to the decision file of a camera.
+
+        Args:
+            camera_id (str): The camera id string (i.e. 'c21')
+            filename (str): The filename of the decided image.
+            keep (bool): If the image is kept.
+        """
+        if camera_id not in self._decision_files:
+            self._decision_files[camera_id] = open(self._decisions_file(camera_id), "a")
+        self._decision_files[camera_id].write(f"{int(keep)}\t{filename}\n")
+
+        progress = self.progress(camera_id)
+        progress.num_decided += 1
+        if keep:
+            progress.last_kept_filename = filename
+
+    def save(self, force: bool = False) -> bool:
+        """The function saves a checkpoint, if the interval passed since the last one.
+
+        Args:
+            force (bool, optional): Save the checkpoint regardless of the interval. Defaults to False.
+
+        Returns:
+            bool: If a checkpoint was saved.
+        """
+        if not force and time.monotonic() - self._last_save < self.interval_seconds:
+            return False
+
+        for camera_id, f in self._decision_files.items():
+            f.flush()
+            os.fsync(f.fileno())
+            self.progress(camera_id).decisions_offset = f.tell()
+
+        checkpoint = {
+            "parameters": self.parameters,
+            "cameras": {
+                camera_id: vars(progress)
+                for camera_id, progress in self.progress_by_camera_id.items()
+            },
+        }
+
+        # the checkpoint is replaced atomically, a crash while saving keeps the previous one
+        tmp_path = self._checkpoint_file() + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(checkpoint, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._checkpoint_file())
+
+        self._last_save = time.monotonic()
+        logging.debug("Saved a checkpoint to %s", self.checkpoint_path)
+        return True
+
+    def close(self, save: bool = True) -> None:
+        """The function saves a last checkpoint and closes the decision files.
+
+        Args:
+            save (bool, optional): Save a last checkpoint. A comparison that failed keeps the previous one, \
+                which is consistent with the decisions at that time. Defaults to True.
+        """
+        if save:
+            self.save(force=True)
+
+        for f in self._decision_files.values():
+            f.close()
+        self._decision_files.clear()
@@ -0,0 +1,307 @@
+import errno
+import fcntl
+import logging
+import os
+import queue
+import shutil
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Deque, Dict, Iterable, Optional, Tuple, Union
+
+from src.utils.archive import find_archive_member
+
+# ioctl request to share the data blocks of two files on copy-on-write filesystems (btrfs, xfs), see ioctl_ficlone(2)
+FICLONE: int = 0x40049409
+
+COPY_MODES: Tuple[str, ...] = ("copy", "hardlink", "reflink")
+
+# errors of link and clone calls that mean the mode is not supported for the two paths
+_UNSUPPORTED_ERRNOS = {
+    errno.EXDEV,
+    errno.EOPNOTSUPP,
+    errno.ENOTTY,
+    errno.EINVAL,
+    errno.EPERM,
+}
+
+
+def default_io_workers() -> int:
+    """The function returns the default number of threads for file operations. The threads mostly wait for \
+    the disk, so there are more threads than CPU cores.
+
+    Returns:
+        int: The number of threads.
+    """
+    return min(32, (os.cpu_count() or 1) * 4)
+
+
+def _copy_file_data(src_path: Union[str, Path], dst_path: Union[str, Path]) -> None:
+    """The function copies the content of a file inside the kernel with copy_file_range or sendfile, \
+    without reading it into python.
+
+    Args:
+        src_path (Union[str, Path]): The path to the source file.
+        dst_path (Union[str, Path]): The path to the destination file.
+    """
+    with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+        size = os.fstat(src.fileno()).st_size
+        copied = 0
+
+        if hasattr(os, "copy_file_range"):
+            try:
+                while copied < size:
+                    n = os.copy_file_range(src.fileno(), dst.fileno(), size - copied)
+                    if n == 0:
+                        break
+                    copied += n
+                return
+            except OSError as e:
+                # i.e. not supported by the filesystem or between two filesystems
+                if e.errno not in (
+                    errno.EXDEV,
+                    errno.ENOSYS,
+                    errno.EINVAL,
+                    errno.EOPNOTSUPP,
+                ):
+                    raise
+
+        try:
+            while copied < size:
+                n = os.sendfile(dst.fileno(), src.fileno(), copied, size - copied)
+                if n == 0:
+                    break
+                copied += n
+        except OSError as e:
+            if e.errno not in (errno.ENOSYS, errno.EINVAL):
+                raise
+            src.seek(copied)
+            dst.seek(copied)
+            shutil.copyfileobj(src, dst)
+
+
+def _reflink_file(src_path: Union[str, Path], dst_path: Union[str, Path]) -> None:
+    """The function creates a copy-on-write clone of a file, which shares the data blocks with the source.
+
+    Args:
+        src_path (Union[str, Path]): The path to the source file.
+        dst_path (Union[str, Path]): The path to the destination file.
+    """
+    with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            # a failed clone leaves an empty file behind, which would look like a copied image
+            os.remove(dst_path)
+            raise
+
+
+def _link_file(src_path: Union[str, Path], dst_path: Union[str, Path]) -> None:
+    """The function creates a hardlink and replaces an existing destination like a copy would.
+
+    Args:
+        src_path (Union[str, Path]): The path to the source file.
+        dst_path (Union[str, Path]): The path to the destination file.
+    """
+    try:
+        os.link(src_path, dst_path)
+    except FileExistsError:
+        os.remove(dst_path)
+        os.link(src_path, dst_path)
+
+
+def copy_file(
+    src_path: Union[str, Path], dst_path: Union[str, Path], mode: str = "copy"
+) -> None:
+    """The function copies a single file. The modes hardlink and reflink do not copy any data, if they are not \
+    supported for the two paths (i.e. different filesystems), the data is copied instead. A member of an \
+    archive is always extracted.
+
+    Args:
+        src_path (Union[str, Path]): The path to the source file or to a member of an archive, see read_image.
+        dst_path (Union[str, Path]): The path to the destination file.
+        mode (str, optional): One of 'copy', 'hardlink' or 'reflink'. Defaults to "copy".
+
+    Raises:
+        ValueError: If the mode is unknown.
+        OSError: If the file could not be copied.
+    """
+    if mode not in COPY_MODES:
+        raise ValueError(f"The copy mode has to be one of {COPY_MODES}, got '{mode}'.")
+
+    member = find_archive_member(src_path)
+    if member is not None:
+        archive, filename = member
+        try:
+            archive.extract(filename, dst_path)
+        except KeyError as e:
+            raise FileNotFoundError(
+                errno.ENOENT, os.strerror(errno.ENOENT), src_path
+            ) from e
+        return
+
+    if mode != "copy":
+        try:
+            if mode == "hardlink":
+                _link_file(src_path, dst_path)
+            else:
+                _reflink_file(src_path, dst_path)
+            return
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED_ERRNOS:
+                raise
+            logging.debug("Cannot %s %s, copying it instead: %s", mode, src_path, e)
+
+    _copy_file_data(src_path, dst_path)
+
+
+def _run_file_operations(
+    operation: Callable[..., None],
+    arguments: Iterable[Tuple],
+    max_workers: int = None,
+) -> Dict[str, OSError]:
+    """The function runs a file operation for many files on a thread pool and collects the errors. At most a \
+    few operations per thread are submitted ahead, so the arguments can be a lazy iterator over millions of files.
+
+    Args:
+        operation (Callable[..., None]): The operation, its first argument is the path of the file.
+        arguments (Iterable[Tuple]): The arguments of the operation per file.
+        max_workers (int, optional): The number of threads. Defaults to default_io_workers().
+
+    Returns:
+        Dict[str, OSError]: The error per path of all files that failed.
+    """
+    if max_workers is None:
+        max_workers = default_io_workers()
+
+    errors: Dict[str, OSError] = dict()
+    pending: Deque[Tuple[Future, str]] = deque()
+
+    def wait_for_oldest() -> None:
+        future, path = pending.popleft()
+        try:
+            future.result()
+        except OSError as e:
+            logging.warning("File operation on %s failed: %s", path, e)
+            errors[path] = e
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for args in arguments:
+            pending.append((executor.submit(operation, *args), str(args[0])))
+
+            if len(pending) >= max_workers * 4:
+                wait_for_oldest()
+
+        while pending:
+            wait_for_oldest()
+
+    return errors
+
+
+def remove_files(
+    paths: Iterable[Union[str, Path]], max_workers: int = None
+) -> Dict[str, OSError]:
+    """The function removes files on a thread pool. A file that cannot be removed does not stop the others.
+
+    Args:
+        paths (Iterable[Union[str, Path]]): The paths of the files to remove.
+        max_workers (int, optional): The number of threads. Defaults to default_io_workers().
+
+    Returns:
+        Dict[str, OSError]: The error per path of all files that could not be removed.
+    """
+    return _run_file_operations(os.remove, ((path,) for path in paths), max_workers)
+
+
+def copy_files(
+    paths: Iterable[Tuple[Union[str, Path], Union[str, Path]]],
+    mode: str = "copy",
+    max_workers: int = None,
+) -> Dict[str, OSError]:
+    """The function copies files on a thread pool. A file that cannot be copied does not stop the others.
+
+    Args:
+        paths (Iterable[Tuple[Union[str, Path], Union[str, Path]]]): The (source, destination) paths.
+        mode (str, optional): One of 'copy', 'hardlink' or 'reflink', see copy_file. Defaults to "copy".
+        max_workers (int, optional): The number of threads. Defaults to default_io_workers().
+
+    Raises:
+        ValueError: If the mode is unknown.
+
+    Returns:
+        Dict[str, OSError]: The error per source path of all files that could not be copied.
+    """
+    if mode not in COPY_MODES:
+        raise ValueError(f"The copy mode has to be one of {COPY_MODES}, got '{mode}'.")
+
+    return _run_file_operations(
+        copy_file, ((src, dst, mode) for src, dst in paths), max_workers
+    )
+
+
+class FileOperationStage:
+    """Runs a file operation on a thread pool in the background while the producer is still adding files.
+
+    The files are passed through a queue to _run_file_operations, so copying or deleting overlaps with the \
+    work that decides which files to copy or delete. A file that fails does not stop the others, the errors \
+    are returned by close.
+    """
+
+    def __init__(self, operation: Callable[..., None], max_workers: int = None):
+        """
+        Args:
+            operation (Callable[..., None]): The operation, its first argument is the path of the file \
+                (i.e. os.remove or copy_file).
+            max_workers (int, optional): The number of threads. Defaults to default_io_workers().
+        """
+        self.operation = operation
+        self.max_workers = max_workers
+        self.errors: Dict[str, OSError] = dict()
+
+        self._queue: "queue.Queue[Optional[Tuple]]" = queue.Queue()
+        self._exception: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> "FileOperationStage":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        try:
+            # None marks the end of the files
+            self.errors = _run_file_operations(
+                self.operation, iter(self._queue.get, None), self.max_workers
+            )
+        except BaseException as e:
+            self._exception = e
+
+    def submit(self, *args) -> None:
+        """The function adds a file to the queue of the stage.
+
+        Args:
+            *args: The arguments of the operation, the first one is the path of the file.
+        """
+        self._queue.put(args)
+
+    def close(self) -> Dict[str, OSError]:
+        """The function waits until the operation ran for all submitted files.
+
+        Raises:
+            BaseException: The exception that stopped the stage, if an operation raised something else \
+                than an OSError.
+
+        Returns:
+            Dict[str, OSError]: The error per path of all files that failed.
+        """
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+        if self._exception is not None:
+            raise self._exception
+
+        return self.errors
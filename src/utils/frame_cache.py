@@ -0,0 +1,184 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+
+from src.utils.archive import source_path
+
+# bump the version if the preprocessing changes, so that old cache entries are not used anymore
+CACHE_VERSION: int = 1
+
+
+class FrameCache:
+    """A persistent on-disk cache of preprocessed frames.
+
+    Every frame is stored as a single .npy file that is loaded memory-mapped, so a cache hit skips the PNG \
+    decode and the preprocessing entirely. The key of an entry is built from the file path, size and mtime \
+    of the image as well as the blur radii and the mask, so changing the image or the preprocessing results \
+    in a cache miss. The size of the cache is bounded, the least recently used entries are evicted first.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path], max_bytes: int = 10 * 1024**3):
+        """
+        Args:
+            cache_dir (Union[str, Path]): The folder to store the cache entries in.
+            max_bytes (int, optional): The max size of the cache in bytes. Defaults to 10 GiB.
+        """
+        self.cache_dir = str(cache_dir)
+        self.max_bytes = max_bytes
+
+        # bytes written by this instance since the last eviction, the prefetch threads of a worker share it
+        self._written_bytes: int = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def __getstate__(self) -> dict:
+        # every worker process gets a lock of its own
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def key(
+        self,
+        frame_path: Union[str, Path],
+        gaussian_blur_radius_list: Union[List[int], Tuple[int]],
+        mask: Union[List[int], Tuple[int]],
+        reduction_factor: int = 1,
+        crop: bool = False,
+    ) -> str:
+        """The function builds the cache key of a frame.
+
+        Args:
+            frame_path (Union[str, Path]): The path to the image file.
+            gaussian_blur_radius_list (Union[List[int], Tuple[int]]): The radii for gaussian blur.
+            mask (Union[List[int], Tuple[int]]): The black mask that is drawn onto the image.
+            reduction_factor (int, optional): The factor the image was reduced by while decoding. Defaults to 1.
+            crop (bool, optional): If the masked rows and columns were cut off. Defaults to False.
+
+        Raises:
+            FileNotFoundError: If the image does not exist.
+
+        Returns:
+            str: The cache key.
+        """
+        # a member of an archive changes with the archive
+        stat = os.stat(source_path(frame_path))
+        blur = tuple(gaussian_blur_radius_list) if gaussian_blur_radius_list else ()
+
+        fields = (
+            CACHE_VERSION,
+            os.path.abspath(frame_path),
+            stat.st_size,
+            stat.st_mtime_ns,
+            blur,
+            tuple(mask),
+            reduction_factor,
+        )
+        # uncropped frames keep the keys they had before cropping existed
+        if crop:
+            fields += (crop,)
+
+        return hashlib.sha1(repr(fields).encode()).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.npy")
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """The function loads a preprocessed frame memory-mapped from the cache.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[np.ndarray]: The preprocessed frame or None if the frame is not in the cache.
+        """
+        entry_path = self._entry_path(key)
+
+        try:
+            frame = np.load(entry_path, mmap_mode="r")
+            # the mtime marks the last access for the LRU eviction
+            os.utime(entry_path)
+        except (OSError, ValueError):
+            return None
+
+        return frame
+
+    def put(self, key: str, frame: np.ndarray) -> None:
+        """The function stores a preprocessed frame in the cache.
+
+        Args:
+            key (str): The cache key.
+            frame (np.ndarray): The preprocessed frame.
+        """
+        entry_path = self._entry_path(key)
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+
+        # write to a temporary file first, so that other workers never read a partially written entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(entry_path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, np.ascontiguousarray(frame))
+            os.replace(tmp_path, entry_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        with self._lock:
+            self._written_bytes += frame.nbytes
+            evict = self._written_bytes > self.max_bytes // 10
+            if evict:
+                self._written_bytes = 0
+        if evict:
+            self.evict()
+
+    def evict(self) -> None:
+        """The function removes the least recently used entries until the cache fits into max_bytes."""
+        with self._lock:
+            self._written_bytes = 0
+
+        entries = []
+        total_bytes = 0
+        for root, _, filenames in os.walk(self.cache_dir):
+            for filename in filenames:
+                if not filename.endswith(".npy"):
+                    continue
+
+                entry_path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(entry_path)
+                except FileNotFoundError:
+                    # evicted by another worker
+                    continue
+
+                entries.append((stat.st_mtime_ns, stat.st_size, entry_path))
+                total_bytes += stat.st_size
+
+        if total_bytes <= self.max_bytes:
+            return
+
+        num_evicted = 0
+        for _, size, entry_path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+
+            try:
+                os.remove(entry_path)
+            except FileNotFoundError:
+                pass
+
+            total_bytes -= size
+            num_evicted += 1
+
+        logging.debug(
+            "Evicted %d frames from the cache at %s", num_evicted, self.cache_dir
+        )
@@ -0,0 +1,305 @@
+import logging
+import multiprocessing
+import os
+import queue
+from collections import deque
+from multiprocessing import resource_tracker, shared_memory
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# the status of a frame
+_FRAME: int = 1
+# the function returned None, i.e. an unreadable image that is quarantined
+_NONE: int = 2
+# the function raised an error or the frame does not fit into a slot, the consumer calls it again itself
+_FALLBACK: int = 3
+
+# the seconds a process waits for a slot or a frame before it checks if the ring was stopped
+_POLL_SECONDS: float = 0.1
+
+
+class SharedFrameRing:
+    """A ring buffer of grayscale uint8 frames in shared memory, written by decoder processes and read as numpy \
+    views by the consumer without copying or pickling the frames.
+
+    Every writer owns slots_per_writer slots and writes the frames index % num_writers == writer in order. The \
+    writer takes a free slot from its queue of free slots, which is the back-pressure when the consumer falls \
+    behind, and passes the slot with the index, status and shape of the frame through its queue of filled \
+    slots. The consumer gives a slot back when it does not use the view of the frame anymore, in any order. \
+    A frame without data takes no slot. The ring is created by the consumer, which also removes the shared \
+    memory, the writers attach to it by its name.
+    """
+
+    def __init__(self, num_writers: int, slots_per_writer: int, slot_bytes: int):
+        """
+        Args:
+            num_writers (int): The number of writer processes.
+            slots_per_writer (int): The number of frames a writer can write ahead of the consumer.
+            slot_bytes (int): The max bytes of a frame.
+        """
+        self.num_writers = num_writers
+        self.slot_bytes = slot_bytes
+
+        self.free = [multiprocessing.Queue() for _ in range(num_writers)]
+        self.filled = [multiprocessing.Queue() for _ in range(num_writers)]
+        self.stopped = multiprocessing.Event()
+        for writer, free in enumerate(self.free):
+            for slot in range(slots_per_writer):
+                free.put(writer * slots_per_writer + slot)
+
+        self._shm = shared_memory.SharedMemory(
+            create=True, size=num_writers * slots_per_writer * slot_bytes
+        )
+        # forked writers inherit the ring, only the process that created it removes the shared memory
+        self._owner_pid = os.getpid()
+        # the slot of every frame the consumer has not given back yet
+        self._slots: Dict[int, int] = dict()
+
+    def __getstate__(self) -> dict:
+        # the writers attach to the shared memory by its name
+        state = self.__dict__.copy()
+        state["_shm"] = self._shm.name
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._shm = shared_memory.SharedMemory(name=state["_shm"])
+        # only the owner removes the shared memory, the tracker of a writer would remove it when it exits
+        resource_tracker.unregister(self._shm._name, "shared_memory")
+
+    def _view(self, slot: int, height: int, width: int) -> np.ndarray:
+        return np.ndarray(
+            (height, width),
+            dtype=np.uint8,
+            buffer=self._shm.buf,
+            offset=slot * self.slot_bytes,
+        )
+
+    def put(
+        self, index: int, frame: Optional[np.ndarray], status: int = _FRAME
+    ) -> bool:
+        """The function waits for a free slot of the writer of the frame and writes the frame into it.
+
+        Args:
+            index (int): The index of the frame.
+            frame (Optional[np.ndarray]): The frame or None for a frame without data.
+            status (int, optional): The status of the frame. Defaults to a frame.
+
+        Returns:
+            bool: False if the ring was stopped while waiting.
+        """
+        writer = index % self.num_writers
+        if status == _FRAME and (
+            frame.dtype != np.uint8 or frame.ndim != 2 or frame.nbytes > self.slot_bytes
+        ):
+            status = _FALLBACK
+
+        if status != _FRAME:
+            self.filled[writer].put((index, status, -1, 0, 0))
+            return True
+
+        while True:
+            try:
+                slot = self.free[writer].get(timeout=_POLL_SECONDS)
+                break
+            except queue.Empty:
+                if self.stopped.is_set():
+                    return False
+
+        height, width = frame.shape
+        self._view(slot, height, width)[:] = frame
+        self.filled[writer].put((index, status, slot, height, width))
+        return True
+
+    def get(
+        self, index: int, timeout: float = None
+    ) -> Tuple[int, Optional[np.ndarray]]:
+        """The function waits until the frame is written and returns a view of it. The view is valid until \
+        the frame is released. The frames of a writer have to be read in order.
+
+        Args:
+            index (int): The index of the frame.
+            timeout (float, optional): The max seconds to wait. Defaults to None, which waits until the \
+                frame is written.
+
+        Raises:
+            queue.Empty: If the frame was not written within the timeout.
+            RuntimeError: If the next frame of the writer is another frame, i.e. the frames were not read in order.
+
+        Returns:
+            Tuple[int, Optional[np.ndarray]]: The status and the view of the frame, None without data.
+        """
+        frame_index, status, slot, height, width = self.filled[
+            index % self.num_writers
+        ].get(timeout=timeout)
+        if frame_index != index:
+            raise RuntimeError(f"expected frame {index}, got {frame_index}")
+
+        if status != _FRAME:
+            return status, None
+
+        self._slots[index] = slot
+        return status, self._view(slot, height, width)
+
+    def release(self, index: int) -> None:
+        """The function gives the slot of a frame back to its writer, the view must not be used anymore. \
+        Frames without data have no slot.
+
+        Args:
+            index (int): The index of the frame.
+        """
+        slot = self._slots.pop(index, None)
+        if slot is not None:
+            self.free[index % self.num_writers].put(slot)
+
+    def close(self) -> None:
+        """The function detaches from the shared memory. The owner also stops the writers and removes it."""
+        if os.getpid() == self._owner_pid:
+            self.stopped.set()
+        if self.stopped.is_set():
+            for slots in self.free + self.filled:
+                # a process does not wait at its exit until the slots nobody reads anymore are passed on
+                slots.cancel_join_thread()
+
+        try:
+            self._shm.close()
+        except BufferError:
+            # a view of the consumer is still alive, the memory is freed with it
+            logging.debug("A frame view of %s is still in use.", self._shm.name)
+
+        if os.getpid() == self._owner_pid:
+            self._shm.unlink()
+
+
+def _decode_into_ring(
+    ring: SharedFrameRing,
+    function: Callable[..., Optional[np.ndarray]],
+    arguments: Sequence[Tuple],
+    writer: int,
+) -> None:
+    """The function is run by every decoder process and writes the frames writer, writer + num_writers, ... \
+    into the ring."""
+    try:
+        for index in range(writer, len(arguments), ring.num_writers):
+            try:
+                frame = function(*arguments[index])
+                status = _FRAME if frame is not None else _NONE
+            except Exception:
+                # the consumer calls the function again and gets the error like a sequential loop would
+                frame, status = None, _FALLBACK
+
+            if not ring.put(index, frame, status):
+                return
+    finally:
+        ring.close()
+
+
+def shared_memory_prefetch(
+    function: Callable[..., Optional[np.ndarray]],
+    arguments: Sequence[Tuple],
+    num_workers: int,
+    slot_bytes: int,
+    depth: int = 8,
+    hold: int = 1,
+) -> Iterator[Optional[np.ndarray]]:
+    """The function calls a function that returns grayscale uint8 frames for all arguments on decoder processes \
+    and yields the frames in the order of the arguments, as views into a SharedFrameRing.
+
+    Unlike prefetch, the decoding runs in other processes, so it scales with the number of processes also for \
+    codecs that hold the GIL, and the frames are not pickled. At most depth frames are decoded ahead of the \
+    consumer. A yielded frame stays valid while the next hold frames with data are yielded, i.e. as the previous \
+    frame of a sliding window that skips the frames without data. A frame that does not fit into a slot or \
+    whose call raised an error is computed again by the consumer, which gets the error like a sequential loop \
+    would. The decoders are stopped and the shared memory is removed when the iterator is closed.
+
+    Args:
+        function (Callable[..., Optional[np.ndarray]]): The function to call, i.e. load_preprocessed_frame. \
+            It has to be picklable, like a function of a module.
+        arguments (Sequence[Tuple]): The arguments of the calls in the order the results are yielded.
+        num_workers (int): The number of decoder processes.
+        slot_bytes (int): The max bytes of a frame in the ring. If it is 0, i.e. no header of the images could \
+            be read, the consumer decodes the frames itself up to the first frame with data, which sizes the slots.
+        depth (int, optional): The number of slots of the ring, rounded up to a multiple of num_workers. \
+            Every decoder gets at least hold + 1 slots. Defaults to 8.
+        hold (int, optional): The number of later frames with data a yielded frame stays valid for. \
+            Defaults to 1.
+
+    Raises:
+        ValueError: If num_workers is smaller than 1.
+        RuntimeError: If a decoder exited without writing its frames.
+
+    Returns:
+        Iterator[Optional[np.ndarray]]: The results of the calls.
+    """
+    if num_workers < 1:
+        raise ValueError(
+            f"The number of workers has to be at least 1, got {num_workers}."
+        )
+
+    if slot_bytes < 1:
+        for num_decoded, call_arguments in enumerate(arguments, start=1):
+            frame = function(*call_arguments)
+            yield frame
+
+            if frame is not None:
+                slot_bytes = max(frame.nbytes, 1)
+                arguments = arguments[num_decoded:]
+                break
+        else:
+            return
+
+    # the consumer holds at most hold views of a decoder, which still has a free slot for its next frame
+    slots_per_worker = max(-(-depth // num_workers), hold + 1)
+
+    ring = SharedFrameRing(num_workers, slots_per_worker, slot_bytes)
+    decoders: List[multiprocessing.Process] = [
+        multiprocessing.Process(
+            target=_decode_into_ring, args=(ring, function, arguments, writer)
+        )
+        for writer in range(num_workers)
+    ]
+
+    try:
+        for decoder in decoders:
+            decoder.start()
+
+        # the indices of the yielded frames that are views into the ring
+        held: Deque[int] = deque()
+        for index in range(len(arguments)):
+            decoder = decoders[index % num_workers]
+            while True:
+                try:
+                    status, frame = ring.get(index, timeout=_POLL_SECONDS)
+                    break
+                except queue.Empty:
+                    # a decoder that was killed, i.e. by the oom killer, never writes its frames, one that
+                    # exited normally has passed them on before
+                    if (
+                        not decoder.is_alive()
+                        and ring.filled[index % num_workers].empty()
+                    ):
+                        raise RuntimeError(
+                            f"The decoder of frame {index} exited with code {decoder.exitcode}."
+                        )
+
+            if status == _FALLBACK:
+                frame = function(*arguments[index])
+
+            yield frame
+
+            # a view hold frames with data before is not used by the consumer anymore
+            if status == _FRAME:
+                held.append(index)
+                if len(held) > hold:
+                    ring.release(held.popleft())
+    finally:
+        ring.stopped.set()
+        for decoder in decoders:
+            if decoder.pid is None:
+                continue
+            decoder.join(timeout=10 * _POLL_SECONDS)
+            if decoder.is_alive():
+                decoder.terminate()
+                decoder.join()
+        ring.close()
@@ -1,96 +1,1182 @@
 import errno
 import logging
 import os
-import subprocess
-from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from contextlib import closing
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Tuple, Union
+from typing import (
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import cv2
 import numpy as np
 
+from src.utils.archive import image_size, read_image
+from src.utils.checkpoint import ComparisonCheckpoint
+from src.utils.file_ops import (
+    COPY_MODES,
+    FileOperationStage,
+    copy_file,
+    copy_files,
+    remove_files,
+)
+from src.utils.frame_cache import FrameCache
+from src.utils.frame_ring import shared_memory_prefetch
+from src.utils.image_index import max_frame_bytes
 from src.utils.kopernikus_func import (
-    compare_frames_change_detection,
-    preprocess_image_change_detection,
+    compare_frame_stack_change_detection,
+    score_frames_change_detection,
+)
+from src.utils.manifest import (
+    DELETE_SUFFIX,
+    KEEP_SUFFIX,
+    QUARANTINE_SUFFIX,
+    IndexManifestWriter,
+    count_manifest,
+    iter_manifest_listing,
+    listed_camera_ids,
+    read_listing,
+)
+from src.utils.prefetch import prefetch
+from src.utils.prefilter import PrefilterCascade
+from src.utils.preprocessing import (
+    CameraConfig,
+    get_camera_settings,
+    get_preprocessing_plan,
 )
+from src.utils.profiling import ProfileStats, StageProfiler, profile_stage
+from src.utils.score_store import load_scores, save_scores
+
+# called with the camera id, the filename and if the image is kept as soon as the decision of an image is final
+DecisionCallback = Callable[[str, str, bool], None]
+
+# cv2.imread flags by the factor the image resolution is reduced by while decoding
+IMREAD_FLAGS_BY_REDUCTION_FACTOR: Dict[int, int] = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
 
 
 def remove_images(
-    delete_images: Dict[str, List[str]], data_path: Union[str, Path]
-) -> None:
+    delete_images: Dict[str, Iterable[str]],
+    data_path: Union[str, Path],
+    max_workers: int = None,
+) -> Dict[str, OSError]:
     """The function removes images from the data_path that are provided by the dictionary.
 
     Args:
-        delete_images (Dict[str, List[str]]): A dictionary with the camera_id as key and a list of filenames from \
-            that camera as value.
+        delete_images (Dict[str, Iterable[str]]): A dictionary with the camera_id as key and a list of filenames \
+            from that camera as value, which may be a lazy iterator like iter_manifest.
         data_path (str | Path): The data path to the folder to search for the camera images.
+        max_workers (int, optional): The number of threads removing files. Defaults to default_io_workers().
+
+    Returns:
+        Dict[str, OSError]: The error per path of all images that could not be removed.
     """
     # remove images from data_path
-    for _, filenames in delete_images.items():
-        for filename in filenames:
-            img_path: Path = os.path.join(data_path, filename)
-
-            # remove img_path
-            cmd = ["rm", str(img_path)]
-            subprocess.run(cmd, check=True)
+    return remove_files(
+        (
+            os.path.join(data_path, filename)
+            for filenames in delete_images.values()
+            for filename in filenames
+        ),
+        max_workers=max_workers,
+    )
 
 
 def copy_images(
-    filenames: List[str],
+    filenames: Iterable[str],
     data_path: Union[str, Path],
     unique_images_path: str,
-) -> None:
+    copy_mode: str = "copy",
+    max_workers: int = None,
+) -> Dict[str, OSError]:
     """The function copies images provided with filenames from the data_path to the unique_images_path.
 
     Args:
-        filenames (List[str]): A list of filenames of unique images.
+        filenames (Iterable[str]): The filenames of unique images, which may be a lazy iterator.
         data_path (Union[str, Path]): The data path to the folder for the camera images.
         unique_images_path (str): The path to the folder to copy the unique images to.
-    """
+        copy_mode (str, optional): One of 'copy', 'hardlink' or 'reflink'. Hardlinks and reflinks do not copy \
+            any data on the same filesystem. Defaults to "copy".
+        max_workers (int, optional): The number of threads copying files. Defaults to default_io_workers().
 
-    # copy images to keep into data/unique_images/
-    for filename in filenames:
-        img_path_src: Path = os.path.join(data_path, filename)
-        new_filepath = os.path.join(unique_images_path, filename)
+    Returns:
+        Dict[str, OSError]: The error per path of all images that could not be copied.
+    """
 
-        # make sure path exists, there may be multiple folders in the future
-        os.makedirs(unique_images_path, exist_ok=True)
+    # make sure path exists, there may be multiple folders in the future
+    os.makedirs(unique_images_path, exist_ok=True)
 
-        # copy img_path to new filepath
-        cmd = ["cp", str(img_path_src), str(new_filepath)]
-        # subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        subprocess.run(cmd, check=True)
+    # copy images to keep into data/unique_images/
+    return copy_files(
+        (
+            (
+                os.path.join(data_path, filename),
+                os.path.join(unique_images_path, filename),
+            )
+            for filename in filenames
+        ),
+        mode=copy_mode,
+        max_workers=max_workers,
+    )
 
 
 def copy_images_parallel(
-    keep_frames: Dict[str, List[str]],
+    keep_frames: Dict[str, Iterable[str]],
     data_path: Union[str, Path],
     unique_images_path: str = "./data/unique_images",
-) -> None:
+    copy_mode: str = "copy",
+    max_workers: int = None,
+) -> Dict[str, OSError]:
     """The function is a wrapper to copy images provided with filenames from the data_path \
-        to the unique_images_path in parallel.
+        to the unique_images_path in parallel. The images of all cameras share one thread pool.
 
     Args:
-        keep_frames (Dict[str, List[str]]): A dictionary with the camera_id as key and a list of filenames \
-            from the images
+        keep_frames (Dict[str, Iterable[str]]): A dictionary with the camera_id as key and a list of filenames \
+            from the images, which may be a lazy iterator like iter_manifest.
         data_path (Union[str, Path]): The data path to the folder for the camera images.
         unique_images_path (str, optional): The path to the output folder of the unique images.  \
             Defaults to "./data/unique_images".
+        copy_mode (str, optional): One of 'copy', 'hardlink' or 'reflink'. Defaults to "copy".
+        max_workers (int, optional): The number of threads copying files. Defaults to default_io_workers().
+
+    Returns:
+        Dict[str, OSError]: The error per path of all images that could not be copied.
     """
+    return copy_images(
+        (filename for filenames in keep_frames.values() for filename in filenames),
+        data_path,
+        unique_images_path,
+        copy_mode=copy_mode,
+        max_workers=max_workers,
+    )
 
-    # create folder if not exists
-    os.makedirs(unique_images_path, exist_ok=True)
 
-    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
-        # submit a job for each camera ID from the dict to the executor
-        futures = [
-            executor.submit(copy_images, filenames, data_path, unique_images_path)
-            for _, filenames in keep_frames.items()
-        ]
+def _is_copied(src: str, dst: str) -> bool:
+    """The function checks if dst exists with the same size as src."""
+    try:
+        return os.path.getsize(dst) == image_size(src)
+    except OSError:
+        return False
+
+
+class ImageFileOperations:
+    """Deletes the images decided to be deleted or copies the images decided to be kept, while the comparison \
+    still decides the later images.
+
+    An instance is a DecisionCallback for compare_images_parallel and compare_images_streaming. The files are \
+    handed to a FileOperationStage, which copies or deletes them on a thread pool in the background, so the \
+    total runtime approaches the max of the comparison and the file operations instead of their sum. A decided \
+    image is not read by the comparison anymore, so it is safe to delete it right away.
+    """
+
+    def __init__(
+        self,
+        data_path: Union[str, Path],
+        delete: bool = False,
+        unique_images_path: Union[str, Path] = "./data/unique_images",
+        copy_mode: str = "copy",
+        max_workers: int = None,
+        skip_done: bool = False,
+    ):
+        """
+        Args:
+            data_path (Union[str, Path]): The data path to the folder for the camera images.
+            delete (bool, optional): Delete the images that are not unique instead of copying the unique ones. \
+                Defaults to False.
+            unique_images_path (Union[str, Path], optional): The path to the output folder of the unique images, \
+                if delete is not set. Defaults to "./data/unique_images".
+            copy_mode (str, optional): One of 'copy', 'hardlink' or 'reflink'. Defaults to "copy".
+            max_workers (int, optional): The number of threads. Defaults to default_io_workers().
+            skip_done (bool, optional): Skip images that are already deleted or copied with the same size, i.e. \
+                by a run that is resumed from a checkpoint. Defaults to False.
+
+        Raises:
+            ValueError: If the copy mode is unknown.
+        """
+        if copy_mode not in COPY_MODES:
+            raise ValueError(
+                f"The copy mode has to be one of {COPY_MODES}, got '{copy_mode}'."
+            )
+
+        self.data_path = data_path
+        self.delete = delete
+        self.unique_images_path = unique_images_path
+        self.copy_mode = copy_mode
+        self.skip_done = skip_done
+        # the number of images handed to the stage
+        self.num_files = 0
+
+        if not delete:
+            # make sure path exists, there may be multiple folders in the future
+            os.makedirs(unique_images_path, exist_ok=True)
+
+        self._stage = FileOperationStage(
+            os.remove if delete else copy_file, max_workers=max_workers
+        )
+
+    def __call__(self, camera_id: str, filename: str, keep: bool) -> None:
+        """The function deletes or copies an image in the background, if its decision asks for it.
+
+        Args:
+            camera_id (str): The camera id string (i.e. 'c21')
+            filename (str): The filename of the decided image.
+            keep (bool): If the image is kept.
+        """
+        src = os.path.join(self.data_path, filename)
+        if self.delete and not keep:
+            if self.skip_done and not os.path.exists(src):
+                return
+            self._stage.submit(src)
+        elif not self.delete and keep:
+            dst = os.path.join(self.unique_images_path, filename)
+            if self.skip_done and _is_copied(src, dst):
+                return
+            self._stage.submit(src, dst, self.copy_mode)
+        else:
+            return
+
+        self.num_files += 1
+
+    def close(self) -> Dict[str, OSError]:
+        """The function waits until all images are deleted or copied.
+
+        Returns:
+            Dict[str, OSError]: The error per path of all images that could not be deleted or copied.
+        """
+        return self._stage.close()
+
+
+def get_camera_mask(
+    camera_id: str, camera_config: CameraConfig = None
+) -> Union[List[int], Tuple[int]]:
+    """The function returns the black mask that is drawn onto the frames of a camera.
+
+    Args:
+        camera_id (str): The camera id string (i.e. 'c21')
+        camera_config (CameraConfig, optional): The settings of the cameras. Defaults to None, which loads \
+            src/config/cameras.json.
+
+    Returns:
+        List[int] | Tuple[int]: The black mask in percent of the image [x_min, y_min, x_max, y_max].
+    """
+    return get_camera_settings(camera_id, camera_config).mask
+
+
+def scale_parameters_to_reduction(
+    gaussian_blur_radius_list: Tuple[int],
+    min_contour_area: Union[int, float],
+    score_threshold: Union[int, float],
+    reduction_factor: int,
+) -> Tuple[Tuple[int], Union[int, float], Union[int, float]]:
+    """The function scales the blur radii, the min contour area and the score threshold from the full \
+        resolution to an image that is reduced by reduction_factor in width and height.
+
+    Args:
+        gaussian_blur_radius_list (Tuple[int]): A list with radii for gaussian blur for the full resolution.
+        min_contour_area (Union[int, float]): The min area for contours for the full resolution.
+        score_threshold (Union[int, float]): The threshold of the summed contour areas for the full resolution.
+        reduction_factor (int): The factor the width and height of the image are reduced by.
+
+    Returns:
+        Tuple[Tuple[int], Union[int, float], Union[int, float]]: The scaled radii (odd and at least 1), the \
+            scaled min area and the scaled score threshold.
+    """
+    if reduction_factor == 1:
+        return gaussian_blur_radius_list, min_contour_area, score_threshold
+
+    scaled_radius_list = None
+    if gaussian_blur_radius_list is not None:
+        # the kernel size of cv2.GaussianBlur has to be odd
+        scaled_radius_list = tuple(
+            max(radius // reduction_factor, 1) | 1
+            for radius in gaussian_blur_radius_list
+        )
+
+    # areas shrink with the square of the reduction factor, the score is a sum of areas
+    scaled_min_contour_area = min_contour_area
+    if min_contour_area is not None:
+        scaled_min_contour_area = min_contour_area / reduction_factor**2
+
+    scaled_score_threshold = score_threshold
+    if score_threshold is not None:
+        scaled_score_threshold = score_threshold / reduction_factor**2
+
+    return scaled_radius_list, scaled_min_contour_area, scaled_score_threshold
+
+
+def load_preprocessed_frame(
+    frame_path: Union[str, Path],
+    gaussian_blur_radius_list: Tuple[int],
+    mask: Union[List[int], Tuple[int]],
+    cache: FrameCache = None,
+    reduction_factor: int = 1,
+    profiler: StageProfiler = None,
+    crop: bool = False,
+) -> np.ndarray:
+    """The function reads a single frame from disk and preprocesses it for the change detection.
+
+    Args:
+        frame_path (Union[str, Path]): The path to the image file or to a member of an archive, see read_image.
+        gaussian_blur_radius_list (Tuple[int]): A list with radii for gaussian blur to be applied onto the image.
+        mask (Union[List[int], Tuple[int]]): The black mask that is drawn onto the image.
+        cache (FrameCache, optional): A cache of preprocessed frames, a hit skips the decode. Defaults to None.
+        reduction_factor (int, optional): Decode the image directly into a grayscale image reduced by 2, 4 or 8 \
+            in width and height. Defaults to 1, the full resolution.
+        profiler (StageProfiler, optional): A profiler that records the cache, imread and preprocess stages. \
+            Defaults to None.
+        crop (bool, optional): Cut the masked rows and columns off before the blur instead of drawing the \
+            mask, see PreprocessingPlan. Defaults to False.
+
+    Raises:
+        FileNotFoundError: If the image is not able to be read by cv2.imread() and returns None.
+
+    Returns:
+        np.ndarray: The preprocessed frame in GRAY format.
+    """
+    camera_id = os.path.basename(frame_path)[:3]
+
+    if cache is not None:
+        key = cache.key(
+            frame_path, gaussian_blur_radius_list, mask, reduction_factor, crop
+        )
+        with profile_stage(profiler, "cache_read", camera_id):
+            frame = cache.get(key)
+        if frame is not None:
+            return frame
+
+    # the size is only needed for the bytes read by the profiler
+    num_bytes = image_size(frame_path) if profiler is not None else 0
+    with profile_stage(profiler, "imread", camera_id, num_bytes=num_bytes):
+        frame: np.ndarray = read_image(
+            frame_path, IMREAD_FLAGS_BY_REDUCTION_FACTOR[reduction_factor]
+        )
+
+    if frame is None:
+        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), frame_path)
+
+    with profile_stage(profiler, "preprocess", camera_id):
+        plan = get_preprocessing_plan(
+            frame.shape, gaussian_blur_radius_list, mask, crop
+        )
+        frame = plan.apply(frame)
+
+    if cache is not None:
+        with profile_stage(profiler, "cache_write", camera_id):
+            cache.put(key, frame)
+
+    return frame
+
+
+def resize_frame_cached(
+    frame: np.ndarray,
+    target_shape: Tuple[int, int],
+    resized: Dict[Tuple[int, int], np.ndarray],
+) -> np.ndarray:
+    """The function resizes a frame to the target shape and caches the result, so that a frame which is compared \
+        to two neighbours of the same (smaller) size is only resized once.
+
+    Args:
+        frame (np.ndarray): The preprocessed frame.
+        target_shape (Tuple[int, int]): The (height, width) the frame should be resized to.
+        resized (Dict[Tuple[int, int], np.ndarray]): The cache of already resized versions of the frame.
+
+    Returns:
+        np.ndarray: The resized frame.
+    """
+    if target_shape not in resized:
+        resized[target_shape] = cv2.resize(frame, (target_shape[1], target_shape[0]))
+
+    return resized[target_shape]
+
+
+def score_frame_pair(
+    prev_frame: np.ndarray,
+    next_frame: np.ndarray,
+    min_contour_area: Union[int, float],
+    prev_resized: Dict[Tuple[int, int], np.ndarray] = None,
+    next_resized: Dict[Tuple[int, int], np.ndarray] = None,
+    scorer: str = "contours",
+    early_exit_score: float = None,
+) -> float:
+    """The function compares two preprocessed frames, the larger frame is resized to the smaller one first.
+
+    Args:
+        prev_frame (np.ndarray): The preprocessed previous frame.
+        next_frame (np.ndarray): The preprocessed next frame.
+        min_contour_area (Union[int, float]): The min area for contours to be considered.
+        prev_resized (Dict[Tuple[int, int], np.ndarray], optional): The cache of resized versions of the \
+            previous frame. Defaults to None.
+        next_resized (Dict[Tuple[int, int], np.ndarray], optional): The cache of resized versions of the \
+            next frame. Defaults to None.
+        scorer (str, optional): The name of the scorer, "contours" or "connected_components". \
+            Defaults to "contours".
+        early_exit_score (float, optional): Stop summing the areas once the score reaches this value, the \
+            score is a lower bound then. Defaults to None, which computes the full score.
+
+    Returns:
+        float: The score of the pair.
+    """
+    # resize frames if shape is not the same (larger to smaller)
+    if prev_frame.shape != next_frame.shape:
+        # reshape to smaller image
+        if prev_frame.shape[0] > next_frame.shape[0]:
+            prev_frame = resize_frame_cached(
+                prev_frame,
+                next_frame.shape[:2],
+                prev_resized if prev_resized is not None else dict(),
+            )
+        else:
+            next_frame = resize_frame_cached(
+                next_frame,
+                prev_frame.shape[:2],
+                next_resized if next_resized is not None else dict(),
+            )
+
+    # compare images
+    return score_frames_change_detection(
+        prev_frame, next_frame, min_contour_area, scorer, early_exit_score
+    )
+
+
+def compute_pair_scores(
+    camera_id: str,
+    files: List[str],
+    data_path: Union[str, Path],
+    gaussian_blur_radius_list: Tuple[int],
+    min_contour_area: Union[int, float],
+    cache: FrameCache = None,
+    reduction_factor: int = 1,
+    prefilter: PrefilterCascade = None,
+    profiler: StageProfiler = None,
+    read_ahead: int = 0,
+    batch_size: int = 0,
+    camera_config: CameraConfig = None,
+    scorer: str = "contours",
+    early_exit_score: float = None,
+    quarantined: List[int] = None,
+    stride: int = 1,
+    score_threshold: float = None,
+    decode_workers: int = 0,
+) -> List[float]:
+    """The function computes the change detection score for every pair of adjacent images of a camera.
+
+    Args:
+        camera_id (str): The camera id string (i.e. 'c21')
+        files (List[str]): A list of image filenames from the camera sorted by timestamp.
+        data_path (Union[str, Path]): The data path to the folder for the camera images.
+        gaussian_blur_radius_list (Tuple[int]): A list with radii for gaussian blur to be applied onto the image.
+        min_contour_area (Union[int, float]): The min area for contours to be considered.
+        cache (FrameCache, optional): A cache of preprocessed frames. Defaults to None.
+        reduction_factor (int, optional): The factor the images are reduced by while decoding. The blur radii \
+            and the min contour area have to be scaled already. Defaults to 1.
+        prefilter (PrefilterCascade, optional): A cascade of cheap checks that settles obvious pairs before \
+            the contour comparison, the settled pairs get the score 0 or inf. Defaults to None.
+        profiler (StageProfiler, optional): A profiler that records the stages of the comparison. \
+            Defaults to None.
+        read_ahead (int, optional): The number of frames read and preprocessed ahead of the comparison on \
+            as many threads. Defaults to 0, which reads every frame when it is compared.
+        batch_size (int, optional): The number of consecutive frames of the same shape that are compared as \
+            one stack with compare_frame_stack_change_detection. Not used together with a prefilter. \
+            Defaults to 0, which compares every pair on its own.
+        camera_config (CameraConfig, optional): The mask and crop settings of the cameras. Defaults to None, \
+            which loads src/config/cameras.json.
+        scorer (str, optional): The name of the scorer, "contours" or "connected_components". \
+            Defaults to "contours".
+        early_exit_score (float, optional): Stop summing the areas of a pair once its score reaches this \
+            value. The keep/delete decisions for this score threshold stay the same, but the scores of the \
+            changed pairs are only lower bounds. Defaults to None, which computes the full scores.
+        quarantined (List[int], optional): If given, images that cannot be read are skipped instead of \
+            raising an error and their indices are appended to it. The scores are then computed for the pairs \
+            of adjacent readable images. Defaults to None.
+        stride (int, optional): Compare every frame with the frame stride frames later first and only bisect \
+            the intervals that reach the score_threshold, see _score_frame_strides. Not used together with \
+            read_ahead, batch_size and a prefilter. Defaults to 1, which compares every pair.
+        score_threshold (float, optional): The score threshold that decides which intervals are bisected, \
+            required for a stride above 1. Defaults to None.
+        decode_workers (int, optional): The number of processes that read and preprocess the frames ahead of \
+            the comparison. The frames are passed through a SharedFrameRing in shared memory instead of being \
+            pickled, read_ahead sets the number of slots. The profiler does not record the stages of these \
+            processes. Defaults to 0, which reads the frames in this process.
+
+    Raises:
+        FileNotFoundError: If an image is not able to be read by cv2.imread() and returns None, unless \
+            quarantined is given.
+        ValueError: If a stride above 1 is used without a score_threshold.
+
+    Returns:
+        List[float]: The score of the pair (files[i], files[i + 1]) at index i.
+    """
+    scores: List[float] = []
+
+    if len(files) < 2:
+        return scores
+
+    settings = get_camera_settings(camera_id, camera_config)
+
+    load_arguments = (
+        (
+            os.path.join(data_path, filename),
+            gaussian_blur_radius_list,
+            settings.mask,
+            cache,
+            reduction_factor,
+            profiler,
+            settings.crop,
+        )
+        for filename in files
+    )
+    load = load_preprocessed_frame if quarantined is None else _load_readable_frame
+
+    if stride > 1:
+        if score_threshold is None:
+            raise ValueError("A stride above 1 needs a score threshold.")
+
+        # the frames are read in the order of the bisection, not in sequence
+        load_arguments = list(load_arguments)
+        return _score_frame_strides(
+            camera_id,
+            lambda index: load(*load_arguments[index]),
+            len(files),
+            min_contour_area,
+            stride,
+            score_threshold,
+            profiler,
+            scorer,
+            quarantined,
+        )
+
+    if decode_workers > 0:
+        load_arguments = list(load_arguments)
+        frames = shared_memory_prefetch(
+            load,
+            load_arguments,
+            decode_workers,
+            max_frame_bytes(
+                [arguments[0] for arguments in load_arguments], reduction_factor
+            ),
+            depth=max(read_ahead, 2 * decode_workers),
+        )
+    elif read_ahead > 0:
+        frames = prefetch(load, load_arguments, depth=read_ahead)
+    else:
+        frames = (load(*arguments) for arguments in load_arguments)
+
+    if quarantined is not None:
+        frames = _skip_unreadable_frames(frames, quarantined)
+
+    # the read-ahead threads are stopped if the comparison fails
+    with closing(frames):
+        if batch_size > 1 and prefilter is None:
+            scores = _score_frame_batches(
+                camera_id,
+                frames,
+                min_contour_area,
+                batch_size,
+                profiler,
+                scorer,
+                early_exit_score,
+            )
+        else:
+            scores = _score_frame_sequence(
+                camera_id,
+                frames,
+                min_contour_area,
+                prefilter,
+                profiler,
+                scorer,
+                early_exit_score,
+            )
+
+    return scores
+
+
+def _load_readable_frame(frame_path: str, *args) -> Optional[np.ndarray]:
+    """The function loads a frame like load_preprocessed_frame, but returns None if it cannot be read."""
+    try:
+        return load_preprocessed_frame(frame_path, *args)
+    except (FileNotFoundError, cv2.error) as e:
+        logging.warning("Quarantined %s, the image cannot be read: %s", frame_path, e)
+        return None
+
+
+def _skip_unreadable_frames(
+    frames: Iterator[Optional[np.ndarray]], quarantined: List[int]
+) -> Iterator[np.ndarray]:
+    """The function yields the readable frames and appends the indices of the others to quarantined."""
+    with closing(frames):
+        for i, frame in enumerate(frames):
+            if frame is None:
+                quarantined.append(i)
+                continue
+
+            yield frame
+
+
+def _score_frame_batches(
+    camera_id: str,
+    frames: Iterator[np.ndarray],
+    min_contour_area: Union[int, float],
+    batch_size: int,
+    profiler: StageProfiler,
+    scorer: str,
+    early_exit_score: float,
+) -> List[float]:
+    """The function scores the adjacent pairs of preprocessed frames in stacks of up to batch_size frames, \
+    see compute_pair_scores. Consecutive stacks share one frame and a pair of frames with different shapes \
+    is compared on its own with score_frame_pair.
+
+    Args:
+        camera_id (str): The camera id string (i.e. 'c21')
+        frames (Iterator[np.ndarray]): The preprocessed frames sorted by timestamp.
+        min_contour_area (Union[int, float]): The min area for contours to be considered.
+        batch_size (int): The max number of frames per stack, at least 2.
+        profiler (StageProfiler): A profiler or None.
+        scorer (str): The name of the scorer.
+        early_exit_score (float): The score to stop summing the areas of a pair at or None.
+
+    Returns:
+        List[float]: The score of the pair (frames[i], frames[i + 1]) at index i.
+    """
+    scores: List[float] = []
+
+    frame: Optional[np.ndarray] = next(frames, None)
+    if frame is None:
+        return scores
+    frame_resized: Dict[Tuple[int, int], np.ndarray] = dict()
+
+    # the stack is reused for all frames of the same shape, the first num_stacked frames are valid
+    stack = np.empty((batch_size,) + frame.shape, dtype=frame.dtype)
+    stack[0] = frame
+    num_stacked = 1
+
+    def compare_stack() -> None:
+        if num_stacked > 1:
+            with profile_stage(profiler, "compare", camera_id, calls=num_stacked - 1):
+                scores.extend(
+                    compare_frame_stack_change_detection(
+                        stack[:num_stacked], min_contour_area, scorer, early_exit_score
+                    ).tolist()
+                )
+
+    for next_frame in frames:
+        prev_frame = frame
+        prev_resized = frame_resized
+
+        frame = next_frame
+        frame_resized = dict()
+
+        if frame.shape != prev_frame.shape:
+            compare_stack()
+            with profile_stage(profiler, "compare", camera_id):
+                scores.append(
+                    score_frame_pair(
+                        prev_frame,
+                        frame,
+                        min_contour_area,
+                        prev_resized,
+                        frame_resized,
+                        scorer,
+                        early_exit_score,
+                    )
+                )
+
+            stack = np.empty((batch_size,) + frame.shape, dtype=frame.dtype)
+            stack[0] = frame
+            num_stacked = 1
+            continue
+
+        stack[num_stacked] = frame
+        num_stacked += 1
+
+        if num_stacked == batch_size:
+            compare_stack()
+
+            # the last frame is the first frame of the next stack
+            stack[0] = stack[num_stacked - 1]
+            num_stacked = 1
+
+    compare_stack()
+
+    return scores
+
+
+def _score_frame_sequence(
+    camera_id: str,
+    frames: Iterator[np.ndarray],
+    min_contour_area: Union[int, float],
+    prefilter: PrefilterCascade,
+    profiler: StageProfiler,
+    scorer: str,
+    early_exit_score: float,
+) -> List[float]:
+    """The function scores the adjacent pairs of preprocessed frames, see compute_pair_scores.
+
+    Args:
+        camera_id (str): The camera id string (i.e. 'c21')
+        frames (Iterator[np.ndarray]): The preprocessed frames sorted by timestamp.
+        min_contour_area (Union[int, float]): The min area for contours to be considered.
+        prefilter (PrefilterCascade): A cascade of cheap checks or None.
+        profiler (StageProfiler): A profiler or None.
+        scorer (str): The name of the scorer.
+        early_exit_score (float): The score to stop summing the areas of a pair at or None.
+
+    Returns:
+        List[float]: The score of the pair (frames[i], frames[i + 1]) at index i.
+    """
+    scores: List[float] = []
+
+    # sliding window: every frame is read and preprocessed once and carried over as prev_frame
+    next_frame: Optional[np.ndarray] = next(frames, None)
+    if next_frame is None:
+        return scores
+    next_resized: Dict[Tuple[int, int], np.ndarray] = dict()
+    if prefilter is not None:
+        with profile_stage(profiler, "prefilter", camera_id):
+            next_signature = prefilter.signature(next_frame)
+
+    for frame in frames:
+        prev_frame: np.ndarray = next_frame
+        prev_resized = next_resized
+
+        next_frame = frame
+        next_resized = dict()
+
+        # settle obvious pairs with the signatures, which are computed once per frame
+        if prefilter is not None:
+            prev_signature = next_signature
+            with profile_stage(profiler, "prefilter", camera_id):
+                next_signature = prefilter.signature(next_frame)
+                score = prefilter.settle(prev_signature, next_signature)
+            if score is not None:
+                scores.append(score)
+                continue
+
+        with profile_stage(profiler, "compare", camera_id):
+            score = score_frame_pair(
+                prev_frame,
+                next_frame,
+                min_contour_area,
+                prev_resized,
+                next_resized,
+                scorer,
+                early_exit_score,
+            )
+        scores.append(score)
+
+    return scores
+
+
+def _score_frame_strides(
+    camera_id: str,
+    load_frame: Callable[[int], Optional[np.ndarray]],
+    num_files: int,
+    min_contour_area: Union[int, float],
+    stride: int,
+    score_threshold: float,
+    profiler: StageProfiler,
+    scorer: str,
+    quarantined: Optional[List[int]],
+) -> List[float]:
+    """The function scores the adjacent pairs of frames coarse to fine, see compute_pair_scores.
+
+    Every frame is compared with the frame stride frames later first. An interval whose end points score below \
+    the score_threshold is considered static and all pairs inside get the score of the interval, without \
+    reading the frames inside. An interval that reaches the threshold is split in half until it is a single \
+    pair. A static stretch of n frames costs about n / stride comparisons, a single change in an interval \
+    about 2 * log2(stride) comparisons.
+
+    The keep/delete decisions only depend on which pairs reach the threshold, the scores of the pairs inside a \
+    static interval are not their own. The decisions are exactly the same as comparing every pair if and only \
+    if, for every static interval, no adjacent pair inside it reaches the threshold. This holds for a stride of \
+    1 and whenever every change is persistent for at least stride frames. A change that appears and disappears \
+    between the end points of an interval, i.e. a car that drives through in less than stride frames, is \
+    missed. Frames inside a static interval are never read, so unreadable frames there are not quarantined.
+
+    Args:
+        camera_id (str): The camera id string (i.e. 'c21')
+        load_frame (Callable[[int], Optional[np.ndarray]]): Loads the preprocessed frame at an index, None if \
+            it cannot be read.
+        num_files (int): The number of frames.
+        min_contour_area (Union[int, float]): The min area for contours to be considered.
+        stride (int): The number of pairs compared as one interval first, at least 2.
+        score_threshold (float): The score threshold for the comparison.
+        profiler (StageProfiler): A profiler or None.
+        scorer (str): The name of the scorer.
+        quarantined (Optional[List[int]]): The list the indices of the unreadable frames are appended to or None.
+
+    Returns:
+        List[float]: The score of the pair at index i of adjacent readable frames.
+    """
+    # the indices of the frames that are not known to be unreadable
+    indices = list(range(num_files))
+    unreadable: List[int] = []
+
+    # the loaded frames and their resized versions of the current interval by index
+    frames: Dict[int, np.ndarray] = dict()
+    resized: Dict[int, Dict[Tuple[int, int], np.ndarray]] = dict()
 
-        # Wait for for futures completion
-        for future in futures:
-            future.result()
+    def frame_at(position: int) -> Optional[np.ndarray]:
+        index = indices[position]
+        if index not in frames:
+            frame = load_frame(index)
+            if frame is None:
+                unreadable.append(index)
+                del indices[position]
+                return None
+            frames[index] = frame
+            resized[index] = dict()
+
+        return frames[index]
+
+    def score_interval(start: int, stop: int) -> Optional[List[float]]:
+        """Scores the pairs from position start to stop, None if a frame turned out to be unreadable."""
+        interval_scores: List[float] = [0.0] * (stop - start)
+        intervals = [(start, stop)]
+
+        while intervals:
+            first, last = intervals.pop()
+            # the positions after an unreadable frame have shifted, the interval starts over
+            first_frame = frame_at(first)
+            if first_frame is None:
+                return None
+            last_frame = frame_at(last)
+            if last_frame is None:
+                return None
+
+            with profile_stage(profiler, "compare", camera_id):
+                score = score_frame_pair(
+                    first_frame,
+                    last_frame,
+                    min_contour_area,
+                    resized[indices[first]],
+                    resized[indices[last]],
+                    scorer,
+                    score_threshold,
+                )
+
+            if last - first == 1 or score < score_threshold:
+                for position in range(first, last):
+                    interval_scores[position - start] = score
+            else:
+                middle = (first + last) // 2
+                intervals.append((middle, last))
+                intervals.append((first, middle))
+
+        return interval_scores
+
+    scores: List[float] = []
+    position = 0
+    while position < len(indices) - 1:
+        stop = min(position + stride, len(indices) - 1)
+        interval_scores = score_interval(position, stop)
+        if interval_scores is None:
+            continue
+
+        scores.extend(interval_scores)
+        position = stop
+
+        # only the last frame of the interval is compared again
+        for index in [index for index in frames if index < indices[position]]:
+            del frames[index]
+            del resized[index]
+
+    # frames are only unreadable instead of raising an error if they are quarantined
+    if quarantined is not None:
+        quarantined.extend(sorted(unreadable))
+
+    return scores
+
+
+def _bridge_score(
+    camera_id: str, prev_filename: str, next_filename: str, *args, **kwargs
+) -> Optional[float]:
+    """The function scores a pair of images that no worker compared, see ChunkStitcher. The other arguments \
+    are the same as for compute_pair_scores.
+
+    Raises:
+        FileNotFoundError: If the next image cannot be read anymore.
+
+    Returns:
+        Optional[float]: The score of the pair or None if the previous image cannot be read.
+    """
+    quarantined: List[int] = []
+    scores = compute_pair_scores(
+        camera_id,
+        [prev_filename, next_filename],
+        *args,
+        quarantined=quarantined,
+        **kwargs,
+    )
+
+    if 0 in quarantined:
+        return None
+    if 1 in quarantined:
+        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), next_filename)
+
+    return scores[0]
+
+
+def _compare_chunk(
+    camera_id: str,
+    files: List[str],
+    data_path: Union[str, Path],
+    gaussian_blur_radius_list: Tuple[int],
+    min_contour_area: Union[int, float],
+    cache: FrameCache,
+    reduction_factor: int,
+    prefilter: PrefilterCascade,
+    profiler: StageProfiler,
+    read_ahead: int,
+    batch_size: int,
+    camera_config: CameraConfig,
+    scorer: str,
+    early_exit_score: float,
+    stride: int = 1,
+    score_threshold: float = None,
+    decode_workers: int = 0,
+) -> Tuple[List[float], List[int], Dict[str, int], ProfileStats]:
+    """The function is run by the worker processes of compare_images_parallel for a chunk of a camera. \
+        The arguments are the same as for compute_pair_scores, images that cannot be read are skipped.
+
+    Returns:
+        Tuple[List[float], List[int], Dict[str, int], ProfileStats]: The scores of the pairs of adjacent \
+            readable images, the indices of the images that cannot be read, the number of pairs settled by \
+            each prefilter stage and the profiler stats of the chunk.
+    """
+    if prefilter is not None:
+        prefilter.reset_counts()
+    if profiler is not None:
+        profiler.reset()
+
+    quarantined: List[int] = []
+    scores = compute_pair_scores(
+        camera_id,
+        files,
+        data_path,
+        gaussian_blur_radius_list,
+        min_contour_area,
+        cache,
+        reduction_factor,
+        prefilter,
+        profiler,
+        read_ahead,
+        batch_size,
+        camera_config,
+        scorer,
+        early_exit_score,
+        quarantined,
+        stride,
+        score_threshold,
+        decode_workers,
+    )
+
+    return (
+        scores,
+        quarantined,
+        prefilter.counts if prefilter is not None else dict(),
+        profiler.stats if profiler is not None else dict(),
+    )
+
+
+def decide_frame(
+    score: float, score_threshold: int, prev_frame_same: bool
+) -> Tuple[bool, bool]:
+    """The function decides if a frame is kept based on the score of the pair with its successor.
+
+    Args:
+        score (float): The score of the pair (frame, next frame).
+        score_threshold (int): The score threshold for the comparison.
+        prev_frame_same (bool): The state after the decision of the previous frame.
+
+    Returns:
+        Tuple[bool, bool]: If the frame is kept and the state for the decision of the next frame.
+    """
+    # if score is low enough, delete prev_frame
+    if score < score_threshold:
+        return False, prev_frame_same
+
+    # if the previous frame was already considered to be the same as the next (now), delete now
+    if prev_frame_same:
+        return False, False
+
+    return True, True
+
+
+class FrameDecisions:
+    """The keep/delete state machine of the frames of one camera, see decide_frame.
+
+    The frames are decided in the order of their timestamps and every frame is decided by the score of the pair \
+    with its successor. The decision of frame i is therefore final as soon as the score of the pair \
+    (i, i + 1) is known, a later score never changes it. The last frame of a camera has no successor and \
+    is never decided.
+
+    The state is prev_frame_same: it is set when a frame is kept because it differs from its successor, then \
+    the next frame that differs from its successor is deleted as the end of the same change and the state is \
+    cleared. Frames that do not differ from their successor are deleted and leave the state unchanged.
+    """
+
+    def __init__(self, score_threshold: int = 100):
+        """
+        Args:
+            score_threshold (int, optional): The score threshold for the comparison. Defaults to 100.
+        """
+        self.score_threshold = score_threshold
+        self.prev_frame_same = False
+        # the index of the next frame to decide, the decisions of all frames before are final
+        self.num_decided = 0
+
+    def decide(self, score: float) -> bool:
+        """The function decides the next frame with the score of the pair with its successor.
+
+        Args:
+            score (float): The score of the pair (frame num_decided, frame num_decided + 1).
+
+        Returns:
+            bool: If the frame is kept.
+        """
+        keep, self.prev_frame_same = decide_frame(
+            score, self.score_threshold, self.prev_frame_same
+        )
+        self.num_decided += 1
+
+        return keep
+
+
+def _add_decision(
+    camera_id: str,
+    filename: str,
+    keep: bool,
+    delete_images: Dict[str, List[str]],
+    keep_images: Dict[str, List[str]],
+    on_decision: DecisionCallback = None,
+) -> None:
+    """The function adds a final decision to the dictionaries of the images to delete and to keep and passes \
+    it to the callback."""
+    decided_images = keep_images if keep else delete_images
+    decided_images.setdefault(camera_id, []).append(filename)
+
+    if on_decision is not None:
+        on_decision(camera_id, filename, keep)
+
+
+class ChunkStitcher:
+    """Turns the results of the chunks of a camera, consumed in order, into final decisions.
+
+    The chunks overlap by one image and the scores of a chunk belong to the pairs of its adjacent readable \
+    images. The pending image is the last readable image that is not decided yet, it is decided by the score \
+    with the next readable image. Usually that is the first image of the next chunk, which is the same image. \
+    If the images at a chunk edge cannot be read, the pending image and the first readable image of the next \
+    chunk were not compared by any worker, so their pair is scored with bridge.
+    """
+
+    def __init__(
+        self,
+        decisions: FrameDecisions,
+        bridge: Callable[[int, int], Optional[float]],
+    ):
+        """
+        Args:
+            decisions (FrameDecisions): The state machine of the camera.
+            bridge (Callable[[int, int], Optional[float]]): Scores the pair of the images at two indices, or \
+                returns None if the first image cannot be read anymore.
+        """
+        self.decisions = decisions
+        self.bridge = bridge
+        # the index of the last readable image that is not decided yet
+        self.pending_index: Optional[int] = None
+
+    def add_chunk(
+        self,
+        start: int,
+        stop: int,
+        scores: List[float],
+        quarantined: List[int],
+    ) -> Tuple[List[Tuple[int, float, bool]], List[int]]:
+        """The function decides the images of the next chunk of the camera.
+
+        Args:
+            start (int): The index of the first image of the chunk.
+            stop (int): The index after the last image of the chunk.
+            scores (List[float]): The scores of the pairs of adjacent readable images of the chunk.
+            quarantined (List[int]): The indices into the chunk of the images that cannot be read.
+
+        Returns:
+            Tuple[List[Tuple[int, float, bool]], List[int]]: The index, the score and if the image is kept of \
+                every decided image in order, and the indices of the images that cannot be read.
+        """
+        skipped = set(quarantined)
+        readable = [start + i for i in range(stop - start) if i not in skipped]
+        quarantined_indices = [start + i for i in quarantined]
+        decided: List[Tuple[int, float, bool]] = []
+
+        if not readable:
+            return decided, quarantined_indices
+
+        if self.pending_index is not None and self.pending_index != readable[0]:
+            score = self.bridge(self.pending_index, readable[0])
+            if score is None:
+                quarantined_indices.insert(0, self.pending_index)
+            else:
+                decided.append(
+                    (self.pending_index, score, self.decisions.decide(score))
+                )
+
+        for index, score in zip(readable, scores):
+            decided.append((index, score, self.decisions.decide(score)))
+
+        self.pending_index = readable[-1]
+
+        return decided, quarantined_indices
+
+
+def apply_score_threshold(
+    camera_id: str,
+    files: List[str],
+    scores: List[float],
+    score_threshold: int = 100,
+) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
+    """The function decides which images of a camera to keep and which to delete based on the scores of \
+        adjacent pairs.
+
+    Args:
+        camera_id (str): The camera id string (i.e. 'c21')
+        files (List[str]): A list of image filenames from the camera sorted by timestamp.
+        scores (List[float]): The score of the pair (files[i], files[i + 1]) at index i.
+        score_threshold (int, optional): The score threshold for the comparison. Defaults to 100.
+
+    Returns:
+        Tuple[Dict[str, List[str]], Dict[str, List[str]]]: A tuple with two dictionaries. The first dictionary  \
+            contains the filenames to delete and the second dictionary contains the filenames to keep grouped by \
+                camera id.
+    """
+
+    # return dict with camera_ids as keys and filenames are values
+    delete_images: Dict[str, List[str]] = dict()
+    keep_images: Dict[str, List[str]] = dict()
+
+    decisions = FrameDecisions(score_threshold)
+
+    # the last frame has no successor to be compared with and is therefore neither kept nor deleted
+    for i, score in enumerate(scores):
+        _add_decision(
+            camera_id, files[i], decisions.decide(score), delete_images, keep_images
+        )
+
+    return delete_images, keep_images
 
 
 def compare_images_for_single_camera(
@@ -100,6 +1186,7 @@ def compare_images_for_single_camera(
     gaussian_blur_radius_list: Tuple[int],
     min_contour_area: Union[int, float],
     score_threshold: int = 100,
+    stride: int = 1,
 ) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
     """The function compares images for a single camera and returns a dict of images to delete and \
     a dict of images grouped by camera_id to keep.
@@ -111,6 +1198,10 @@ def compare_images_for_single_camera(
         gaussian_blur_radius_list (Tuple[int]): A list with radii for gaussian blur to be applied onto the image.
         min_contour_area (Union[int, float]): The min area for contours to be considered.
         score_threshold (int, optional): The score threshold for the comparison. Defaults to 100.
+        stride (int, optional): Compare every frame with the frame stride frames later first and only bisect \
+            the intervals that reach the score_threshold, which skips most comparisons of static stretches. The \
+            decisions are the same as comparing every pair if no change lasts less than stride frames, see \
+            _score_frame_strides. Defaults to 1, which compares every pair.
 
     Raises:
         FileNotFoundError: If an image is not able to be read by cv2.imread() and returns None.
@@ -120,102 +1211,58 @@ def compare_images_for_single_camera(
             contains the filenames to delete and the second dictionary contains the filenames to keep grouped by \
                 camera id.
     """
+    scores = compute_pair_scores(
+        camera_id,
+        files,
+        data_path,
+        gaussian_blur_radius_list,
+        min_contour_area,
+        early_exit_score=score_threshold,
+        stride=stride,
+        score_threshold=score_threshold,
+    )
 
-    # return dict with camera_ids as keys and filenames are values
-    delete_images: Dict[str, List[str]] = dict()
-    keep_images: Dict[str, List[str]] = dict()
-
-    prev_frame_same: bool = False
-
-    # iterate over values in files_by_camera_id
-    for i in range(len(files) - 1):
-        # load image
-        prev_frame_path: Path = os.path.join(data_path, files[i])
-        next_frame_path: Path = os.path.join(data_path, files[i + 1])
+    logging.info(f"Camera {camera_id} comparison finished.")
 
-        prev_frame: np.ndarray = cv2.imread(prev_frame_path)
-        next_frame: np.ndarray = cv2.imread(next_frame_path)
+    return apply_score_threshold(camera_id, files, scores, score_threshold)
 
-        if prev_frame is None:
-            raise FileNotFoundError(
-                errno.ENOENT, os.strerror(errno.ENOENT), prev_frame_path
-            )
-        if next_frame is None:
-            raise FileNotFoundError(
-                errno.ENOENT, os.strerror(errno.ENOENT), next_frame_path
-            )
 
-        # preprocess frames
-        mask: Tuple[int] = (0, 0, 0, 0)  # images should remain unchanged
-
-        # c10 changes size dimensions that are not consistent, which is why no mask is applied
-        if camera_id == "c20":
-            mask = [0, 29, 0, 0]
-        elif camera_id == "c21":
-            mask = [0, 30, 0, 0]
-        elif camera_id == "c23":
-            mask = [0, 32, 0, 0]
-
-        prev_frame = preprocess_image_change_detection(
-            prev_frame,
-            gaussian_blur_radius_list=gaussian_blur_radius_list,
-            black_mask=mask,
-        )
-        next_frame = preprocess_image_change_detection(
-            next_frame,
-            gaussian_blur_radius_list=gaussian_blur_radius_list,
-            black_mask=mask,
-        )
+def split_into_chunks(num_files: int, chunk_size: int) -> List[Tuple[int, int]]:
+    """The function splits a sorted sequence of files into chunks that overlap by one frame, so that every pair \
+        of adjacent files is part of exactly one chunk.
 
-        # resize frames if shape is not the same (larger to smaller)
-        if prev_frame.shape != next_frame.shape:
-            # reshape to smaller image
-            if prev_frame.shape[0] > next_frame.shape[0]:
-                prev_frame = cv2.resize(
-                    prev_frame, (next_frame.shape[1], next_frame.shape[0])
-                )
-            else:
-                next_frame = cv2.resize(
-                    next_frame, (prev_frame.shape[1], prev_frame.shape[0])
-                )
-
-        # compare images
-        score, _, _ = compare_frames_change_detection(
-            prev_frame, next_frame, min_contour_area=min_contour_area
-        )
+    Args:
+        num_files (int): The number of files in the sequence.
+        chunk_size (int): The max number of pairs per chunk.
 
-        # if score is low enough, delete prev_frame
-        if score < score_threshold:
-            # add to delete_images
-            if camera_id not in delete_images:
-                delete_images[camera_id] = []
+    Returns:
+        List[Tuple[int, int]]: A list with (start, stop) indices of the chunks, stop is exclusive.
+    """
+    chunks: List[Tuple[int, int]] = []
 
-            delete_images[camera_id].append(files[i])
-        else:
-            # if the previous frame was already considered to be the same as the next (now), add now to keep_images
-            if prev_frame_same:
-                if camera_id not in delete_images:
-                    delete_images[camera_id] = []
-                delete_images[camera_id].append(files[i])
-                prev_frame_same = False
-                continue
+    for start in range(0, num_files - 1, chunk_size):
+        chunks.append((start, min(start + chunk_size + 1, num_files)))
 
-            if camera_id not in keep_images:
-                keep_images[camera_id] = []
+    return chunks
 
-            keep_images[camera_id].append(files[i])
 
-            prev_frame_same = True
+def get_chunk_size(num_files_by_camera_id: Dict[str, int], max_workers: int) -> int:
+    """The function chooses a chunk size, so that every worker gets a few chunks to balance the load.
 
-        if i + 1 == len(files):
-            if prev_frame_same:
-                delete_images[camera_id].append(files[i + 1])
-            else:
-                keep_images[camera_id].append(files[i + 1])
+    Args:
+        num_files_by_camera_id (Dict[str, int]): A dictionary with the camera_id as key and the number of \
+            images as value.
+        max_workers (int): The number of worker processes.
 
-    logging.info(f"Camera {camera_id} comparison finished.")
+    Returns:
+        int: The max number of pairs per chunk.
+    """
+    num_pairs = sum(
+        max(num_files - 1, 0) for num_files in num_files_by_camera_id.values()
+    )
 
-    return delete_images, keep_images
+    # every chunk boundary costs one additional read, so chunks should not get too small
+    return max(num_pairs // (max_workers * 4), 64)
 
 
 def compare_images_parallel(
@@ -224,10 +1271,33 @@ def compare_images_parallel(
     gaussian_blur_radius_list: Tuple[int] = (5, 11, 21),
     min_contour_area: Union[int, float] = 500,
     score_threshold: int = 100,
+    chunk_size: int = None,
+    cache: FrameCache = None,
+    scores_path: Union[str, Path] = None,
+    reduction_factor: int = 1,
+    prefilter: PrefilterCascade = None,
+    profiler: StageProfiler = None,
+    read_ahead: int = 0,
+    batch_size: int = 0,
+    camera_config: CameraConfig = None,
+    scorer: str = "contours",
+    on_decision: DecisionCallback = None,
+    checkpoint: ComparisonCheckpoint = None,
+    quarantined_images: Dict[str, List[str]] = None,
+    stride: int = 1,
+    decode_workers: int = 0,
 ) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
-    """The function compares images in parallel for each camera and returns a dict of images to delete and \
+    """The function compares images in parallel and returns a dict of images to delete and \
     a dict of images grouped by camera_id to keep.
 
+    The sorted files of every camera are split into chunks overlapping by one frame, which are scored on the \
+    whole process pool. A chunk is consumed as soon as it and all earlier chunks of its camera are done, the \
+    keep/delete decisions carry over the chunk edges this way, so that the result is the same as comparing \
+    every camera sequentially. Every decision is final when it is made and passed to on_decision right away, \
+    while the comparison of the later chunks continues. The frames of a decided chunk are never read again, \
+    except the last one, which is decided by the next chunk. Images that cannot be read are quarantined: they \
+    are neither kept nor deleted and the images before and after them are compared instead.
+
     Args:
         files_by_camera_id (Dict[str, List[str]]): A dictionary with the camera_id as key and a list of filenames \
             from the images.
@@ -236,6 +1306,47 @@ def compare_images_parallel(
             to be applied onto the image. Defaults to (5, 11, 21).
         min_contour_area (Union[int, float], optional): The min area for contours to be considered. Defaults to 500.
         score_threshold (int, optional): The score threshold for the comparison. Defaults to 100.
+        chunk_size (int, optional): The max number of pairs compared per job. Defaults to None, which splits \
+            the work into a few chunks per worker.
+        cache (FrameCache, optional): A cache of preprocessed frames that is shared by all workers. \
+            Defaults to None.
+        scores_path (Union[str, Path], optional): The path to a folder to save the scores of all pairs in, \
+            see compare_images_from_scores. Defaults to None.
+        reduction_factor (int, optional): Decode the images directly into grayscale images reduced by 2, 4 or 8 \
+            in width and height. The blur radii, the min contour area and the score threshold are scaled to the \
+            reduced resolution, so are the saved scores. Defaults to 1, the full resolution.
+        prefilter (PrefilterCascade, optional): A cascade of cheap checks that settles obvious pairs before \
+            the contour comparison. The counts of the settled pairs are added to it. Defaults to None.
+        profiler (StageProfiler, optional): A profiler the stats of the stages recorded by the workers are \
+            added to. Defaults to None.
+        read_ahead (int, optional): The number of frames every worker reads and preprocesses ahead of its \
+            comparison on as many threads, which hides the latency of network storage. Defaults to 0.
+        batch_size (int, optional): The number of consecutive frames of the same shape that are compared as \
+            one stack, see compute_pair_scores. Defaults to 0.
+        camera_config (CameraConfig, optional): The mask and crop settings of the cameras. Defaults to None, \
+            which loads src/config/cameras.json.
+        scorer (str, optional): The name of the scorer, "contours" or "connected_components", see \
+            src/utils/kopernikus_func.py. Defaults to "contours".
+        on_decision (DecisionCallback, optional): Called in the main process with the camera id, the filename \
+            and if the image is kept for every decision as soon as it is final. Defaults to None.
+        checkpoint (ComparisonCheckpoint, optional): Records every decision and saves the progress of the \
+            cameras in intervals. A decision is only passed to on_decision once it is saved, so a callback that \
+            deletes the images never deletes an image a resumed run compares again. The decisions of a resumed \
+            checkpoint are restored and passed to on_decision again, the comparison of every camera continues \
+            with its pending image. Defaults to None.
+        quarantined_images (Dict[str, List[str]], optional): The images that cannot be read are added to it \
+            per camera id. Defaults to None.
+        stride (int, optional): Compare every frame with the frame stride frames later first and only bisect \
+            the intervals that reach the score_threshold, which skips most comparisons of static stretches. The \
+            decisions are the same as comparing every pair if no change lasts less than stride frames, see \
+            _score_frame_strides. Defaults to 1, which compares every pair.
+        decode_workers (int, optional): The number of processes every comparing process reads and \
+            preprocesses the frames on, which pass the frames through shared memory, see compute_pair_scores. \
+            The number of comparing processes is divided by 1 + decode_workers. Defaults to 0.
+
+    Raises:
+        ValueError: If the reduction factor is not supported or a checkpoint or a stride is used with a \
+            scores_path.
 
     Returns:
         Tuple[Dict[str, List[str]], Dict[str, List[str]]]: A tuple with two dictionaries. The first dictionary  \
@@ -247,27 +1358,561 @@ def compare_images_parallel(
     delete_images: Dict[str, List[str]] = dict()
     keep_images: Dict[str, List[str]] = dict()
 
+    if reduction_factor not in IMREAD_FLAGS_BY_REDUCTION_FACTOR:
+        raise ValueError(
+            f"The reduction factor has to be one of {list(IMREAD_FLAGS_BY_REDUCTION_FACTOR)}, got {reduction_factor}."
+        )
+
+    # the scores of the images decided before a checkpoint are not saved
+    if checkpoint is not None and scores_path is not None:
+        raise ValueError("The scores cannot be saved when using a checkpoint.")
+
+    # the pairs inside a static interval only get the score of the interval
+    if stride > 1 and scores_path is not None:
+        raise ValueError("The scores cannot be saved when using a stride.")
+
+    gaussian_blur_radius_list, min_contour_area, score_threshold = (
+        scale_parameters_to_reduction(
+            gaussian_blur_radius_list,
+            min_contour_area,
+            score_threshold,
+            reduction_factor,
+        )
+    )
+
+    if quarantined_images is None:
+        quarantined_images = dict()
+
+    # the index every camera is compared from, after the images decided before the checkpoint
+    start_index_by_camera_id: Dict[str, int] = dict()
+    for camera_id, files in files_by_camera_id.items():
+        start_index_by_camera_id[camera_id] = 0
+        if checkpoint is None:
+            continue
+
+        progress = checkpoint.progress(camera_id)
+        for filename, keep in checkpoint.restored_decisions(camera_id):
+            _add_decision(
+                camera_id, filename, keep, delete_images, keep_images, on_decision
+            )
+        if progress.quarantined:
+            quarantined_images[camera_id] = list(progress.quarantined)
+
+        if progress.finished:
+            start_index_by_camera_id[camera_id] = len(files)
+        elif progress.resume_filename is not None:
+            if progress.resume_filename not in files:
+                raise ValueError(
+                    f"The image {progress.resume_filename} the checkpoint continues with is missing."
+                )
+            start_index_by_camera_id[camera_id] = files.index(progress.resume_filename)
+
+    # every comparing process runs its own decoding processes
+    max_workers = max((os.cpu_count() or 1) // (1 + decode_workers), 1)
+    if chunk_size is None:
+        chunk_size = get_chunk_size(
+            {
+                camera_id: len(files) - start_index_by_camera_id[camera_id]
+                for camera_id, files in files_by_camera_id.items()
+            },
+            max_workers,
+        )
+
+    # the decisions only need to know if a score reaches the threshold, the saved scores have to be complete
+    early_exit_score = score_threshold if scores_path is None else None
+
     logging.info("Start image comparison for all cameras.")
 
-    # parallelize the comparison of images
-    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
-        futures = []
-        for camera_id, files in files_by_camera_id.items():
-            futures.append(
-                executor.submit(
-                    compare_images_for_single_camera,
+    # a crash keeps the last checkpoint, the decisions after it are made again when the run is resumed, so
+    # they are held back from the callback until they are saved
+    unsaved_decisions: List[Tuple[str, str, bool]] = []
+
+    def hold_decision(camera_id: str, filename: str, keep: bool) -> None:
+        unsaved_decisions.append((camera_id, filename, keep))
+
+    decision_callback = on_decision
+    if checkpoint is not None and on_decision is not None:
+        decision_callback = hold_decision
+
+    def pass_saved_decisions() -> None:
+        for decision in unsaved_decisions:
+            on_decision(*decision)
+        unsaved_decisions.clear()
+
+    completed = False
+    try:
+        # parallelize the comparison of images
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            # the (start, stop, future) of the chunks of a camera that are not consumed yet, in order
+            chunks_by_camera_id: Dict[str, Deque[Tuple[int, int, Future]]] = dict()
+            for camera_id, files in files_by_camera_id.items():
+                first = start_index_by_camera_id[camera_id]
+                remaining_files = files[first:]
+                chunks_by_camera_id[camera_id] = deque(
+                    (
+                        first + start,
+                        first + stop,
+                        executor.submit(
+                            _compare_chunk,
+                            camera_id,
+                            remaining_files[start:stop],
+                            data_path,
+                            gaussian_blur_radius_list,
+                            min_contour_area,
+                            cache,
+                            reduction_factor,
+                            prefilter,
+                            profiler,
+                            read_ahead,
+                            batch_size,
+                            camera_config,
+                            scorer,
+                            early_exit_score,
+                            stride,
+                            score_threshold,
+                            decode_workers,
+                        ),
+                    )
+                    for start, stop in split_into_chunks(
+                        len(remaining_files), chunk_size
+                    )
+                )
+
+            scores_by_camera_id: Dict[str, List[float]] = {
+                camera_id: [] for camera_id in files_by_camera_id
+            }
+
+            def bridge_for(camera_id: str) -> Callable[[int, int], Optional[float]]:
+                files = files_by_camera_id[camera_id]
+                return lambda prev_index, next_index: _bridge_score(
                     camera_id,
-                    files,
+                    files[prev_index],
+                    files[next_index],
                     data_path,
                     gaussian_blur_radius_list,
                     min_contour_area,
+                    cache,
+                    reduction_factor,
+                    camera_config=camera_config,
+                    scorer=scorer,
+                    early_exit_score=early_exit_score,
+                )
+
+            stitchers_by_camera_id: Dict[str, ChunkStitcher] = dict()
+            for camera_id in files_by_camera_id:
+                decisions = FrameDecisions(score_threshold)
+                if checkpoint is not None:
+                    decisions.prev_frame_same = checkpoint.progress(
+                        camera_id
+                    ).prev_frame_same
+
+                stitchers_by_camera_id[camera_id] = ChunkStitcher(
+                    decisions, bridge_for(camera_id)
+                )
+
+            def consume_done_chunks(camera_id: str) -> None:
+                chunks = chunks_by_camera_id[camera_id]
+                files = files_by_camera_id[camera_id]
+                stitcher = stitchers_by_camera_id[camera_id]
+
+                while chunks and chunks[0][2].done():
+                    start, stop, future = chunks.popleft()
+                    chunk_scores, chunk_quarantined, prefilter_counts, profile_stats = (
+                        future.result()
+                    )
+
+                    decided, quarantined = stitcher.add_chunk(
+                        start, stop, chunk_scores, chunk_quarantined
+                    )
+                    for index, score, keep in decided:
+                        scores_by_camera_id[camera_id].append(score)
+                        _add_decision(
+                            camera_id,
+                            files[index],
+                            keep,
+                            delete_images,
+                            keep_images,
+                            decision_callback,
+                        )
+                        if checkpoint is not None:
+                            checkpoint.record_decision(camera_id, files[index], keep)
+
+                    camera_quarantined = quarantined_images.setdefault(camera_id, [])
+                    for index in quarantined:
+                        # the image the comparison resumed with may be quarantined again
+                        if files[index] not in camera_quarantined[-1:]:
+                            camera_quarantined.append(files[index])
+                    if not camera_quarantined:
+                        del quarantined_images[camera_id]
+
+                    if checkpoint is not None:
+                        progress = checkpoint.progress(camera_id)
+                        progress.prev_frame_same = stitcher.decisions.prev_frame_same
+                        progress.quarantined = list(camera_quarantined)
+                        # a resumed run continues with the pending image or the last image of the chunk
+                        progress.resume_filename = files[
+                            (
+                                stitcher.pending_index
+                                if stitcher.pending_index is not None
+                                else stop - 1
+                            )
+                        ]
+                        if checkpoint.save():
+                            pass_saved_decisions()
+
+                    if prefilter is not None:
+                        prefilter.merge_counts(prefilter_counts)
+                    if profiler is not None:
+                        profiler.merge(profile_stats)
+
+                if not chunks:
+                    del chunks_by_camera_id[camera_id]
+                    logging.info(f"Camera {camera_id} comparison finished.")
+
+                    if checkpoint is not None:
+                        checkpoint.progress(camera_id).finished = True
+
+                    if scores_path is not None:
+                        # the scores belong to the pairs of adjacent readable images
+                        skipped = set(quarantined_images.get(camera_id, []))
+                        save_scores(
+                            scores_path,
+                            camera_id,
+                            [filename for filename in files if filename not in skipped],
+                            scores_by_camera_id[camera_id],
+                            gaussian_blur_radius_list,
+                            min_contour_area,
+                        )
+                    del scores_by_camera_id[camera_id]
+
+            while chunks_by_camera_id:
+                for camera_id in list(chunks_by_camera_id):
+                    consume_done_chunks(camera_id)
+
+                # the chunks of a camera are consumed in order, a later chunk that is done waits for the first
+                heads = [chunks[0][2] for chunks in chunks_by_camera_id.values()]
+                if heads:
+                    wait(heads, return_when=FIRST_COMPLETED)
+        completed = True
+    finally:
+        if checkpoint is not None:
+            checkpoint.close(save=completed)
+    pass_saved_decisions()
+
+    for camera_id, filenames in quarantined_images.items():
+        logging.warning(
+            "Camera %s: %d images cannot be read and are quarantined.",
+            camera_id,
+            len(filenames),
+        )
+
+    if cache is not None:
+        cache.evict()
+
+    if prefilter is not None:
+        prefilter.log_counts()
+
+    return delete_images, keep_images
+
+
+def _compare_manifest_chunk(
+    manifest_path: Union[str, Path], camera_id: str, start: int, stop: int, *args
+) -> Tuple[np.ndarray, List[int], Dict[str, int], ProfileStats]:
+    """The function is run by the worker processes of compare_images_streaming. It reads the filenames from \
+    index start to stop of the listing of a camera, the other arguments are the same as for _compare_chunk.
+
+    Returns:
+        Tuple[np.ndarray, List[int], Dict[str, int], ProfileStats]: The scores of the pairs of adjacent \
+            readable images as float64 array, the indices of the images that cannot be read, the number of \
+            pairs settled by each prefilter stage and the profiler stats of the chunk.
+    """
+    files = read_listing(manifest_path, camera_id, start, stop)
+    scores, quarantined, prefilter_counts, profile_stats = _compare_chunk(
+        camera_id, files, *args
+    )
+
+    return (
+        np.asarray(scores, dtype=np.float64),
+        quarantined,
+        prefilter_counts,
+        profile_stats,
+    )
+
+
+def compare_images_streaming(
+    manifest_path: Union[str, Path],
+    data_path: Union[str, Path],
+    gaussian_blur_radius_list: Tuple[int] = (5, 11, 21),
+    min_contour_area: Union[int, float] = 500,
+    score_threshold: int = 100,
+    chunk_size: int = None,
+    cache: FrameCache = None,
+    reduction_factor: int = 1,
+    prefilter: PrefilterCascade = None,
+    profiler: StageProfiler = None,
+    read_ahead: int = 0,
+    batch_size: int = 0,
+    camera_config: CameraConfig = None,
+    scorer: str = "contours",
+    on_decision: DecisionCallback = None,
+    stride: int = 1,
+    decode_workers: int = 0,
+) -> Dict[str, Tuple[int, int]]:
+    """The function compares the images listed by write_listing like compare_images_parallel, but streams the \
+    decisions into the index manifests <camera_id>.keep and <camera_id>.delete instead of returning them.
+
+    The workers read the filenames of their chunk from the listing and only return the scores of the chunk. \
+    Only a few chunks per worker are submitted ahead and the results are consumed in order, where the \
+    keep/delete decisions are appended to the manifests as indices into the listing. The memory therefore \
+    does not grow with the number of images. The decisions are the same as compare_images_parallel makes, \
+    the manifests can be consumed lazily with iter_manifest.
+
+    Args:
+        manifest_path (Union[str, Path]): The path to the folder with the listings written by write_listing.
+        data_path (Union[str, Path]): The data path to the folder for the camera images.
+        gaussian_blur_radius_list (Tuple[int], optional): A list with radii for gaussian blur  \
+            to be applied onto the image. Defaults to (5, 11, 21).
+        min_contour_area (Union[int, float], optional): The min area for contours to be considered. Defaults to 500.
+        score_threshold (int, optional): The score threshold for the comparison. Defaults to 100.
+        chunk_size (int, optional): The max number of pairs compared per job. Defaults to None, which splits \
+            the work into a few chunks per worker.
+        cache (FrameCache, optional): A cache of preprocessed frames that is shared by all workers. \
+            Defaults to None.
+        reduction_factor (int, optional): Decode the images directly into grayscale images reduced by 2, 4 or 8 \
+            in width and height. The blur radii, the min contour area and the score threshold are scaled to the \
+            reduced resolution. Defaults to 1, the full resolution.
+        prefilter (PrefilterCascade, optional): A cascade of cheap checks that settles obvious pairs before \
+            the contour comparison. Defaults to None.
+        profiler (StageProfiler, optional): A profiler the stats of the stages recorded by the workers are \
+            added to. Defaults to None.
+        read_ahead (int, optional): The number of frames every worker reads and preprocesses ahead of its \
+            comparison. Defaults to 0.
+        batch_size (int, optional): The number of consecutive frames of the same shape that are compared as \
+            one stack. Defaults to 0.
+        camera_config (CameraConfig, optional): The mask and crop settings of the cameras. Defaults to None, \
+            which loads src/config/cameras.json.
+        scorer (str, optional): The name of the scorer, "contours" or "connected_components". \
+            Defaults to "contours".
+        on_decision (DecisionCallback, optional): Called with the camera id, the filename and if the image is \
+            kept for every decision as soon as it is final, see compare_images_parallel. Defaults to None.
+        stride (int, optional): Compare every frame with the frame stride frames later first, see \
+            compare_images_parallel. Defaults to 1, which compares every pair.
+        decode_workers (int, optional): The number of processes every comparing process reads and \
+            preprocesses the frames on, see compare_images_parallel. Defaults to 0.
+
+    Raises:
+        ValueError: If the reduction factor is not supported.
+
+    Returns:
+        Dict[str, Tuple[int, int]]: The number of images to keep and to delete per camera id.
+    """
+    if reduction_factor not in IMREAD_FLAGS_BY_REDUCTION_FACTOR:
+        raise ValueError(
+            f"The reduction factor has to be one of {list(IMREAD_FLAGS_BY_REDUCTION_FACTOR)}, got {reduction_factor}."
+        )
+
+    gaussian_blur_radius_list, min_contour_area, score_threshold = (
+        scale_parameters_to_reduction(
+            gaussian_blur_radius_list,
+            min_contour_area,
+            score_threshold,
+            reduction_factor,
+        )
+    )
+
+    num_files_by_camera_id = {
+        camera_id: count_manifest(manifest_path, camera_id)
+        for camera_id in listed_camera_ids(manifest_path)
+    }
+
+    # every comparing process runs its own decoding processes
+    max_workers = max((os.cpu_count() or 1) // (1 + decode_workers), 1)
+    if chunk_size is None:
+        chunk_size = get_chunk_size(num_files_by_camera_id, max_workers)
+
+    counts_by_camera_id: Dict[str, Tuple[int, int]] = dict()
+
+    logging.info("Start streaming image comparison for all cameras.")
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        jobs = (
+            (camera_id, start, stop)
+            for camera_id, num_files in num_files_by_camera_id.items()
+            for start, stop in split_into_chunks(num_files, chunk_size)
+        )
+        pending: Deque[Tuple[str, int, int, Future]] = deque()
+
+        def submit_next() -> None:
+            for camera_id, start, stop in islice(jobs, 1):
+                future = executor.submit(
+                    _compare_manifest_chunk,
+                    manifest_path,
+                    camera_id,
+                    start,
+                    stop,
+                    data_path,
+                    gaussian_blur_radius_list,
+                    min_contour_area,
+                    cache,
+                    reduction_factor,
+                    prefilter,
+                    profiler,
+                    read_ahead,
+                    batch_size,
+                    camera_config,
+                    scorer,
+                    score_threshold,
+                    stride,
                     score_threshold,
+                    decode_workers,
                 )
+                pending.append((camera_id, start, stop, future))
+
+        for _ in range(max_workers * 2):
+            submit_next()
+
+        def bridge_for(camera_id: str) -> Callable[[int, int], Optional[float]]:
+            return lambda prev_index, next_index: _bridge_score(
+                camera_id,
+                read_listing(manifest_path, camera_id, prev_index, prev_index + 1)[0],
+                read_listing(manifest_path, camera_id, next_index, next_index + 1)[0],
+                data_path,
+                gaussian_blur_radius_list,
+                min_contour_area,
+                cache,
+                reduction_factor,
+                camera_config=camera_config,
+                scorer=scorer,
+                early_exit_score=score_threshold,
+            )
+
+        for camera_id in num_files_by_camera_id:
+            with IndexManifestWriter(
+                manifest_path, camera_id, KEEP_SUFFIX
+            ) as keep_manifest, IndexManifestWriter(
+                manifest_path, camera_id, DELETE_SUFFIX
+            ) as delete_manifest, IndexManifestWriter(
+                manifest_path, camera_id, QUARANTINE_SUFFIX
+            ) as quarantine_manifest, closing(
+                iter_manifest_listing(manifest_path, camera_id)
+            ) as listing:
+                # the chunks of a camera are submitted and consumed in order, so the state carries over
+                stitcher = ChunkStitcher(
+                    FrameDecisions(score_threshold),
+                    bridge_for(camera_id),
+                )
+                # the decided frames are read from the listing in order for the callback, the listing file is
+                # only opened by the first read
+                next_listing_index = 0
+                # an unreadable image at a chunk edge is reported by both chunks
+                last_quarantined_index = -1
+                while pending and pending[0][0] == camera_id:
+                    _, start, stop, future = pending.popleft()
+                    submit_next()
+
+                    chunk_scores, chunk_quarantined, prefilter_counts, profile_stats = (
+                        future.result()
+                    )
+                    decided, quarantined = stitcher.add_chunk(
+                        start, stop, chunk_scores.tolist(), chunk_quarantined
+                    )
+                    for index in quarantined:
+                        if index != last_quarantined_index:
+                            quarantine_manifest.append(index)
+                            last_quarantined_index = index
+
+                    for index, _, keep in decided:
+                        (keep_manifest if keep else delete_manifest).append(index)
+
+                        if on_decision is not None:
+                            filename = next(
+                                islice(listing, index - next_listing_index, None)
+                            )
+                            next_listing_index = index + 1
+                            on_decision(camera_id, filename, keep)
+
+                    if prefilter is not None:
+                        prefilter.merge_counts(prefilter_counts)
+                    if profiler is not None:
+                        profiler.merge(profile_stats)
+
+            counts_by_camera_id[camera_id] = (
+                keep_manifest.count,
+                delete_manifest.count,
             )
+            logging.info(f"Camera {camera_id} comparison finished.")
+
+    if cache is not None:
+        cache.evict()
+
+    if prefilter is not None:
+        prefilter.log_counts()
+
+    return counts_by_camera_id
+
 
-        for future in futures:
-            result_delete, result_keep = future.result()
-            delete_images.update(result_delete)
-            keep_images.update(result_keep)
+def compare_images_from_scores(
+    scores_path: Union[str, Path], score_threshold: int = 100
+) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
+    """The function makes the keep/delete decisions for a new score threshold from the scores saved by \
+    compare_images_parallel, without reading any image.
+
+    Args:
+        scores_path (Union[str, Path]): The path to the folder the scores were saved in.
+        score_threshold (int, optional): The score threshold for the comparison. Defaults to 100.
+
+    Returns:
+        Tuple[Dict[str, List[str]], Dict[str, List[str]]]: A tuple with two dictionaries. The first dictionary  \
+            contains the filenames to delete and the second dictionary contains the filenames to keep grouped by \
+                camera id.
+    """
+
+    # return dict with camera_ids as keys and filenames are values
+    delete_images: Dict[str, List[str]] = dict()
+    keep_images: Dict[str, List[str]] = dict()
+
+    files_by_camera_id, scores_by_camera_id = load_scores(scores_path)
+
+    for camera_id, files in files_by_camera_id.items():
+        result_delete, result_keep = apply_score_threshold(
+            camera_id, files, scores_by_camera_id[camera_id].tolist(), score_threshold
+        )
+        delete_images.update(result_delete)
+        keep_images.update(result_keep)
 
     return delete_images, keep_images
+
+
+def count_decision_differences(
+    reference: Tuple[Dict[str, List[str]], Dict[str, List[str]]],
+    candidate: Tuple[Dict[str, List[str]], Dict[str, List[str]]],
+) -> Dict[str, Tuple[int, int]]:
+    """The function counts per camera how many keep/delete decisions of a candidate differ from a reference, \
+        i.e. of a comparison with reduced resolution and one with full resolution.
+
+    Args:
+        reference (Tuple[Dict[str, List[str]], Dict[str, List[str]]]): The images to delete and to keep \
+            grouped by camera id of the reference.
+        candidate (Tuple[Dict[str, List[str]], Dict[str, List[str]]]): The images to delete and to keep \
+            grouped by camera id of the candidate.
+
+    Returns:
+        Dict[str, Tuple[int, int]]: The number of images decided in the reference and the number of images \
+            with a different decision in the candidate by camera id.
+    """
+    reference_delete, reference_keep = reference
+    candidate_delete, candidate_keep = candidate
+
+    differences: Dict[str, Tuple[int, int]] = dict()
+    for camera_id in sorted(set(reference_delete) | set(reference_keep)):
+        keep = set(reference_keep.get(camera_id, []))
+        delete = set(reference_delete.get(camera_id, []))
+        candidate_keep_camera = set(candidate_keep.get(camera_id, []))
+        candidate_delete_camera = set(candidate_delete.get(camera_id, []))
+
+        num_different = len(keep - candidate_keep_camera) + len(
+            delete - candidate_delete_camera
+        )
+        differences[camera_id] = (len(keep) + len(delete), num_different)
+
+    return differences
@@ -0,0 +1,276 @@
+import logging
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from src.utils.archive import find_archive_member
+from src.utils.file_ops import default_io_workers
+
+PNG_SIGNATURE: bytes = b"\x89PNG\r\n\x1a\n"
+# the signature, the length and type of the IHDR chunk and the width and height, which are its first fields
+_HEADER_BYTES: int = 24
+# a png ends with an empty IEND chunk, whose crc never changes
+_IEND_CHUNK: bytes = b"\x00\x00\x00\x00IEND\xaeB`\x82"
+
+# the number of files read by one task of the thread pool
+_BATCH_SIZE: int = 1024
+
+
+class ImageHeader(NamedTuple):
+    """The dimensions and the file size of an image, read from its header."""
+
+    width: int
+    height: int
+    file_size: int
+
+
+def read_png_header(image_path: Union[str, Path]) -> ImageHeader:
+    """The function reads the dimensions of a png from its IHDR chunk without decoding the image. Only the first \
+    24 and the last 12 bytes of the file are read, the end has to be the IEND chunk of a complete png. A member \
+    of an archive is read as a whole.
+
+    Args:
+        image_path (Union[str, Path]): The path to the image file or to a member of an archive, see read_image.
+
+    Raises:
+        ValueError: If the file is no png, its header is damaged or the file is truncated.
+        KeyError: If the archive has no member with the filename.
+
+    Returns:
+        ImageHeader: The width, height and file size of the image.
+    """
+    member = find_archive_member(image_path)
+    if member is not None:
+        archive, filename = member
+        data = archive.read(filename)
+        end = len(data) - len(_IEND_CHUNK)
+        return _parse_png_header(data[:_HEADER_BYTES], data[end:], len(data))
+
+    with open(image_path, "rb", buffering=0) as f:
+        header = f.read(_HEADER_BYTES)
+        file_size = os.fstat(f.fileno()).st_size
+
+        f.seek(max(file_size - len(_IEND_CHUNK), 0))
+        end = f.read(len(_IEND_CHUNK))
+
+    return _parse_png_header(header, end, file_size)
+
+
+def _parse_png_header(header: bytes, end: bytes, file_size: int) -> ImageHeader:
+    """The function checks the first 24 and the last 12 bytes of a png and parses its dimensions."""
+    if len(header) < _HEADER_BYTES or not header.startswith(PNG_SIGNATURE):
+        raise ValueError("the file has no png signature")
+    if header[12:16] != b"IHDR":
+        raise ValueError("the png does not start with an IHDR chunk")
+
+    width, height = struct.unpack(">II", header[16:24])
+    if width == 0 or height == 0:
+        raise ValueError(f"the png has the invalid size {width}x{height}")
+
+    if end != _IEND_CHUNK:
+        raise ValueError("the png is truncated, it does not end with an IEND chunk")
+
+    return ImageHeader(width, height, file_size)
+
+
+class CameraImageIndex:
+    """The dimensions and file sizes of the images of a camera, in the order of the filenames.
+
+    The values are held as numpy arrays, a few bytes per image. Consecutive images with the same dimensions form \
+    a segment. The comparison only resizes frames at the boundaries of the segments, to the smaller frame of \
+    the pair.
+    """
+
+    def __init__(
+        self,
+        filenames: List[str],
+        widths: np.ndarray,
+        heights: np.ndarray,
+        file_sizes: np.ndarray,
+    ):
+        """
+        Args:
+            filenames (List[str]): The filenames sorted by timestamp.
+            widths (np.ndarray): The width of every image.
+            heights (np.ndarray): The height of every image.
+            file_sizes (np.ndarray): The file size of every image in bytes.
+        """
+        self.filenames = filenames
+        self.widths = widths
+        self.heights = heights
+        self.file_sizes = file_sizes
+
+    def __len__(self) -> int:
+        return len(self.filenames)
+
+    def dimensions(self) -> Dict[Tuple[int, int], int]:
+        """The function counts the images of every dimension.
+
+        Returns:
+            Dict[Tuple[int, int], int]: The number of images per (width, height), sorted by the dimensions.
+        """
+        dimensions, counts = np.unique(
+            np.stack([self.widths, self.heights], axis=1), axis=0, return_counts=True
+        )
+        return {
+            (int(width), int(height)): int(count)
+            for (width, height), count in zip(dimensions, counts)
+        }
+
+    def segments(self) -> List[Tuple[int, int, Tuple[int, int]]]:
+        """The function splits the images into runs of consecutive images with the same dimensions.
+
+        Returns:
+            List[Tuple[int, int, Tuple[int, int]]]: The start index, the stop index (exclusive) and the \
+                (width, height) of every segment.
+        """
+        if len(self) == 0:
+            return []
+
+        changed = (self.widths[1:] != self.widths[:-1]) | (
+            self.heights[1:] != self.heights[:-1]
+        )
+        bounds = [0] + (np.flatnonzero(changed) + 1).tolist() + [len(self)]
+
+        return [
+            (start, stop, (int(self.widths[start]), int(self.heights[start])))
+            for start, stop in zip(bounds[:-1], bounds[1:])
+        ]
+
+
+def max_frame_bytes(image_paths: List[str], reduction_factor: int = 1) -> int:
+    """The function returns an upper bound of the bytes of the preprocessed grayscale frames of images, from \
+    their png headers. Images whose header cannot be read are not counted.
+
+    Args:
+        image_paths (List[str]): The paths to the image files.
+        reduction_factor (int, optional): The factor the images are reduced by while decoding. Defaults to 1.
+
+    Returns:
+        int: The max width * height of the decoded frames, 0 if no header could be read.
+    """
+    max_bytes = 0
+    for image_path in image_paths:
+        try:
+            header = read_png_header(image_path)
+        except (OSError, ValueError, KeyError):
+            continue
+
+        # the reduced decode rounds up
+        max_bytes = max(
+            max_bytes,
+            -(-header.width // reduction_factor)
+            * -(-header.height // reduction_factor),
+        )
+
+    return max_bytes
+
+
+def _read_headers(
+    data_path: Union[str, Path], filenames: List[str]
+) -> List[Tuple[str, Union[ImageHeader, str]]]:
+    """The function reads the headers of a batch of images, an image that is not valid yields the reason."""
+    headers: List[Tuple[str, Union[ImageHeader, str]]] = []
+    for filename in filenames:
+        try:
+            headers.append(
+                (filename, read_png_header(os.path.join(data_path, filename)))
+            )
+        except (OSError, ValueError, KeyError) as e:
+            headers.append((filename, str(e)))
+
+    return headers
+
+
+def index_images(
+    data_path: Union[str, Path],
+    files_by_camera_id: Dict[str, List[str]],
+    min_size: Optional[Tuple[int, int]] = None,
+    max_workers: int = None,
+) -> Tuple[Dict[str, CameraImageIndex], Dict[str, List[str]]]:
+    """The function reads the png headers of all images before the comparison and sorts out the images that \
+    cannot be compared: files that are no png, truncated files and images smaller than min_size. Every file is \
+    opened once, the headers are read on a thread pool.
+
+    Args:
+        data_path (Union[str, Path]): The data path to the folder for the camera images.
+        files_by_camera_id (Dict[str, List[str]]): The filenames of every camera sorted by timestamp.
+        min_size (Optional[Tuple[int, int]], optional): The min (width, height) of an image. Defaults to None.
+        max_workers (int, optional): The number of threads. Defaults to default_io_workers().
+
+    Returns:
+        Tuple[Dict[str, CameraImageIndex], Dict[str, List[str]]]: The index of the valid images and the \
+            invalid images of every camera.
+    """
+    if max_workers is None:
+        max_workers = default_io_workers()
+
+    index_by_camera_id: Dict[str, CameraImageIndex] = dict()
+    invalid_by_camera_id: Dict[str, List[str]] = dict()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for camera_id, files in files_by_camera_id.items():
+            bounds = range(0, len(files) + _BATCH_SIZE, _BATCH_SIZE)
+            batches = executor.map(
+                partial(_read_headers, data_path),
+                (files[start:stop] for start, stop in zip(bounds, bounds[1:])),
+            )
+
+            filenames: List[str] = []
+            headers: List[ImageHeader] = []
+            invalid: List[str] = []
+            for batch in batches:
+                for filename, header in batch:
+                    if isinstance(header, ImageHeader) and min_size is not None:
+                        if header.width < min_size[0] or header.height < min_size[1]:
+                            header = (
+                                f"the image is smaller than {min_size[0]}x{min_size[1]}"
+                            )
+
+                    if isinstance(header, str):
+                        logging.warning("Skipping %s, %s.", filename, header)
+                        invalid.append(filename)
+                        continue
+
+                    filenames.append(filename)
+                    headers.append(header)
+
+            # the columns of the headers
+            values = np.array(headers, dtype=np.int64).reshape(-1, 3)
+            index_by_camera_id[camera_id] = CameraImageIndex(
+                filenames,
+                values[:, 0].astype(np.int32),
+                values[:, 1].astype(np.int32),
+                values[:, 2],
+            )
+            if invalid:
+                invalid_by_camera_id[camera_id] = invalid
+
+    return index_by_camera_id, invalid_by_camera_id
+
+
+def log_image_index(index_by_camera_id: Dict[str, CameraImageIndex]) -> None:
+    """The function logs the dimensions and the number of dimension segments of every camera.
+
+    Args:
+        index_by_camera_id (Dict[str, CameraImageIndex]): The index of every camera.
+    """
+    for camera_id, index in sorted(index_by_camera_id.items()):
+        if len(index) == 0:
+            continue
+
+        logging.info(
+            "Camera %s: %d images in %d dimension segments, %s.",
+            camera_id,
+            len(index),
+            len(index.segments()),
+            ", ".join(
+                f"{count} of {width}x{height}"
+                for (width, height), count in index.dimensions().items()
+            ),
+        )
@@ -1,4 +1,4 @@
-from typing import List, Tuple, Union
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
 import cv2
 import imutils
@@ -49,10 +49,10 @@ def preprocess_image_change_detection(
     ),
 ) -> np.ndarray:
     """The function converts the image to grayscale, applies a Gaussian blur, and draws a black mask.
-        The image has to be in the BGR format!
+        The image has to be in the BGR format or already in GRAY format!
 
     Args:
-        img (np.ndarray): An image read from cv2 in BGR format.
+        img (np.ndarray): An image read from cv2 in BGR or GRAY format.
         gaussian_blur_radius_list (List[int] | Tuple[int], optional): A list with radii to be applied onto the image. \
             Defaults to None.
         black_mask (List[float  |  int] | Tuple[float  |  int], optional): A black mask that is drawn onto the image. \
@@ -63,7 +63,9 @@ def preprocess_image_change_detection(
     """
 
     gray = img.copy()
-    gray = cv2.cvtColor(gray, cv2.COLOR_BGR2GRAY)
+    # images decoded with cv2.IMREAD_REDUCED_GRAYSCALE_* are already gray
+    if gray.ndim == 3:
+        gray = cv2.cvtColor(gray, cv2.COLOR_BGR2GRAY)
     if gaussian_blur_radius_list is not None:
         for radius in gaussian_blur_radius_list:
             gray = cv2.GaussianBlur(gray, (radius, radius), 0)
@@ -104,3 +106,231 @@ def compare_frames_change_detection(
         score += cv2.contourArea(c)
 
     return score, res_cnts, thresh
+
+
+def _threshold_difference(frame_delta: np.ndarray) -> np.ndarray:
+    """The function thresholds and dilates the difference of two frames like compare_frames_change_detection."""
+    thresh = cv2.threshold(frame_delta, 45, 255, cv2.THRESH_BINARY)[1]
+    return cv2.dilate(thresh, None, iterations=2)
+
+
+def contour_score(
+    thresh: np.ndarray,
+    min_contour_area: Union[int, float],
+    score_threshold: Optional[float] = None,
+) -> float:
+    """The function sums up the areas of the external contours of a thresholded image like \
+    compare_frames_change_detection, without copying the image or collecting the contours.
+
+    Args:
+        thresh (np.ndarray): The thresholded and dilated difference of two frames (uint8).
+        min_contour_area (int | float): The minimum area of a contour to be considered.
+        score_threshold (Optional[float], optional): Stop once the score reaches this value, the returned \
+            score is a lower bound then, which is enough to decide if it passes the threshold. Defaults to None.
+
+    Returns:
+        float: The score.
+    """
+    # findContours does not modify the image since OpenCV 3.2, [-2] are the contours for OpenCV 3 and 4
+    cnts = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[-2]
+
+    score = 0
+    for c in cnts:
+        area = cv2.contourArea(c)
+        if area < min_contour_area:
+            continue
+
+        score += area
+        if score_threshold is not None and score >= score_threshold:
+            break
+
+    return score
+
+
+def connected_components_score(
+    thresh: np.ndarray,
+    min_contour_area: Union[int, float],
+    score_threshold: Optional[float] = None,
+) -> float:
+    """The function sums up the pixel counts of the connected components of a thresholded image that have at \
+    least min_contour_area pixels. The areas are filtered in one vectorized step. A component counts its \
+    pixels, while a contour measures the polygon through its outer pixels including holes, so the scores are \
+    similar but not the same as contour_score.
+
+    Args:
+        thresh (np.ndarray): The thresholded and dilated difference of two frames (uint8).
+        min_contour_area (int | float): The minimum number of pixels of a component to be considered.
+        score_threshold (Optional[float], optional): Not needed, the areas are summed in one step. \
+            Defaults to None.
+
+    Returns:
+        float: The score.
+    """
+    stats = cv2.connectedComponentsWithStats(thresh, connectivity=8)[2]
+
+    # the first component is the background
+    areas = stats[1:, cv2.CC_STAT_AREA]
+    return float(areas[areas >= min_contour_area].sum())
+
+
+# the functions that score a thresholded image by name
+SCORERS: Dict[str, Callable[..., float]] = {
+    "contours": contour_score,
+    "connected_components": connected_components_score,
+}
+
+
+def score_frames_change_detection(
+    prev_frame: np.ndarray,
+    next_frame: np.ndarray,
+    min_contour_area: Union[int, float],
+    scorer: str = "contours",
+    score_threshold: Optional[float] = None,
+) -> float:
+    """The function compares two frames like compare_frames_change_detection, but only returns the score.
+
+    Args:
+        prev_frame (np.ndarray): An image read from cv2 in GRAY format (uint8).
+        next_frame (np.ndarray): An image read from cv2 in GRAY format (uint8).
+        min_contour_area (int | float): The minimum area of a contour to be considered.
+        scorer (str, optional): The name of the scorer in SCORERS. Defaults to "contours", which gives the same \
+            score as compare_frames_change_detection.
+        score_threshold (Optional[float], optional): Stop once the score reaches this value, see \
+            contour_score. Defaults to None.
+
+    Returns:
+        float: The score.
+    """
+    thresh = _threshold_difference(cv2.absdiff(prev_frame, next_frame))
+    return SCORERS[scorer](thresh, min_contour_area, score_threshold)
+
+
+def compare_frame_stack_change_detection(
+    frames: np.ndarray,
+    min_contour_area: Union[int, float],
+    scorer: str = "contours",
+    score_threshold: Optional[float] = None,
+) -> np.ndarray:
+    """The function compares every pair of consecutive frames of a stack like compare_frames_change_detection, \
+    which stays the reference implementation.
+
+    The differences of all pairs are computed in one OpenCV call and their maxima in one NumPy pass. Pairs \
+    without any difference above the threshold get the score 0 without thresholding, dilating and looking for \
+    contours, which is the common case for static scenes. Only the remaining pairs run the per pair steps.
+
+    Args:
+        frames (np.ndarray): A contiguous stack of K images in GRAY format (uint8) with the shape (K, height, width).
+        min_contour_area (int | float): The minimum area of a contour to be considered.
+        scorer (str, optional): The name of the scorer in SCORERS. Defaults to "contours".
+        score_threshold (Optional[float], optional): Stop summing the areas of a pair once its score reaches \
+            this value, see contour_score. Defaults to None.
+
+    Returns:
+        np.ndarray: The K - 1 scores (float64), the score at index i is for the frames i and i + 1.
+    """
+    num_pairs = frames.shape[0] - 1
+    scores = np.zeros(max(num_pairs, 0), dtype=np.float64)
+    if num_pairs < 1:
+        return scores
+
+    h, w = frames.shape[1:]
+
+    # a 2D view over all pairs, so that the difference is a single call
+    frame_delta = cv2.absdiff(
+        frames[:-1].reshape(num_pairs * h, w), frames[1:].reshape(num_pairs * h, w)
+    ).reshape(num_pairs, h, w)
+
+    # a pair has no contours if no pixel passes the threshold of 45
+    changed = np.flatnonzero(frame_delta.reshape(num_pairs, h * w).max(axis=1) > 45)
+
+    score_thresh = SCORERS[scorer]
+    for i in changed:
+        scores[i] = score_thresh(
+            _threshold_difference(frame_delta[i]), min_contour_area, score_threshold
+        )
+
+    return scores
+
+
+def contour_areas_change_detection(
+    prev_frame: np.ndarray, next_frame: np.ndarray
+) -> np.ndarray:
+    """The function compares two frames like compare_frames_change_detection and returns the areas of all \
+    contours, so that the score for any min_contour_area can be computed without comparing the frames again.
+
+    Args:
+        prev_frame (np.ndarray): An image read from cv2 in GRAY format (uint8).
+        next_frame (np.ndarray): An image read from cv2 in GRAY format (uint8).
+
+    Returns:
+        np.ndarray: The areas of all contours (float64).
+    """
+    thresh = _threshold_difference(cv2.absdiff(prev_frame, next_frame))
+    cnts = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[-2]
+
+    return np.array([cv2.contourArea(c) for c in cnts], dtype=np.float64)
+
+
+def score_from_contour_areas(
+    contour_areas: np.ndarray, min_contour_area: Union[int, float]
+) -> float:
+    """The function sums up the contour areas that are at least min_contour_area, which is the same score \
+    as returned by compare_frames_change_detection.
+
+    Args:
+        contour_areas (np.ndarray): The areas of all contours.
+        min_contour_area (int | float): The minimum area of a contour to be considered.
+
+    Returns:
+        float: The score.
+    """
+    return float(contour_areas[contour_areas >= min_contour_area].sum())
+
+
+def thumbnail(
+    frame: np.ndarray, thumbnail_size: Tuple[int, int] = (32, 32)
+) -> np.ndarray:
+    """The function shrinks a frame to a thumbnail by averaging over pixel areas.
+
+    Args:
+        frame (np.ndarray): An image read from cv2 in GRAY format (uint8).
+        thumbnail_size (Tuple[int, int], optional): The (width, height) of the thumbnail. Defaults to (32, 32).
+
+    Returns:
+        np.ndarray: The thumbnail (float32).
+    """
+    return cv2.resize(frame, thumbnail_size, interpolation=cv2.INTER_AREA).astype(
+        np.float32
+    )
+
+
+def difference_hash(thumbnail_frame: np.ndarray, hash_size: int = 8) -> int:
+    """The function computes the perceptual difference hash (dHash) of a frame, where every bit tells if a \
+    pixel is brighter than its right neighbour.
+
+    Args:
+        thumbnail_frame (np.ndarray): An image or thumbnail in GRAY format.
+        hash_size (int, optional): The number of rows and bits per row of the hash. Defaults to 8.
+
+    Returns:
+        int: The hash with hash_size * hash_size bits.
+    """
+    small = cv2.resize(
+        thumbnail_frame, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA
+    )
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming_distance(hash_a: int, hash_b: int) -> int:
+    """The function counts the bits that differ between two hashes.
+
+    Args:
+        hash_a (int): The first hash.
+        hash_b (int): The second hash.
+
+    Returns:
+        int: The number of different bits.
+    """
+    return bin(hash_a ^ hash_b).count("1")
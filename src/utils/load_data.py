@@ -1,6 +1,32 @@
+import logging
 import os
+from array import array
 from datetime import datetime
-from typing import Dict, List
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple, Union
+
+import numpy as np
+
+from src.utils.archive import is_archive, open_archive
+
+# the extensions of the files that are considered images, compared case-insensitively
+IMAGE_EXTENSIONS: Tuple[str, ...] = (".png",)
+
+# cumulative days before the first day of each month in a year that is not a leap year
+_DAYS_BEFORE_MONTH: Tuple[int, ...] = (
+    0,
+    31,
+    59,
+    90,
+    120,
+    151,
+    181,
+    212,
+    243,
+    273,
+    304,
+    334,
+)
 
 
 def string_to_date(timestamp_str: str) -> datetime:
@@ -57,44 +83,195 @@ def get_timestamp_from_filename(filename: str) -> str:
     return filename[4:].split(".")[0]
 
 
-def get_images_in_folder(data_path: str) -> Dict[str, List[str]]:
+def _days_since_epoch(year: int, month: int, day: int) -> int:
     """
-    Returns a dict with filenames (values) sorted by timestamp ascending grouped by camera id (keys).
+    Returns the number of days from 1970-01-01 to the given date in the proleptic gregorian calendar.
 
     Args:
-    - data_path (str): The data path to the folder to search for images.
+    - year (int): The year.
+    - month (int): The month from 1 to 12.
+    - day (int): The day of the month starting at 1.
 
     Returns:
-    - Dict[str, List[str]]: A dictionary with the camera_id as key and a list of images from that camera as value.
+    - int: The number of days, negative for dates before 1970.
+    """
+
+    years = year - 1
+    days = years * 365 + years // 4 - years // 100 + years // 400
+    days += _DAYS_BEFORE_MONTH[month - 1] + day - 1
+
+    # february 29th of the current year
+    if month > 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+        days += 1
+
+    # days from 0001-01-01 to 1970-01-01
+    return days - 719162
+
+
+def parse_timestamp_ms(timestamp_str: str) -> int:
+    """
+    Converts a timestamp string to integer epoch milliseconds without creating a datetime object.
+    The string can either represent a unix timestamp (in milliseconds) or a date in the format
+    'YYYY_MM_DD__HH_MM_SS', which is interpreted in the UTC timezone.
+
+    Args:
+    - timestamp_str (str): The timestamp string to convert.
+
+    Returns:
+    - int: The milliseconds since 1970-01-01 UTC.
 
     Raises:
-    - ValueError: If the folder at data_path is empty.
+    - ValueError: If the input string is in neither of the formats.
     """
 
-    # Get the list of all files in the folder
-    filenames: List[str] = os.listdir(data_path)
+    if timestamp_str.isascii() and timestamp_str.isdigit():
+        return int(timestamp_str)
 
-    if len(filenames) == 0:
-        raise ValueError(f"No images found in the folder '{data_path}'.")
+    # fixed positions of the custom format, i.e. '2021_03_26__07_41_30'
+    if (
+        len(timestamp_str) == 20
+        and timestamp_str[4] == "_"
+        and timestamp_str[7] == "_"
+        and timestamp_str[10:12] == "__"
+        and timestamp_str[14] == "_"
+        and timestamp_str[17] == "_"
+    ):
+        fields = (
+            timestamp_str[0:4],
+            timestamp_str[5:7],
+            timestamp_str[8:10],
+            timestamp_str[12:14],
+            timestamp_str[15:17],
+            timestamp_str[18:20],
+        )
+        if all(field.isascii() and field.isdigit() for field in fields):
+            year, month, day, hour, minute, second = map(int, fields)
 
-    # dictionary to store images by camera_id
-    files_by_camera_id: dict = dict()
+            if 1 <= month <= 12 and hour < 24 and minute < 60 and second < 60:
+                days_in_month = _days_since_epoch(
+                    year + month // 12, month % 12 + 1, 1
+                ) - _days_since_epoch(year, month, 1)
+                if 1 <= day <= days_in_month and year >= 1:
+                    seconds = (
+                        _days_since_epoch(year, month, day) * 86400
+                        + hour * 3600
+                        + minute * 60
+                        + second
+                    )
+                    return seconds * 1000
+
+    raise ValueError(f"Unable to convert '{timestamp_str}' into a valid date format.")
 
-    for filename in filenames:
-        # store in dictionary with camera_id as key and all images from that camera as value
-        camera_id: str = filename[:3]
 
-        # check if camera_id is already in dictionary
-        if camera_id not in files_by_camera_id:
-            files_by_camera_id[camera_id] = []
+def scan_images(
+    data_path: Union[str, Path], extensions: Tuple[str, ...] = IMAGE_EXTENSIONS
+) -> Iterator[Tuple[str, int, str]]:
+    """
+    Yields the images in a folder in directory order without listing the whole folder first.
+    Directories, files with other extensions and files without a timestamp are skipped.
+    The data path can also be a tar or zip archive, whose members are yielded in the order of the archive
+    without extracting them, see ImageArchive.
 
-        # add the filename to the list of images for the camera_id
-        files_by_camera_id[camera_id].append(filename)
+    Args:
+    - data_path (str | Path): The data path to the folder or archive to search for images.
+    - extensions (Tuple[str, ...]): The extensions of the images. Defaults to IMAGE_EXTENSIONS.
 
-    # sort files in files_by_camera by timestamp ascending
-    for camera_id in files_by_camera_id:
-        files_by_camera_id[camera_id].sort(
-            key=lambda filename: string_to_date(get_timestamp_from_filename(filename))
-        )
+    Returns:
+    - Iterator[Tuple[str, int, str]]: The camera id, the timestamp in epoch milliseconds and the filename.
+    """
+
+    for filename in _iter_filenames(data_path, extensions):
+        try:
+            timestamp = parse_timestamp_ms(get_timestamp_from_filename(filename))
+        except ValueError:
+            logging.warning("Skipping %s, the filename has no timestamp.", filename)
+            continue
+
+        yield filename[:3], timestamp, filename
+
+
+def _iter_filenames(
+    data_path: Union[str, Path], extensions: Tuple[str, ...]
+) -> Iterator[str]:
+    """
+    Yields the names of the files with one of the extensions in a folder or the members of an archive.
+    """
+
+    if is_archive(data_path):
+        for filename in open_archive(data_path).names():
+            if filename.lower().endswith(extensions):
+                yield filename
+        return
+
+    with os.scandir(data_path) as entries:
+        for entry in entries:
+            # the extension is checked first, it does not need a system call
+            if entry.name.lower().endswith(extensions) and entry.is_file():
+                yield entry.name
+
+
+def iter_images_in_folder(
+    data_path: Union[str, Path], extensions: Tuple[str, ...] = IMAGE_EXTENSIONS
+) -> Iterator[Tuple[str, Iterator[str]]]:
+    """
+    Yields a camera id and an iterator over its filenames sorted by timestamp ascending for every camera.
+    The timestamps are kept as a compact array of 64 bit integers next to the filenames and every camera
+    is only sorted when it is reached, so the memory is dominated by the filenames themselves.
+    Filenames with the same timestamp keep the directory order.
+
+    Args:
+    - data_path (str | Path): The data path to the folder to search for images.
+    - extensions (Tuple[str, ...]): The extensions of the images. Defaults to IMAGE_EXTENSIONS.
+
+    Returns:
+    - Iterator[Tuple[str, Iterator[str]]]: The camera id and the sorted filenames of the camera.
+    """
+
+    filenames_by_camera_id: Dict[str, List[str]] = dict()
+    timestamps_by_camera_id: Dict[str, array] = dict()
+
+    for camera_id, timestamp, filename in scan_images(data_path, extensions):
+        if camera_id not in filenames_by_camera_id:
+            filenames_by_camera_id[camera_id] = []
+            timestamps_by_camera_id[camera_id] = array("q")
+
+        filenames_by_camera_id[camera_id].append(filename)
+        timestamps_by_camera_id[camera_id].append(timestamp)
+
+    for camera_id in list(filenames_by_camera_id):
+        filenames = filenames_by_camera_id.pop(camera_id)
+        timestamps = np.frombuffer(timestamps_by_camera_id.pop(camera_id), np.int64)
+
+        order = np.argsort(timestamps, kind="stable")
+        del timestamps
+
+        yield camera_id, (filenames[i] for i in order.tolist())
+
+
+def get_images_in_folder(
+    data_path: Union[str, Path], extensions: Tuple[str, ...] = IMAGE_EXTENSIONS
+) -> Dict[str, List[str]]:
+    """
+    Returns a dict with filenames (values) sorted by timestamp ascending grouped by camera id (keys).
+
+    Args:
+    - data_path (str | Path): The data path to the folder to search for images.
+    - extensions (Tuple[str, ...]): The extensions of the images. Defaults to IMAGE_EXTENSIONS.
+
+    Returns:
+    - Dict[str, List[str]]: A dictionary with the camera_id as key and a list of images from that camera as value.
+
+    Raises:
+    - ValueError: If the folder at data_path contains no images.
+    """
+
+    # dictionary to store images by camera_id
+    files_by_camera_id: Dict[str, List[str]] = {
+        camera_id: list(filenames)
+        for camera_id, filenames in iter_images_in_folder(data_path, extensions)
+    }
+
+    if len(files_by_camera_id) == 0:
+        raise ValueError(f"No images found in the folder '{data_path}'.")
 
     return files_by_camera_id
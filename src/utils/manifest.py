@@ -0,0 +1,355 @@
+import heapq
+import logging
+import os
+from array import array
+from itertools import islice
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Tuple, Union
+
+from src.utils.load_data import IMAGE_EXTENSIONS, scan_images
+
+# the files of a camera in a manifest folder, <camera_id><suffix>
+# the filenames sorted by timestamp, one per line
+LISTING_SUFFIX: str = ".listing"
+# the byte offset of every line of the listing as int64
+OFFSETS_SUFFIX: str = ".offsets"
+# the indices into the listing of the images to keep and to delete as int64, in ascending order
+KEEP_SUFFIX: str = ".keep"
+DELETE_SUFFIX: str = ".delete"
+# the indices of the images that cannot be read as int64, in ascending order
+QUARANTINE_SUFFIX: str = ".quarantine"
+
+_MANIFEST_SUFFIXES: Tuple[str, ...] = (
+    LISTING_SUFFIX,
+    OFFSETS_SUFFIX,
+    KEEP_SUFFIX,
+    DELETE_SUFFIX,
+    QUARANTINE_SUFFIX,
+)
+
+# the size of an int64 in the offset and index files
+_INDEX_BYTES: int = array("q").itemsize
+
+
+def _manifest_file(manifest_path: Union[str, Path], camera_id: str, suffix: str) -> str:
+    """The function returns the path of a manifest file of a camera."""
+    return os.path.join(manifest_path, f"{camera_id}{suffix}")
+
+
+def _write_run(
+    manifest_path: Union[str, Path],
+    run_paths_by_camera_id: Dict[str, List[str]],
+    entries_by_camera_id: Dict[str, List[Tuple[int, str]]],
+) -> None:
+    """The function sorts the buffered entries of every camera by timestamp and writes them as a new run file."""
+    for camera_id, entries in entries_by_camera_id.items():
+        run_paths = run_paths_by_camera_id.setdefault(camera_id, [])
+        run_path = os.path.join(manifest_path, f"{camera_id}.run{len(run_paths)}")
+        run_paths.append(run_path)
+
+        # the sort is stable, entries with the same timestamp keep the directory order
+        entries.sort(key=lambda entry: entry[0])
+        with open(run_path, "w") as f:
+            f.writelines(
+                f"{timestamp}\t{filename}\n" for timestamp, filename in entries
+            )
+
+    entries_by_camera_id.clear()
+
+
+def _read_run(run_path: str) -> Iterator[Tuple[int, str]]:
+    """The function yields the (timestamp, filename) entries of a run file."""
+    with open(run_path) as f:
+        for line in f:
+            timestamp, filename = line.rstrip("\n").split("\t", 1)
+            yield int(timestamp), filename
+
+
+def write_listing(
+    data_path: Union[str, Path],
+    manifest_path: Union[str, Path],
+    extensions: Tuple[str, ...] = IMAGE_EXTENSIONS,
+    run_size: int = 1_000_000,
+) -> Dict[str, int]:
+    """The function writes the filenames of every camera sorted by timestamp into <camera_id>.listing and \
+    the byte offsets of the lines into <camera_id>.offsets. The manifests of a previous run are removed.
+
+    The folder is scanned once and at most run_size filenames are held in memory. Full buffers are sorted and \
+    written as run files, which are merged per camera at the end, so the memory does not grow with the number \
+    of images. The order is the same as get_images_in_folder returns.
+
+    Args:
+        data_path (Union[str, Path]): The data path to the folder to search for images.
+        manifest_path (Union[str, Path]): The path to the folder to write the manifests in.
+        extensions (Tuple[str, ...], optional): The extensions of the images. Defaults to IMAGE_EXTENSIONS.
+        run_size (int, optional): The max number of filenames held in memory. Defaults to 1_000_000.
+
+    Raises:
+        ValueError: If the folder at data_path contains no images.
+
+    Returns:
+        Dict[str, int]: The number of images per camera id.
+    """
+    os.makedirs(manifest_path, exist_ok=True)
+    for filename in os.listdir(manifest_path):
+        if filename.endswith(_MANIFEST_SUFFIXES):
+            os.remove(os.path.join(manifest_path, filename))
+
+    run_paths_by_camera_id: Dict[str, List[str]] = dict()
+    entries_by_camera_id: Dict[str, List[Tuple[int, str]]] = dict()
+    num_buffered = 0
+
+    for camera_id, timestamp, filename in scan_images(data_path, extensions):
+        # a line break would split the line of the filename in the listing
+        if "\n" in filename:
+            logging.warning("Skipping %r, the filename has a line break.", filename)
+            continue
+
+        entries_by_camera_id.setdefault(camera_id, []).append((timestamp, filename))
+        num_buffered += 1
+
+        if num_buffered >= run_size:
+            _write_run(manifest_path, run_paths_by_camera_id, entries_by_camera_id)
+            num_buffered = 0
+
+    _write_run(manifest_path, run_paths_by_camera_id, entries_by_camera_id)
+
+    if len(run_paths_by_camera_id) == 0:
+        raise ValueError(f"No images found in the folder '{data_path}'.")
+
+    num_files_by_camera_id: Dict[str, int] = dict()
+    for camera_id, run_paths in sorted(run_paths_by_camera_id.items()):
+        # heapq.merge is stable, equal timestamps of earlier runs come first like in the directory order
+        merged = heapq.merge(
+            *(_read_run(run_path) for run_path in run_paths),
+            key=lambda entry: entry[0],
+        )
+
+        num_files = 0
+        offset = 0
+        offsets = array("q")
+        with open(
+            _manifest_file(manifest_path, camera_id, LISTING_SUFFIX), "wb"
+        ) as listing_file, open(
+            _manifest_file(manifest_path, camera_id, OFFSETS_SUFFIX), "wb"
+        ) as offsets_file:
+            for _, filename in merged:
+                line = f"{filename}\n".encode()
+                listing_file.write(line)
+
+                offsets.append(offset)
+                offset += len(line)
+                num_files += 1
+
+                if len(offsets) >= 65536:
+                    offsets.tofile(offsets_file)
+                    offsets = array("q")
+
+            offsets.tofile(offsets_file)
+
+        num_files_by_camera_id[camera_id] = num_files
+
+        for run_path in run_paths:
+            os.remove(run_path)
+
+    return num_files_by_camera_id
+
+
+def count_manifest(
+    manifest_path: Union[str, Path], camera_id: str, suffix: str = LISTING_SUFFIX
+) -> int:
+    """The function returns the number of images in the listing or an index manifest of a camera.
+
+    Args:
+        manifest_path (Union[str, Path]): The path to the folder of the manifests.
+        camera_id (str): The camera id string (i.e. 'c21')
+        suffix (str, optional): LISTING_SUFFIX, KEEP_SUFFIX or DELETE_SUFFIX. Defaults to LISTING_SUFFIX.
+
+    Returns:
+        int: The number of images, 0 if the manifest does not exist.
+    """
+    if suffix == LISTING_SUFFIX:
+        suffix = OFFSETS_SUFFIX
+
+    try:
+        return os.path.getsize(_manifest_file(manifest_path, camera_id, suffix)) // (
+            _INDEX_BYTES
+        )
+    except FileNotFoundError:
+        return 0
+
+
+def listed_camera_ids(manifest_path: Union[str, Path]) -> List[str]:
+    """The function returns the sorted camera ids that have a listing in the manifest folder.
+
+    Args:
+        manifest_path (Union[str, Path]): The path to the folder of the manifests.
+
+    Returns:
+        List[str]: The camera ids.
+    """
+    return sorted(
+        filename[: -len(LISTING_SUFFIX)]
+        for filename in os.listdir(manifest_path)
+        if filename.endswith(LISTING_SUFFIX)
+    )
+
+
+def read_listing(
+    manifest_path: Union[str, Path], camera_id: str, start: int = 0, stop: int = None
+) -> List[str]:
+    """The function reads the filenames of a camera from index start to stop (exclusive) of its listing. \
+    Only these lines are read, the offsets file is used to seek to the line at index start.
+
+    Args:
+        manifest_path (Union[str, Path]): The path to the folder of the manifests.
+        camera_id (str): The camera id string (i.e. 'c21')
+        start (int, optional): The index of the first filename. Defaults to 0.
+        stop (int, optional): The index after the last filename. Defaults to None, the end of the listing.
+
+    Returns:
+        List[str]: The filenames sorted by timestamp.
+    """
+    offset = array("q")
+    with open(_manifest_file(manifest_path, camera_id, OFFSETS_SUFFIX), "rb") as f:
+        f.seek(start * _INDEX_BYTES)
+        offset.frombytes(f.read(_INDEX_BYTES))
+
+    if len(offset) == 0:
+        return []
+
+    with open(_manifest_file(manifest_path, camera_id, LISTING_SUFFIX), "rb") as f:
+        f.seek(offset[0])
+        lines = f if stop is None else islice(f, stop - start)
+        return [line.decode().rstrip("\n") for line in lines]
+
+
+def iter_manifest_listing(
+    manifest_path: Union[str, Path], camera_id: str
+) -> Iterator[str]:
+    """The function yields the filenames of the listing of a camera in order, one line at a time.
+
+    Args:
+        manifest_path (Union[str, Path]): The path to the folder of the manifests.
+        camera_id (str): The camera id string (i.e. 'c21')
+
+    Returns:
+        Iterator[str]: The filenames sorted by timestamp.
+    """
+    with open(_manifest_file(manifest_path, camera_id, LISTING_SUFFIX), "rb") as f:
+        for line in f:
+            yield line.decode().rstrip("\n")
+
+
+class IndexManifestWriter:
+    """Appends the indices of images into the listing of a camera to an index manifest (i.e. <camera_id>.keep).
+
+    The indices are buffered as int64 and written in blocks, so a manifest of millions of images needs a few \
+    bytes per image on disk and a constant amount of memory. An existing manifest is truncated when the writer \
+    is opened.
+    """
+
+    def __init__(
+        self,
+        manifest_path: Union[str, Path],
+        camera_id: str,
+        suffix: str,
+        buffer_size: int = 65536,
+    ):
+        """
+        Args:
+            manifest_path (Union[str, Path]): The path to the folder of the manifests.
+            camera_id (str): The camera id string (i.e. 'c21')
+            suffix (str): KEEP_SUFFIX, DELETE_SUFFIX or QUARANTINE_SUFFIX.
+            buffer_size (int, optional): The number of indices buffered before they are written. \
+                Defaults to 65536.
+        """
+        self.buffer_size = buffer_size
+        self.count = 0
+        self._buffer = array("q")
+        self._file: BinaryIO = open(
+            _manifest_file(manifest_path, camera_id, suffix), "wb"
+        )
+
+    def __enter__(self) -> "IndexManifestWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def append(self, index: int) -> None:
+        """The function appends the index of an image.
+
+        Args:
+            index (int): The index of the image into the listing of the camera.
+        """
+        self._buffer.append(index)
+        self.count += 1
+
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """The function writes the buffered indices."""
+        self._buffer.tofile(self._file)
+        self._buffer = array("q")
+        self._file.flush()
+
+    def close(self) -> None:
+        """The function writes the buffered indices and closes the manifest."""
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+def _iter_indices(index_path: str, block_size: int) -> Iterator[int]:
+    """The function yields the indices of an index manifest, reading block_size indices at a time."""
+    try:
+        f = open(index_path, "rb")
+    except FileNotFoundError:
+        return
+
+    with f:
+        while True:
+            block = array("q")
+            block.frombytes(f.read(block_size * _INDEX_BYTES))
+            if len(block) == 0:
+                return
+            yield from block
+
+
+def iter_manifest(
+    manifest_path: Union[str, Path],
+    camera_id: str,
+    suffix: str,
+    block_size: int = 65536,
+) -> Iterator[str]:
+    """The function yields the filenames of the images in an index manifest of a camera. The listing is read \
+    once from start to end next to the ascending indices, so only one block of indices is held in memory.
+
+    Args:
+        manifest_path (Union[str, Path]): The path to the folder of the manifests.
+        camera_id (str): The camera id string (i.e. 'c21')
+        suffix (str): KEEP_SUFFIX or DELETE_SUFFIX.
+        block_size (int, optional): The number of indices read at a time. Defaults to 65536.
+
+    Returns:
+        Iterator[str]: The filenames in the order of the listing.
+    """
+    indices = _iter_indices(
+        _manifest_file(manifest_path, camera_id, suffix), block_size
+    )
+
+    next_index = next(indices, None)
+    if next_index is None:
+        return
+
+    for i, filename in enumerate(iter_manifest_listing(manifest_path, camera_id)):
+        if i != next_index:
+            continue
+
+        yield filename
+
+        next_index = next(indices, None)
+        if next_index is None:
+            return
@@ -0,0 +1,296 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+import cv2
+import numpy as np
+
+from src.utils.file_ops import default_io_workers
+from src.utils.handle_files import load_preprocessed_frame
+from src.utils.kopernikus_func import difference_hash, hamming_distance, thumbnail
+from src.utils.preprocessing import CameraConfig, get_camera_settings
+
+# the signatures are computed from images reduced by 8 without blur, so they do not depend on the run parameters
+SIGNATURE_REDUCTION_FACTOR: int = 8
+
+# the key of the tree shared by all cameras
+_ALL_CAMERAS: str = "all"
+
+
+class BKTree:
+    """A BK-tree over 64 bit hashes with the hamming distance as metric.
+
+    Every node keeps its children by their distance to it. By the triangle inequality a search for hashes within \
+    max_distance of a query only descends into the children whose distance differs by at most max_distance \
+    from the distance of the node, so a search with a small max_distance visits a small part of the tree.
+    """
+
+    def __init__(self):
+        # a node is [hash, item, children by distance]
+        self._root: Optional[list] = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, frame_hash: int, item: str) -> None:
+        """The function adds an item with its hash to the tree.
+
+        Args:
+            frame_hash (int): The hash of the item.
+            item (str): The item, i.e. a filename.
+        """
+        self._size += 1
+        if self._root is None:
+            self._root = [frame_hash, item, dict()]
+            return
+
+        node = self._root
+        while True:
+            distance = hamming_distance(frame_hash, node[0])
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [frame_hash, item, dict()]
+                return
+            node = child
+
+    def search(self, frame_hash: int, max_distance: int) -> List[Tuple[int, str]]:
+        """The function finds all items with a hash within max_distance of the hash.
+
+        Args:
+            frame_hash (int): The hash to search for.
+            max_distance (int): The max hamming distance of the items.
+
+        Returns:
+            List[Tuple[int, str]]: The distance and the item of every match, sorted by the distance.
+        """
+        matches: List[Tuple[int, str]] = []
+        nodes = [self._root] if self._root is not None else []
+
+        while nodes:
+            node_hash, item, children = nodes.pop()
+            distance = hamming_distance(frame_hash, node_hash)
+            if distance <= max_distance:
+                matches.append((distance, item))
+
+            nodes.extend(
+                child
+                for child_distance, child in children.items()
+                if abs(child_distance - distance) <= max_distance
+            )
+
+        return sorted(matches)
+
+
+class NearDuplicateIndex:
+    """The signatures of all kept images of every camera, searchable for near-duplicates.
+
+    The signature of an image is the difference hash of its masked thumbnail. An image whose signature is within \
+    max_distance of an image in the index is a near-duplicate, also if it is not adjacent to it, i.e. when a \
+    scene returns to an earlier state. The signatures are held in a BKTree per camera or one for all cameras and \
+    can be saved between runs.
+    """
+
+    def __init__(self, max_distance: int, across_cameras: bool = False):
+        """
+        Args:
+            max_distance (int): The max hamming distance of the signatures of near-duplicates.
+            across_cameras (bool, optional): Search the images of all cameras instead of the same camera. \
+                Defaults to False.
+        """
+        self.max_distance = max_distance
+        self.across_cameras = across_cameras
+
+        self._trees: Dict[str, BKTree] = dict()
+        self._filenames: Set[str] = set()
+        # the columns of the saved signatures
+        self._camera_ids: List[str] = []
+        self._filename_list: List[str] = []
+        self._hashes: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._filename_list)
+
+    def __contains__(self, filename: str) -> bool:
+        return filename in self._filenames
+
+    def _tree(self, camera_id: str) -> BKTree:
+        return self._trees.setdefault(
+            _ALL_CAMERAS if self.across_cameras else camera_id, BKTree()
+        )
+
+    def find(self, camera_id: str, frame_hash: int) -> Optional[str]:
+        """The function finds the closest image in the index, that is a near-duplicate of the hash.
+
+        Args:
+            camera_id (str): The camera id string (i.e. 'c21')
+            frame_hash (int): The signature of the image.
+
+        Returns:
+            Optional[str]: The filename of the closest image or None if there is no near-duplicate.
+        """
+        matches = self._tree(camera_id).search(frame_hash, self.max_distance)
+        return matches[0][1] if matches else None
+
+    def add(self, camera_id: str, filename: str, frame_hash: int) -> None:
+        """The function adds the signature of an image to the index.
+
+        Args:
+            camera_id (str): The camera id string (i.e. 'c21')
+            filename (str): The filename of the image.
+            frame_hash (int): The signature of the image.
+        """
+        self._tree(camera_id).add(frame_hash, filename)
+        self._filenames.add(filename)
+        self._camera_ids.append(camera_id)
+        self._filename_list.append(filename)
+        self._hashes.append(frame_hash)
+
+    def save(self, signature_path: Union[str, Path]) -> None:
+        """The function saves the signatures into a npz file with the camera ids and filenames as bytes and \
+        the hashes as uint64 columns.
+
+        Args:
+            signature_path (Union[str, Path]): The path to the npz file.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(signature_path)), exist_ok=True)
+
+        with open(signature_path, "wb") as f:
+            np.savez(
+                f,
+                camera_ids=np.array(
+                    [camera_id.encode() for camera_id in self._camera_ids], dtype=bytes
+                ),
+                filenames=np.array(
+                    [filename.encode() for filename in self._filename_list],
+                    dtype=bytes,
+                ),
+                hashes=np.array(self._hashes, dtype=np.uint64),
+            )
+
+    @classmethod
+    def load(
+        cls,
+        signature_path: Union[str, Path],
+        max_distance: int,
+        across_cameras: bool = False,
+    ) -> "NearDuplicateIndex":
+        """The function loads the signatures saved by save into a new index. A missing file gives an empty index.
+
+        Args:
+            signature_path (Union[str, Path]): The path to the npz file.
+            max_distance (int): The max hamming distance of the signatures of near-duplicates.
+            across_cameras (bool, optional): Search the images of all cameras instead of the same camera. \
+                Defaults to False.
+
+        Returns:
+            NearDuplicateIndex: The index with the saved signatures.
+        """
+        index = cls(max_distance, across_cameras)
+        if not os.path.exists(signature_path):
+            return index
+
+        with np.load(signature_path) as data:
+            for camera_id, filename, frame_hash in zip(
+                data["camera_ids"], data["filenames"], data["hashes"].tolist()
+            ):
+                index.add(camera_id.decode(), filename.decode(), frame_hash)
+
+        return index
+
+
+def image_signature(
+    image_path: Union[str, Path], camera_id: str, camera_config: CameraConfig = None
+) -> Optional[int]:
+    """The function computes the signature of an image for the NearDuplicateIndex.
+
+    Args:
+        image_path (Union[str, Path]): The path to the image file.
+        camera_id (str): The camera id string (i.e. 'c21')
+        camera_config (CameraConfig, optional): The mask and crop settings of the cameras. Defaults to None, \
+            which loads src/config/cameras.json.
+
+    Returns:
+        Optional[int]: The 64 bit difference hash or None if the image cannot be read.
+    """
+    settings = get_camera_settings(camera_id, camera_config)
+    try:
+        frame = load_preprocessed_frame(
+            image_path,
+            None,
+            settings.mask,
+            reduction_factor=SIGNATURE_REDUCTION_FACTOR,
+            crop=settings.crop,
+        )
+    except (OSError, cv2.error) as e:
+        # a missing or corrupt image stays kept, like an image the comparison quarantined
+        logging.warning("Skipping %s, the image cannot be read: %s", image_path, e)
+        return None
+
+    return difference_hash(thumbnail(frame))
+
+
+def filter_near_duplicates(
+    delete_images: Dict[str, List[str]],
+    keep_images: Dict[str, List[str]],
+    data_path: Union[str, Path],
+    index: NearDuplicateIndex,
+    camera_config: CameraConfig = None,
+    max_workers: int = None,
+) -> Dict[str, Dict[str, str]]:
+    """The function moves the kept images that are near-duplicates of an earlier kept image to the images to \
+    delete. The kept images are searched in the order of the cameras and their timestamps and every image \
+    that is still kept is added to the index. Images that are in the index already, i.e. from a previous run, \
+    stay kept.
+
+    Only the kept images are read, on a thread pool. Every search is a BKTree lookup instead of a comparison \
+    with every kept image.
+
+    Args:
+        delete_images (Dict[str, List[str]]): The filenames to delete per camera, the near-duplicates are \
+            appended.
+        keep_images (Dict[str, List[str]]): The filenames to keep per camera sorted by timestamp, the \
+            near-duplicates are removed.
+        data_path (Union[str, Path]): The data path to the folder for the camera images.
+        index (NearDuplicateIndex): The index of the images kept so far.
+        camera_config (CameraConfig, optional): The mask and crop settings of the cameras. Defaults to None, \
+            which loads src/config/cameras.json.
+        max_workers (int, optional): The number of threads. Defaults to default_io_workers().
+
+    Returns:
+        Dict[str, Dict[str, str]]: The near-duplicates per camera with the earlier image they duplicate.
+    """
+    if max_workers is None:
+        max_workers = default_io_workers()
+
+    near_duplicates: Dict[str, Dict[str, str]] = dict()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for camera_id in sorted(keep_images):
+            files = keep_images[camera_id]
+            hashes = executor.map(
+                lambda filename: image_signature(
+                    os.path.join(data_path, filename), camera_id, camera_config
+                ),
+                files,
+            )
+
+            unique: List[str] = []
+            for filename, frame_hash in zip(files, hashes):
+                if frame_hash is None or filename in index:
+                    unique.append(filename)
+                    continue
+
+                match = index.find(camera_id, frame_hash)
+                if match is None:
+                    index.add(camera_id, filename, frame_hash)
+                    unique.append(filename)
+                else:
+                    near_duplicates.setdefault(camera_id, dict())[filename] = match
+                    delete_images.setdefault(camera_id, []).append(filename)
+
+            keep_images[camera_id] = unique
+
+    return near_duplicates
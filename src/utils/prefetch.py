@@ -0,0 +1,58 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from typing import Callable, Deque, Iterable, Iterator, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def prefetch(
+    function: Callable[..., T],
+    arguments: Iterable[Tuple],
+    depth: int = 4,
+    max_workers: int = None,
+) -> Iterator[T]:
+    """The function calls a function for all arguments on a small thread pool ahead of the consumer and yields \
+    the results in the order of the arguments.
+
+    At most depth calls are running or waiting to be consumed at any time, so the memory of the results is \
+    bounded. Reading and decoding images with OpenCV releases the GIL, so the threads overlap the disk latency \
+    and the decoding of the next frames with the work of the consumer. An exception is raised when the result \
+    of the failed call is reached, like a sequential loop would. Calls that were not consumed are cancelled \
+    when the iterator is closed.
+
+    Args:
+        function (Callable[..., T]): The function to call, i.e. load_preprocessed_frame.
+        arguments (Iterable[Tuple]): The arguments of the calls in the order the results are yielded.
+        depth (int, optional): The max number of results fetched ahead of the consumer. Defaults to 4.
+        max_workers (int, optional): The number of threads. Defaults to depth.
+
+    Raises:
+        ValueError: If depth is smaller than 1.
+
+    Returns:
+        Iterator[T]: The results of the calls.
+    """
+    if depth < 1:
+        raise ValueError(f"The depth has to be at least 1, got {depth}.")
+
+    arguments = iter(arguments)
+    executor = ThreadPoolExecutor(max_workers=max_workers or depth)
+    pending: Deque[Future] = deque()
+
+    try:
+        for args in islice(arguments, depth):
+            pending.append(executor.submit(function, *args))
+
+        while pending:
+            future = pending.popleft()
+
+            # keep the queue full while the consumer works on this result
+            for args in islice(arguments, 1):
+                pending.append(executor.submit(function, *args))
+
+            yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
@@ -0,0 +1,153 @@
+import logging
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from src.utils.kopernikus_func import difference_hash, hamming_distance, thumbnail
+
+# the stages of the cascade in the order they are run, contours is the full comparison
+PREFILTER_STAGES: Tuple[str, ...] = (
+    "thumbnail_identical",
+    "thumbnail_different",
+    "hash_identical",
+    "hash_different",
+    "contours",
+)
+
+
+class FrameSignature(NamedTuple):
+    """The cheap representation of a preprocessed frame the cascade compares first."""
+
+    thumbnail: np.ndarray
+    hash: int
+
+
+class PrefilterCascade:
+    """A cascade of cheap checks that settles obvious pairs before the contour comparison.
+
+    The checks run on a thumbnail and a difference hash of the preprocessed frames, which are computed once \
+    per frame. A pair with a mean absolute thumbnail difference or a hash distance at or below the identical \
+    limit is settled with the score 0, a pair at or above the different limit with an infinite score. Only \
+    the remaining pairs are compared with compare_frames_change_detection. A limit of None disables the check.
+    """
+
+    def __init__(
+        self,
+        identical_mean_abs_diff: Optional[float] = None,
+        different_mean_abs_diff: Optional[float] = None,
+        identical_hash_distance: Optional[int] = None,
+        different_hash_distance: Optional[int] = None,
+        thumbnail_size: Tuple[int, int] = (32, 32),
+    ):
+        """
+        Args:
+            identical_mean_abs_diff (Optional[float], optional): The max mean absolute difference of the \
+                thumbnails of identical frames. Defaults to None.
+            different_mean_abs_diff (Optional[float], optional): The min mean absolute difference of the \
+                thumbnails of clearly different frames. Defaults to None.
+            identical_hash_distance (Optional[int], optional): The max hamming distance of the hashes of \
+                identical frames. Defaults to None.
+            different_hash_distance (Optional[int], optional): The min hamming distance of the hashes of \
+                clearly different frames. Defaults to None.
+            thumbnail_size (Tuple[int, int], optional): The (width, height) of the thumbnails. \
+                Defaults to (32, 32).
+        """
+        self.identical_mean_abs_diff = identical_mean_abs_diff
+        self.different_mean_abs_diff = different_mean_abs_diff
+        self.identical_hash_distance = identical_hash_distance
+        self.different_hash_distance = different_hash_distance
+        self.thumbnail_size = thumbnail_size
+
+        # number of pairs settled by each stage
+        self.counts: Dict[str, int] = dict()
+        self.reset_counts()
+
+    def reset_counts(self) -> None:
+        """The function sets the number of pairs settled by each stage to 0."""
+        self.counts = {stage: 0 for stage in PREFILTER_STAGES}
+
+    def signature(self, frame: np.ndarray) -> FrameSignature:
+        """The function computes the signature of a preprocessed frame.
+
+        Args:
+            frame (np.ndarray): A preprocessed frame in GRAY format (uint8).
+
+        Returns:
+            FrameSignature: The thumbnail and the difference hash of the frame.
+        """
+        frame_thumbnail = thumbnail(frame, self.thumbnail_size)
+        return FrameSignature(frame_thumbnail, difference_hash(frame_thumbnail))
+
+    def settle(
+        self, prev_signature: FrameSignature, next_signature: FrameSignature
+    ) -> Optional[float]:
+        """The function runs the cheap checks on a pair of frames.
+
+        Args:
+            prev_signature (FrameSignature): The signature of the previous frame.
+            next_signature (FrameSignature): The signature of the next frame.
+
+        Returns:
+            Optional[float]: 0 for identical frames, inf for clearly different frames or None if the pair \
+                has to be compared with the contours.
+        """
+        if (
+            self.identical_mean_abs_diff is not None
+            or self.different_mean_abs_diff is not None
+        ):
+            mean_abs_diff = float(
+                np.mean(np.abs(prev_signature.thumbnail - next_signature.thumbnail))
+            )
+            if (
+                self.identical_mean_abs_diff is not None
+                and mean_abs_diff <= self.identical_mean_abs_diff
+            ):
+                self.counts["thumbnail_identical"] += 1
+                return 0.0
+            if (
+                self.different_mean_abs_diff is not None
+                and mean_abs_diff >= self.different_mean_abs_diff
+            ):
+                self.counts["thumbnail_different"] += 1
+                return float("inf")
+
+        if (
+            self.identical_hash_distance is not None
+            or self.different_hash_distance is not None
+        ):
+            distance = hamming_distance(prev_signature.hash, next_signature.hash)
+            if (
+                self.identical_hash_distance is not None
+                and distance <= self.identical_hash_distance
+            ):
+                self.counts["hash_identical"] += 1
+                return 0.0
+            if (
+                self.different_hash_distance is not None
+                and distance >= self.different_hash_distance
+            ):
+                self.counts["hash_different"] += 1
+                return float("inf")
+
+        self.counts["contours"] += 1
+        return None
+
+    def merge_counts(self, counts: Dict[str, int]) -> None:
+        """The function adds the counts of a cascade that ran in a worker process.
+
+        Args:
+            counts (Dict[str, int]): The number of pairs settled by each stage.
+        """
+        for stage, count in counts.items():
+            self.counts[stage] += count
+
+    def log_counts(self) -> None:
+        """The function logs how many pairs each stage settled."""
+        total = sum(self.counts.values())
+        for stage in PREFILTER_STAGES:
+            logging.info(
+                "Prefilter stage %s settled %d of %d pairs.",
+                stage,
+                self.counts[stage],
+                total,
+            )
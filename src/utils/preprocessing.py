@@ -0,0 +1,260 @@
+import json
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+# the per camera masks, the c10 frames change their resolution, which is why no mask is applied
+CAMERA_CONFIG_PATH: str = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "config",
+    "cameras.json",
+)
+
+
+class CameraSettings(NamedTuple):
+    """The preprocessing settings of a camera."""
+
+    # the black mask in percent of the image [x_min, y_min, x_max, y_max]
+    mask: Tuple[Union[int, float], ...]
+    # cut the masked rows and columns off before the blur instead of drawing the mask after it
+    crop: bool = False
+
+
+# the settings of a camera by camera id, the key 'default' holds the settings of unknown cameras
+CameraConfig = Dict[str, CameraSettings]
+
+
+@lru_cache(maxsize=None)
+def load_camera_config(
+    config_path: Union[str, Path] = CAMERA_CONFIG_PATH,
+) -> CameraConfig:
+    """The function loads the preprocessing settings of the cameras from a json file with the keys 'default' \
+    and 'cameras', see src/config/cameras.json.
+
+    Args:
+        config_path (Union[str, Path], optional): The path to the json file. Defaults to CAMERA_CONFIG_PATH.
+
+    Raises:
+        ValueError: If a mask does not have four values.
+
+    Returns:
+        CameraConfig: The settings by camera id and the 'default' settings.
+    """
+    with open(config_path) as f:
+        config = json.load(f)
+
+    default = config.get("default", dict())
+    default_settings = CameraSettings(
+        tuple(default.get("mask", (0, 0, 0, 0))), bool(default.get("crop", False))
+    )
+
+    camera_config: CameraConfig = {"default": default_settings}
+    for camera_id, settings in config.get("cameras", dict()).items():
+        camera_config[camera_id] = CameraSettings(
+            tuple(settings.get("mask", default_settings.mask)),
+            bool(settings.get("crop", default_settings.crop)),
+        )
+
+    for camera_id, settings in camera_config.items():
+        if len(settings.mask) != 4:
+            raise ValueError(
+                f"The mask of camera '{camera_id}' has to have 4 values, got {list(settings.mask)}."
+            )
+
+    return camera_config
+
+
+def get_camera_settings(
+    camera_id: str, camera_config: Optional[CameraConfig] = None
+) -> CameraSettings:
+    """The function returns the preprocessing settings of a camera.
+
+    Args:
+        camera_id (str): The camera id string (i.e. 'c21')
+        camera_config (Optional[CameraConfig], optional): The settings of the cameras. Defaults to None, \
+            which loads CAMERA_CONFIG_PATH.
+
+    Returns:
+        CameraSettings: The settings of the camera or the default settings for an unknown camera.
+    """
+    if camera_config is None:
+        camera_config = load_camera_config()
+
+    return camera_config.get(camera_id, camera_config["default"])
+
+
+def unmasked_region(
+    shape: Tuple[int, int],
+    black_mask: Union[List[Union[float, int]], Tuple[Union[float, int]]],
+) -> Tuple[int, int, int, int]:
+    """The function computes the region of an image that draw_color_mask leaves untouched. The filled \
+    rectangles of draw_color_mask include their corners, so the column x_min and the row y_min are masked too.
+
+    Args:
+        shape (Tuple[int, int]): The (height, width) of the image.
+        black_mask (List[float  |  int] | Tuple[float  |  int]): The black mask in percent of the image \
+            [x_min, y_min, x_max, y_max].
+
+    Returns:
+        Tuple[int, int, int, int]: The (y_start, y_stop, x_start, x_stop) of the region, which may be empty.
+    """
+    h, w = shape
+
+    x_min = int(black_mask[0] * w / 100)
+    x_max = w - int(black_mask[2] * w / 100)
+    y_min = int(black_mask[1] * h / 100)
+    y_max = h - int(black_mask[3] * h / 100)
+
+    y_start = min(max(y_min + 1, 0), h)
+    x_start = min(max(x_min + 1, 0), w)
+    y_stop = max(min(y_max, h), y_start)
+    x_stop = max(min(x_max, w), x_start)
+
+    return y_start, y_stop, x_start, x_stop
+
+
+class PreprocessingPlan:
+    """The preprocessing of preprocess_image_change_detection compiled for one image shape and camera.
+
+    The kernel sizes and the unmasked region are computed once. The grayscale image and the intermediate \
+    blur results are written into buffers that are allocated once per thread and reused for every frame, only \
+    the result is a new array. The mask is applied by zeroing the masked rows and columns instead of drawing \
+    rectangles. With crop, the masked rows and columns are cut off before the blur, which removes them from \
+    all later work, but changes the blur at the edge of the region and therefore the scores slightly.
+    """
+
+    def __init__(
+        self,
+        shape: Tuple[int, ...],
+        gaussian_blur_radius_list: Optional[Tuple[int, ...]],
+        black_mask: Union[List[Union[float, int]], Tuple[Union[float, int]]],
+        crop: bool = False,
+    ):
+        """
+        Args:
+            shape (Tuple[int, ...]): The shape of the input images, (height, width, 3) for BGR images or \
+                (height, width) for GRAY images.
+            gaussian_blur_radius_list (Optional[Tuple[int, ...]]): The radii for gaussian blur or None.
+            black_mask (List[float  |  int] | Tuple[float  |  int]): The black mask in percent of the image \
+                [x_min, y_min, x_max, y_max].
+            crop (bool, optional): Cut off the masked rows and columns before the blur. Defaults to False.
+        """
+        self.shape = tuple(shape)
+        self.kernel_sizes = [
+            (radius, radius) for radius in (gaussian_blur_radius_list or ())
+        ]
+        self.region = unmasked_region(self.shape[:2], black_mask)
+
+        y_start, y_stop, x_start, x_stop = self.region
+        # an empty region cannot be cropped, the mask is drawn instead
+        self.crop = crop and y_stop > y_start and x_stop > x_start
+
+        if self.crop:
+            self.output_shape = (y_stop - y_start, x_stop - x_start)
+        else:
+            self.output_shape = self.shape[:2]
+
+        self._buffers = threading.local()
+
+    def _get_buffers(self) -> Tuple[np.ndarray, List[np.ndarray]]:
+        """The function returns the gray and the blur buffers of the calling thread."""
+        if not hasattr(self._buffers, "gray"):
+            self._buffers.gray = np.empty(self.shape[:2], dtype=np.uint8)
+            self._buffers.blur = [
+                np.empty(self.output_shape, dtype=np.uint8) for _ in range(2)
+            ]
+
+        return self._buffers.gray, self._buffers.blur
+
+    def apply(self, img: np.ndarray) -> np.ndarray:
+        """The function preprocesses an image like preprocess_image_change_detection.
+
+        Args:
+            img (np.ndarray): An image read from cv2 in BGR or GRAY format with the shape of the plan.
+
+        Raises:
+            ValueError: If the shape of the image is not the shape of the plan.
+
+        Returns:
+            np.ndarray: The preprocessed image in GRAY format, cropped to the unmasked region if crop is set.
+        """
+        if img.shape != self.shape:
+            raise ValueError(
+                f"The plan is compiled for images of shape {self.shape}, got {img.shape}."
+            )
+
+        gray_buffer, blur_buffers = self._get_buffers()
+
+        gray = img
+        if img.ndim == 3:
+            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY, dst=gray_buffer)
+
+        y_start, y_stop, x_start, x_stop = self.region
+        if self.crop:
+            gray = gray[y_start:y_stop, x_start:x_stop]
+
+        frame = np.empty(self.output_shape, dtype=np.uint8)
+
+        # the blur passes alternate between the two buffers, the last pass writes the result
+        src = gray
+        for i, kernel_size in enumerate(self.kernel_sizes):
+            dst = frame if i == len(self.kernel_sizes) - 1 else blur_buffers[i % 2]
+            cv2.GaussianBlur(src, kernel_size, 0, dst=dst)
+            src = dst
+
+        if not self.kernel_sizes:
+            frame[...] = gray
+
+        if not self.crop:
+            frame[:y_start] = 0
+            frame[y_stop:] = 0
+            frame[:, :x_start] = 0
+            frame[:, x_stop:] = 0
+
+        return frame
+
+
+# the max number of compiled plans of a process, there are only a few per camera
+MAX_PLANS: int = 256
+
+
+@lru_cache(maxsize=MAX_PLANS)
+def _compile_plan(
+    shape: Tuple[int, ...],
+    gaussian_blur_radius_list: Optional[Tuple[int, ...]],
+    black_mask: Tuple[Union[float, int], ...],
+    crop: bool,
+) -> PreprocessingPlan:
+    return PreprocessingPlan(shape, gaussian_blur_radius_list, black_mask, crop)
+
+
+def get_preprocessing_plan(
+    shape: Tuple[int, ...],
+    gaussian_blur_radius_list: Optional[Tuple[int, ...]],
+    black_mask: Union[List[Union[float, int]], Tuple[Union[float, int]]],
+    crop: bool = False,
+) -> PreprocessingPlan:
+    """The function returns the plan for an image shape and the preprocessing settings, which is compiled \
+    on the first call. The least recently used plans are dropped when there are more than MAX_PLANS.
+
+    Args:
+        shape (Tuple[int, ...]): The shape of the input images.
+        gaussian_blur_radius_list (Optional[Tuple[int, ...]]): The radii for gaussian blur or None.
+        black_mask (List[float  |  int] | Tuple[float  |  int]): The black mask in percent of the image.
+        crop (bool, optional): Cut off the masked rows and columns before the blur. Defaults to False.
+
+    Returns:
+        PreprocessingPlan: The plan.
+    """
+    # two threads may compile the same plan at once, which is harmless
+    return _compile_plan(
+        tuple(shape),
+        tuple(gaussian_blur_radius_list) if gaussian_blur_radius_list else None,
+        tuple(black_mask),
+        crop,
+    )
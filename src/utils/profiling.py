@@ -0,0 +1,153 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import ContextManager, Dict, Iterator, Union
+
+# the stats of a stage per camera, {stage: {camera_id: {"seconds": ..., "calls": ..., "bytes": ...}}}
+ProfileStats = Dict[str, Dict[str, Dict[str, float]]]
+
+# returned by profile_stage when profiling is off, so that the hot path only pays for a None check
+_DISABLED = nullcontext()
+
+
+class StageProfiler:
+    """Records the wall time, the number of calls and the bytes read of the stages of the pipeline per camera.
+
+    A profiler is passed to the worker processes like the prefilter cascade, every worker records into its own \
+    copy and the stats are merged into the profiler of the main process. The seconds of the stages run by the \
+    workers are summed, so they can add up to more than the wall time of the whole run. Stages can be \
+    recorded from several threads, i.e. by the read-ahead threads.
+    """
+
+    def __init__(self):
+        self.stats: ProfileStats = dict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        # the lock cannot be pickled for the worker processes
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        """The function removes all recorded stats."""
+        self.stats = dict()
+
+    def record(
+        self,
+        stage: str,
+        camera_id: str,
+        seconds: float,
+        calls: int = 1,
+        num_bytes: int = 0,
+    ) -> None:
+        """The function adds a measurement to the stats of a stage.
+
+        Args:
+            stage (str): The name of the stage (i.e. 'imread').
+            camera_id (str): The camera id string (i.e. 'c21') or 'all' for stages that are not per camera.
+            seconds (float): The wall time of the stage.
+            calls (int, optional): The number of calls or files the measurement covers. Defaults to 1.
+            num_bytes (int, optional): The bytes read by the stage. Defaults to 0.
+        """
+        with self._lock:
+            stats = self.stats.setdefault(stage, dict()).setdefault(
+                camera_id, {"seconds": 0.0, "calls": 0, "bytes": 0}
+            )
+            stats["seconds"] += seconds
+            stats["calls"] += calls
+            stats["bytes"] += num_bytes
+
+    @contextmanager
+    def measure(
+        self, stage: str, camera_id: str, calls: int = 1, num_bytes: int = 0
+    ) -> Iterator[None]:
+        """The function records the wall time of the block it wraps, see record for the arguments."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, camera_id, time.perf_counter() - start, calls, num_bytes)
+
+    def merge(self, stats: ProfileStats) -> None:
+        """The function adds the stats recorded by a profiler in a worker process.
+
+        Args:
+            stats (ProfileStats): The stats of the other profiler.
+        """
+        for stage, stats_by_camera_id in stats.items():
+            for camera_id, camera_stats in stats_by_camera_id.items():
+                self.record(
+                    stage,
+                    camera_id,
+                    camera_stats["seconds"],
+                    camera_stats["calls"],
+                    camera_stats["bytes"],
+                )
+
+    def log_summary(self) -> None:
+        """The function logs the totals of every stage, the stats per camera are logged at debug level."""
+        for stage, stats_by_camera_id in self.stats.items():
+            seconds = sum(stats["seconds"] for stats in stats_by_camera_id.values())
+            calls = sum(stats["calls"] for stats in stats_by_camera_id.values())
+            num_bytes = sum(stats["bytes"] for stats in stats_by_camera_id.values())
+            logging.info(
+                "Stage %s: %.3f s in %d calls (%.3f ms per call), %.1f MB read.",
+                stage,
+                seconds,
+                calls,
+                1000 * seconds / max(calls, 1),
+                num_bytes / 1024**2,
+            )
+
+            for camera_id, stats in sorted(stats_by_camera_id.items()):
+                logging.debug(
+                    "Stage %s, camera %s: %.3f s in %d calls, %.1f MB read.",
+                    stage,
+                    camera_id,
+                    stats["seconds"],
+                    stats["calls"],
+                    stats["bytes"] / 1024**2,
+                )
+
+    def save(self, profile_path: Union[str, Path]) -> None:
+        """The function saves the stats as json.
+
+        Args:
+            profile_path (Union[str, Path]): The path to the json file.
+        """
+        with open(profile_path, "w") as f:
+            json.dump(self.stats, f, indent=2)
+
+
+def profile_stage(
+    profiler: Union[StageProfiler, None],
+    stage: str,
+    camera_id: str,
+    calls: int = 1,
+    num_bytes: int = 0,
+) -> ContextManager[None]:
+    """The function returns a context manager that measures a stage, or one that does nothing if the \
+    profiler is None.
+
+    Args:
+        profiler (Union[StageProfiler, None]): The profiler to record into or None if profiling is off.
+        stage (str): The name of the stage (i.e. 'imread').
+        camera_id (str): The camera id string (i.e. 'c21').
+        calls (int, optional): The number of calls or files the measurement covers. Defaults to 1.
+        num_bytes (int, optional): The bytes read by the stage. Defaults to 0.
+
+    Returns:
+        ContextManager[None]: The context manager to wrap the stage with.
+    """
+    if profiler is None:
+        return _DISABLED
+
+    return profiler.measure(stage, camera_id, calls, num_bytes)
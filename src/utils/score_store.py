@@ -0,0 +1,93 @@
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+
+def save_scores(
+    scores_path: Union[str, Path],
+    camera_id: str,
+    files: List[str],
+    scores: Union[List[float], np.ndarray],
+    gaussian_blur_radius_list: Tuple[int] = None,
+    min_contour_area: Union[int, float] = None,
+) -> None:
+    """The function saves the scores of all adjacent pairs of a camera into <scores_path>/<camera_id>.npz.
+
+    The file contains the sorted filenames as bytes and the scores as float32 columns, the score at index i \
+    belongs to the pair (files[i], files[i + 1]).
+
+    Args:
+        scores_path (Union[str, Path]): The path to the folder to save the scores in.
+        camera_id (str): The camera id string (i.e. 'c21')
+        files (List[str]): A list of image filenames from the camera sorted by timestamp.
+        scores (Union[List[float], np.ndarray]): The scores of the adjacent pairs.
+        gaussian_blur_radius_list (Tuple[int], optional): The radii the scores were computed with. \
+            Defaults to None.
+        min_contour_area (Union[int, float], optional): The min contour area the scores were computed with. \
+            Defaults to None.
+
+    Raises:
+        ValueError: If the number of scores does not match the number of pairs.
+    """
+    if len(scores) != max(len(files) - 1, 0):
+        raise ValueError(
+            f"Expected {max(len(files) - 1, 0)} scores for camera {camera_id}, got {len(scores)}."
+        )
+
+    os.makedirs(scores_path, exist_ok=True)
+
+    np.savez(
+        os.path.join(scores_path, f"{camera_id}.npz"),
+        files=np.array([filename.encode() for filename in files], dtype=bytes),
+        scores=np.asarray(scores, dtype=np.float32),
+        gaussian_blur_radius_list=np.asarray(
+            gaussian_blur_radius_list if gaussian_blur_radius_list else [],
+            dtype=np.int32,
+        ),
+        min_contour_area=np.float64(
+            min_contour_area if min_contour_area is not None else np.nan
+        ),
+    )
+
+
+def load_scores(
+    scores_path: Union[str, Path],
+) -> Tuple[Dict[str, List[str]], Dict[str, np.ndarray]]:
+    """The function loads the scores of all cameras saved by save_scores.
+
+    Args:
+        scores_path (Union[str, Path]): The path to the folder the scores were saved in.
+
+    Raises:
+        ValueError: If there are no scores in the folder.
+
+    Returns:
+        Tuple[Dict[str, List[str]], Dict[str, np.ndarray]]: A tuple with two dictionaries with the camera_id as \
+            key. The first contains the sorted filenames and the second the scores of the adjacent pairs.
+    """
+    files_by_camera_id: Dict[str, List[str]] = dict()
+    scores_by_camera_id: Dict[str, np.ndarray] = dict()
+
+    for filename in sorted(os.listdir(scores_path)):
+        if not filename.endswith(".npz"):
+            continue
+
+        camera_id = filename[: -len(".npz")]
+        with np.load(os.path.join(scores_path, filename)) as data:
+            files_by_camera_id[camera_id] = [f.decode() for f in data["files"]]
+            scores_by_camera_id[camera_id] = data["scores"]
+
+            logging.debug(
+                "Loaded scores of camera %s computed with gaussian_blur_radius_list=%s, min_contour_area=%s",
+                camera_id,
+                data["gaussian_blur_radius_list"].tolist(),
+                data["min_contour_area"],
+            )
+
+    if len(scores_by_camera_id) == 0:
+        raise ValueError(f"No scores found in the folder '{scores_path}'.")
+
+    return files_by_camera_id, scores_by_camera_id
@@ -0,0 +1,357 @@
+import csv
+import logging
+import os
+import tarfile
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Deque, Dict, Iterable, List, NamedTuple, Set, Union
+
+from src.utils.archive import read_file
+from src.utils.file_ops import default_io_workers
+from src.utils.load_data import get_timestamp_from_filename, parse_timestamp_ms
+
+# the default max size of a shard
+DEFAULT_SHARD_BYTES: int = 1024**3
+
+# the columns of the index of a shard
+SHARD_INDEX_FIELDS: List[str] = ["filename", "offset", "size", "timestamp"]
+
+# a tar ends with two empty blocks
+_TAR_END: bytes = bytes(2 * tarfile.BLOCKSIZE)
+
+# the buffer of a shard file, so that the small images are written in large sequential blocks
+_BUFFER_SIZE: int = 4 * 1024**2
+
+
+class ShardEntry(NamedTuple):
+    """An image in a shard, its data is the size bytes at offset."""
+
+    filename: str
+    offset: int
+    size: int
+    timestamp: int
+
+
+class ShardWriter:
+    """Writes images into tar shards of at most max_shard_bytes, WebDataset style, i.e. 'c10-000000.tar', \
+    'c10-000001.tar' and so on.
+
+    Every image is a member named by its filename. Next to every shard an index 'c10-000000.csv' lists the \
+    filename, the offset and size of the data in the tar and the timestamp in epoch milliseconds of every \
+    image, so a reader can seek to an image without scanning the tar. The tar is written sequentially through \
+    a large buffer. A shard and its index are written under a temporary name and renamed when the shard is \
+    full, so the index of a shard only exists once the shard is complete. An image larger than \
+    max_shard_bytes gets a shard of its own. A shard whose write failed is discarded with abort.
+    """
+
+    def __init__(
+        self,
+        output_path: Union[str, Path],
+        prefix: str,
+        max_shard_bytes: int = DEFAULT_SHARD_BYTES,
+    ):
+        """
+        Args:
+            output_path (Union[str, Path]): The path to the folder to write the shards to.
+            prefix (str): The prefix of the shard names, i.e. the camera id.
+            max_shard_bytes (int, optional): The max size of a shard in bytes. Defaults to DEFAULT_SHARD_BYTES.
+        """
+        self.output_path = str(output_path)
+        self.prefix = prefix
+        self.max_shard_bytes = max_shard_bytes
+        # the paths of the completed shards
+        self.shard_paths: List[str] = []
+
+        self._shard_path = None
+        self._tar = None
+        self._index_file = None
+        self._index = None
+        self._offset = 0
+        # the filenames of the images in the current shard
+        self._filenames: List[str] = []
+
+        os.makedirs(self.output_path, exist_ok=True)
+
+    def _open_shard(self) -> None:
+        self._shard_path = os.path.join(
+            self.output_path, f"{self.prefix}-{len(self.shard_paths):06d}.tar"
+        )
+        self._tar = open(self._shard_path + ".tmp", "wb", buffering=_BUFFER_SIZE)
+        self._index_file = open(
+            self._index_path(self._shard_path) + ".tmp", "w", newline=""
+        )
+        self._index = csv.writer(self._index_file)
+        self._index.writerow(SHARD_INDEX_FIELDS)
+        self._offset = 0
+        self._filenames = []
+
+    @staticmethod
+    def _index_path(shard_path: str) -> str:
+        return os.path.splitext(shard_path)[0] + ".csv"
+
+    def _close_shard(self) -> None:
+        self._tar.write(_TAR_END)
+        self._tar.close()
+        self._index_file.close()
+
+        # the index is renamed last, it marks the shard as complete
+        os.replace(self._shard_path + ".tmp", self._shard_path)
+        index_path = self._index_path(self._shard_path)
+        os.replace(index_path + ".tmp", index_path)
+
+        self.shard_paths.append(self._shard_path)
+        self._tar = None
+
+    def add(self, filename: str, data: bytes, timestamp: int) -> None:
+        """The function appends an image to the current shard and starts the next shard if it is full.
+
+        Args:
+            filename (str): The filename of the image, which is the name of its member.
+            data (bytes): The encoded image.
+            timestamp (int): The timestamp of the image in epoch milliseconds.
+        """
+        info = tarfile.TarInfo(filename)
+        info.size = len(data)
+        info.mtime = timestamp // 1000
+        info.mode = 0o644
+        header = info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+        padding = -len(data) % tarfile.BLOCKSIZE
+
+        entry_bytes = len(header) + len(data) + padding
+        if (
+            self._tar is not None
+            and self._offset + entry_bytes + len(_TAR_END) > self.max_shard_bytes
+        ):
+            self._close_shard()
+        if self._tar is None:
+            self._open_shard()
+
+        self._tar.write(header)
+        self._tar.write(data)
+        self._tar.write(bytes(padding))
+        self._index.writerow(
+            [filename, self._offset + len(header), len(data), timestamp]
+        )
+        self._offset += entry_bytes
+        self._filenames.append(filename)
+
+    def abort(self) -> List[str]:
+        """The function discards the current shard, which may end in a partially written image after a failed \
+        write, and removes its temporary files. The next image starts a new shard.
+
+        Returns:
+            List[str]: The filenames of the images in the discarded shard.
+        """
+        if self._tar is None:
+            return []
+
+        for f in (self._tar, self._index_file):
+            try:
+                f.close()
+            except OSError:
+                # the buffered data that cannot be written is discarded anyway
+                pass
+
+        for path in (self._shard_path, self._index_path(self._shard_path)):
+            try:
+                os.remove(path + ".tmp")
+            except FileNotFoundError:
+                pass
+
+        self._tar = None
+        return self._filenames
+
+    def close(self) -> List[str]:
+        """The function completes the current shard.
+
+        Returns:
+            List[str]: The paths of all shards.
+        """
+        if self._tar is not None:
+            self._close_shard()
+
+        return self.shard_paths
+
+
+def read_shard_index(index_path: Union[str, Path]) -> List[ShardEntry]:
+    """The function reads the index of a shard written by ShardWriter.
+
+    Args:
+        index_path (Union[str, Path]): The path to the csv index next to the shard.
+
+    Returns:
+        List[ShardEntry]: The images of the shard in the order they were written.
+    """
+    with open(index_path, newline="") as f:
+        return [
+            ShardEntry(
+                row["filename"],
+                int(row["offset"]),
+                int(row["size"]),
+                int(row["timestamp"]),
+            )
+            for row in csv.DictReader(f)
+        ]
+
+
+class ShardedImageWriter:
+    """Writes the images decided to be kept into tar shards per camera, while the comparison still decides \
+    the later images.
+
+    An instance is a DecisionCallback like ImageFileOperations and has the same interface. Every camera has a \
+    ShardWriter, so the images of a camera are written in the order of their decisions into its shards. The \
+    cameras are written in parallel on a thread pool, one thread per camera at a time, which also reads the \
+    images, so a slow read does not block the comparison.
+    """
+
+    def __init__(
+        self,
+        data_path: Union[str, Path],
+        output_path: Union[str, Path],
+        max_shard_bytes: int = DEFAULT_SHARD_BYTES,
+        max_workers: int = None,
+    ):
+        """
+        Args:
+            data_path (Union[str, Path]): The data path to the folder or archive of the camera images.
+            output_path (Union[str, Path]): The path to the folder to write the shards to.
+            max_shard_bytes (int, optional): The max size of a shard in bytes. Defaults to DEFAULT_SHARD_BYTES.
+            max_workers (int, optional): The number of threads. Defaults to default_io_workers().
+        """
+        if max_workers is None:
+            max_workers = default_io_workers()
+
+        self.data_path = data_path
+        self.output_path = output_path
+        self.max_shard_bytes = max_shard_bytes
+        # the number of images handed to the writers
+        self.num_files = 0
+        self.errors: Dict[str, Exception] = dict()
+
+        self._writers: Dict[str, ShardWriter] = dict()
+        # the filenames every camera still has to write and the cameras that have a thread writing them
+        self._pending: Dict[str, Deque[str]] = dict()
+        self._running: Set[str] = set()
+        self._lock = threading.Lock()
+        self._futures: List[Future] = []
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def __call__(self, camera_id: str, filename: str, keep: bool) -> None:
+        """The function writes an image into the shards of its camera in the background, if it is kept.
+
+        Args:
+            camera_id (str): The camera id string (i.e. 'c21')
+            filename (str): The filename of the decided image.
+            keep (bool): If the image is kept.
+        """
+        if not keep:
+            return
+
+        self.num_files += 1
+        with self._lock:
+            self._pending.setdefault(camera_id, deque()).append(filename)
+            if camera_id in self._running:
+                return
+            self._running.add(camera_id)
+            if camera_id not in self._writers:
+                self._writers[camera_id] = ShardWriter(
+                    self.output_path, camera_id, self.max_shard_bytes
+                )
+
+        self._futures.append(self._executor.submit(self._write_camera, camera_id))
+
+    def _add_error(self, image_path: str, error: Exception) -> None:
+        logging.warning("Writing %s into a shard failed: %s", image_path, error)
+        with self._lock:
+            self.errors[image_path] = error
+
+    def _write_image(self, writer: ShardWriter, filename: str) -> None:
+        image_path = os.path.join(self.data_path, filename)
+        try:
+            data = read_file(image_path)
+            timestamp = parse_timestamp_ms(get_timestamp_from_filename(filename))
+        except Exception as e:
+            self._add_error(image_path, e)
+            return
+
+        try:
+            writer.add(filename, data, timestamp)
+        except Exception as e:
+            # the shard may end in a partially written image, the images written into it are lost with it
+            for lost_filename in writer.abort():
+                self._add_error(os.path.join(self.data_path, lost_filename), e)
+            self._add_error(image_path, e)
+
+    def _write_camera(self, camera_id: str) -> None:
+        # the thread writes the images of the camera until none is left
+        writer = self._writers[camera_id]
+        try:
+            while True:
+                with self._lock:
+                    if not self._pending[camera_id]:
+                        self._running.discard(camera_id)
+                        return
+                    filename = self._pending[camera_id].popleft()
+
+                self._write_image(writer, filename)
+        except BaseException:
+            # the next kept image of the camera starts a new thread
+            with self._lock:
+                self._running.discard(camera_id)
+            raise
+
+    @property
+    def shard_paths(self) -> List[str]:
+        """The paths of the completed shards of all cameras."""
+        return sorted(
+            path for writer in self._writers.values() for path in writer.shard_paths
+        )
+
+    def close(self) -> Dict[str, Exception]:
+        """The function waits until all kept images are written and completes the shards.
+
+        Returns:
+            Dict[str, Exception]: The error per path of all images that could not be written.
+        """
+        self._executor.shutdown(wait=True)
+        for future in self._futures:
+            future.result()
+
+        for writer in self._writers.values():
+            try:
+                writer.close()
+            except OSError as e:
+                for lost_filename in writer.abort():
+                    self._add_error(os.path.join(self.data_path, lost_filename), e)
+
+        return self.errors
+
+
+def shard_images_parallel(
+    keep_frames: Dict[str, Iterable[str]],
+    data_path: Union[str, Path],
+    output_path: Union[str, Path],
+    max_shard_bytes: int = DEFAULT_SHARD_BYTES,
+    max_workers: int = None,
+) -> Dict[str, Exception]:
+    """The function writes the images to keep into tar shards per camera, like copy_images_parallel copies them.
+
+    Args:
+        keep_frames (Dict[str, Iterable[str]]): A dictionary with the camera_id as key and a list of filenames \
+            from the images sorted by timestamp, which may be a lazy iterator like iter_manifest.
+        data_path (Union[str, Path]): The data path to the folder or archive of the camera images.
+        output_path (Union[str, Path]): The path to the folder to write the shards to.
+        max_shard_bytes (int, optional): The max size of a shard in bytes. Defaults to DEFAULT_SHARD_BYTES.
+        max_workers (int, optional): The number of threads. Defaults to default_io_workers().
+
+    Returns:
+        Dict[str, Exception]: The error per path of all images that could not be written.
+    """
+    writer = ShardedImageWriter(data_path, output_path, max_shard_bytes, max_workers)
+    for camera_id, filenames in keep_frames.items():
+        for filename in filenames:
+            writer(camera_id, filename, True)
+
+    return writer.close()
@@ -0,0 +1,267 @@
+import errno
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+import cv2
+import numpy as np
+
+from src.utils.archive import read_image
+from src.utils.handle_files import (
+    apply_score_threshold,
+    get_camera_mask,
+    get_chunk_size,
+    resize_frame_cached,
+    split_into_chunks,
+)
+from src.utils.kopernikus_func import (
+    contour_areas_change_detection,
+    draw_color_mask,
+    score_from_contour_areas,
+)
+
+# a sweep configuration of the scoring, (gaussian_blur_radius_list, min_contour_area)
+ScoreConfig = Tuple[Tuple[int, ...], Union[int, float]]
+
+
+def preprocess_image_for_blur_lists(
+    img: np.ndarray,
+    gaussian_blur_radius_lists: List[Tuple[int, ...]],
+    black_mask: Union[List[Union[float, int]], Tuple[Union[float, int]]],
+) -> Dict[Tuple[int, ...], np.ndarray]:
+    """The function preprocesses an image like preprocess_image_change_detection for several blur radius lists \
+    at once. The image is converted to grayscale once and blur stages are shared by all lists with the same \
+    prefix, i.e. (5, 11) and (5, 11, 21) only blur with the radii 5 and 11 once.
+
+    Args:
+        img (np.ndarray): An image read from cv2 in BGR format.
+        gaussian_blur_radius_lists (List[Tuple[int, ...]]): The lists with radii to be applied onto the image.
+        black_mask (List[float  |  int] | Tuple[float  |  int]): A black mask that is drawn onto the image.
+
+    Returns:
+        Dict[Tuple[int, ...], np.ndarray]: The preprocessed image for every blur radius list.
+    """
+    # blur stages by prefix of the radius lists
+    stages: Dict[Tuple[int, ...], np.ndarray] = {
+        (): cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    }
+
+    preprocessed: Dict[Tuple[int, ...], np.ndarray] = dict()
+    for radius_list in gaussian_blur_radius_lists:
+        for i in range(1, len(radius_list) + 1):
+            prefix = radius_list[:i]
+            if prefix not in stages:
+                radius = prefix[-1]
+                stages[prefix] = cv2.GaussianBlur(
+                    stages[prefix[:-1]], (radius, radius), 0
+                )
+
+        # the stages are shared, so the mask is drawn onto a copy
+        preprocessed[radius_list] = draw_color_mask(
+            stages[radius_list].copy(), black_mask
+        )
+
+    return preprocessed
+
+
+def sweep_pair_scores(
+    camera_id: str,
+    files: List[str],
+    data_path: Union[str, Path],
+    gaussian_blur_radius_lists: List[Tuple[int, ...]],
+    min_contour_areas: List[Union[int, float]],
+) -> Dict[ScoreConfig, List[float]]:
+    """The function computes the scores of all adjacent pairs of a camera for every combination of blur radius \
+    list and min contour area, while every image is read only once.
+
+    Args:
+        camera_id (str): The camera id string (i.e. 'c21')
+        files (List[str]): A list of image filenames from the camera sorted by timestamp.
+        data_path (Union[str, Path]): The data path to the folder for the camera images.
+        gaussian_blur_radius_lists (List[Tuple[int, ...]]): The lists with radii for gaussian blur.
+        min_contour_areas (List[Union[int, float]]): The min areas for contours to be considered.
+
+    Raises:
+        FileNotFoundError: If an image is not able to be read by cv2.imread() and returns None.
+
+    Returns:
+        Dict[ScoreConfig, List[float]]: The scores of the adjacent pairs for every \
+            (gaussian_blur_radius_list, min_contour_area).
+    """
+    scores: Dict[ScoreConfig, List[float]] = {
+        (radius_list, min_contour_area): []
+        for radius_list in gaussian_blur_radius_lists
+        for min_contour_area in min_contour_areas
+    }
+
+    if len(files) < 2:
+        return scores
+
+    mask = get_camera_mask(camera_id)
+
+    def load_frames(filename: str) -> Dict[Tuple[int, ...], np.ndarray]:
+        frame_path = os.path.join(data_path, filename)
+        frame = read_image(frame_path, cv2.IMREAD_COLOR)
+        if frame is None:
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), frame_path)
+
+        return preprocess_image_for_blur_lists(frame, gaussian_blur_radius_lists, mask)
+
+    next_frames = load_frames(files[0])
+    next_resized = {radius_list: dict() for radius_list in gaussian_blur_radius_lists}
+
+    for i in range(len(files) - 1):
+        prev_frames = next_frames
+        prev_resized = next_resized
+
+        next_frames = load_frames(files[i + 1])
+        next_resized = {
+            radius_list: dict() for radius_list in gaussian_blur_radius_lists
+        }
+
+        for radius_list in gaussian_blur_radius_lists:
+            prev_frame = prev_frames[radius_list]
+            next_frame = next_frames[radius_list]
+
+            # resize frames if shape is not the same (larger to smaller)
+            if prev_frame.shape != next_frame.shape:
+                if prev_frame.shape[0] > next_frame.shape[0]:
+                    prev_frame = resize_frame_cached(
+                        prev_frame, next_frame.shape[:2], prev_resized[radius_list]
+                    )
+                else:
+                    next_frame = resize_frame_cached(
+                        next_frame, prev_frame.shape[:2], next_resized[radius_list]
+                    )
+
+            # the contours only depend on the blur, the min contour area only filters them
+            contour_areas = contour_areas_change_detection(prev_frame, next_frame)
+            for min_contour_area in min_contour_areas:
+                scores[(radius_list, min_contour_area)].append(
+                    score_from_contour_areas(contour_areas, min_contour_area)
+                )
+
+    return scores
+
+
+def sweep_parameters(
+    files_by_camera_id: Dict[str, List[str]],
+    data_path: Union[str, Path],
+    gaussian_blur_radius_lists: List[Tuple[int, ...]],
+    min_contour_areas: List[Union[int, float]],
+    score_thresholds: List[int],
+    chunk_size: int = None,
+) -> List[Dict[str, Union[str, int, float]]]:
+    """The function counts the images to keep and to delete for every combination of blur radius list, \
+    min contour area and score threshold. Every image is read once for the whole sweep and the scores are \
+    computed once per blur radius list and min contour area, the thresholds only change the decisions.
+
+    Args:
+        files_by_camera_id (Dict[str, List[str]]): A dictionary with the camera_id as key and a list of filenames \
+            from the images.
+        data_path (Union[str, Path]): The data path to the folder for the camera images.
+        gaussian_blur_radius_lists (List[Tuple[int, ...]]): The lists with radii for gaussian blur.
+        min_contour_areas (List[Union[int, float]]): The min areas for contours to be considered.
+        score_thresholds (List[int]): The score thresholds for the comparison.
+        chunk_size (int, optional): The max number of pairs compared per job. Defaults to None, which splits \
+            the work into a few chunks per worker.
+
+    Returns:
+        List[Dict[str, Union[str, int, float]]]: One row per configuration and camera with the keys \
+            gaussian_blur_radius_list, min_contour_area, score_threshold, camera_id, keep and delete. \
+            The camera_id 'all' contains the sum over all cameras.
+    """
+    gaussian_blur_radius_lists = [
+        tuple(radius_list) for radius_list in gaussian_blur_radius_lists
+    ]
+
+    max_workers = os.cpu_count()
+    if chunk_size is None:
+        chunk_size = get_chunk_size(
+            {camera_id: len(files) for camera_id, files in files_by_camera_id.items()},
+            max_workers,
+        )
+
+    logging.info(
+        "Start parameter sweep over %d configurations.",
+        len(gaussian_blur_radius_lists)
+        * len(min_contour_areas)
+        * len(score_thresholds),
+    )
+
+    scores_by_camera_id: Dict[str, Dict[ScoreConfig, List[float]]] = dict()
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures_by_camera_id = dict()
+        for camera_id, files in files_by_camera_id.items():
+            futures_by_camera_id[camera_id] = [
+                executor.submit(
+                    sweep_pair_scores,
+                    camera_id,
+                    files[start:stop],
+                    data_path,
+                    gaussian_blur_radius_lists,
+                    min_contour_areas,
+                )
+                for start, stop in split_into_chunks(len(files), chunk_size)
+            ]
+
+        # stitch the chunks of each camera in order
+        for camera_id, futures in futures_by_camera_id.items():
+            scores: Dict[ScoreConfig, List[float]] = {
+                (radius_list, min_contour_area): []
+                for radius_list in gaussian_blur_radius_lists
+                for min_contour_area in min_contour_areas
+            }
+            for future in futures:
+                for config, chunk_scores in future.result().items():
+                    scores[config].extend(chunk_scores)
+
+            scores_by_camera_id[camera_id] = scores
+            logging.info(f"Camera {camera_id} sweep finished.")
+
+    rows: List[Dict[str, Union[str, int, float]]] = []
+    for radius_list in gaussian_blur_radius_lists:
+        for min_contour_area in min_contour_areas:
+            for score_threshold in score_thresholds:
+                total_keep = 0
+                total_delete = 0
+                for camera_id, files in files_by_camera_id.items():
+                    delete_images, keep_images = apply_score_threshold(
+                        camera_id,
+                        files,
+                        scores_by_camera_id[camera_id][(radius_list, min_contour_area)],
+                        score_threshold,
+                    )
+                    num_keep = len(keep_images.get(camera_id, []))
+                    num_delete = len(delete_images.get(camera_id, []))
+                    total_keep += num_keep
+                    total_delete += num_delete
+
+                    rows.append(
+                        {
+                            "gaussian_blur_radius_list": " ".join(
+                                map(str, radius_list)
+                            ),
+                            "min_contour_area": min_contour_area,
+                            "score_threshold": score_threshold,
+                            "camera_id": camera_id,
+                            "keep": num_keep,
+                            "delete": num_delete,
+                        }
+                    )
+
+                rows.append(
+                    {
+                        "gaussian_blur_radius_list": " ".join(map(str, radius_list)),
+                        "min_contour_area": min_contour_area,
+                        "score_threshold": score_threshold,
+                        "camera_id": "all",
+                        "keep": total_keep,
+                        "delete": total_delete,
+                    }
+                )
+
+    return rows
@@ -0,0 +1,146 @@
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+import cv2
+import numpy as np
+
+# the resolutions (width, height) and the timestamp format of the filenames of the cameras in the dataset
+CAMERA_PROFILES: Dict[str, Dict[str, Union[str, List[Tuple[int, int]]]]] = {
+    "c10": {"resolutions": [(640, 480), (1920, 1080)], "timestamp_format": "unix"},
+    "c20": {"resolutions": [(1920, 1080)], "timestamp_format": "unix"},
+    "c21": {"resolutions": [(1920, 1080)], "timestamp_format": "date"},
+    "c23": {"resolutions": [(1920, 1080)], "timestamp_format": "unix"},
+}
+
+# the timestamp of the first frame of every camera
+_START_TIME = datetime(2021, 3, 26, 17, 12, 40, tzinfo=timezone.utc)
+
+
+def synthetic_filename(
+    camera_id: str, timestamp: datetime, timestamp_format: str
+) -> str:
+    """The function creates a filename like the ones in the dataset.
+
+    Args:
+        camera_id (str): The camera id string (i.e. 'c21')
+        timestamp (datetime): The timestamp of the frame.
+        timestamp_format (str): 'unix' for a unix timestamp in milliseconds (i.e. c20-1616778760501.png) \
+            or 'date' for a date (i.e. c21_2021_03_27__10_36_36.png).
+
+    Raises:
+        ValueError: If the timestamp format is unknown.
+
+    Returns:
+        str: The filename.
+    """
+    if timestamp_format == "unix":
+        return f"{camera_id}-{int(timestamp.timestamp() * 1000)}.png"
+    if timestamp_format == "date":
+        return f"{camera_id}_{timestamp:%Y_%m_%d__%H_%M_%S}.png"
+
+    raise ValueError(f"Unknown timestamp format '{timestamp_format}'.")
+
+
+def _draw_scene(
+    background: np.ndarray, objects: List[Tuple[int, int, int, int]]
+) -> np.ndarray:
+    """The function draws white objects given as relative (x, y, width, height) in percent onto a background."""
+    h, w = background.shape[:2]
+    frame = background.copy()
+    for x, y, object_w, object_h in objects:
+        cv2.rectangle(
+            frame,
+            (x * w // 100, y * h // 100),
+            ((x + object_w) * w // 100, (y + object_h) * h // 100),
+            (255, 255, 255),
+            -1,
+        )
+    return frame
+
+
+def generate_camera_dataset(
+    data_path: Union[str, Path],
+    num_frames_per_camera: int = 100,
+    duplicate_ratio: float = 0.8,
+    camera_profiles: Dict[str, Dict[str, Union[str, List[Tuple[int, int]]]]] = None,
+    scale: float = 1.0,
+    seed: int = 0,
+) -> Dict[str, List[str]]:
+    """The function writes synthetic PNG sequences that look like the camera dataset.
+
+    Every camera has a static background. A frame is a duplicate of its predecessor with a probability of \
+    duplicate_ratio, which only adds new sensor noise, otherwise white objects are placed at new positions. \
+    Cameras with several resolutions change their resolution every few frames.
+
+    Args:
+        data_path (Union[str, Path]): The path to the folder to write the frames to.
+        num_frames_per_camera (int, optional): The number of frames per camera. Defaults to 100.
+        duplicate_ratio (float, optional): The probability of a frame to repeat the scene of its predecessor. \
+            Defaults to 0.8.
+        camera_profiles (Dict[str, Dict[str, Union[str, List[Tuple[int, int]]]]], optional): The resolutions \
+            and the timestamp format by camera id. Defaults to CAMERA_PROFILES.
+        scale (float, optional): A factor for all resolutions, i.e. 0.25 for a fast dataset. Defaults to 1.0.
+        seed (int, optional): The seed of the random generator. Defaults to 0.
+
+    Returns:
+        Dict[str, List[str]]: The filenames sorted by timestamp grouped by camera id.
+    """
+    if camera_profiles is None:
+        camera_profiles = CAMERA_PROFILES
+
+    os.makedirs(data_path, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    files_by_camera_id: Dict[str, List[str]] = dict()
+    for camera_id, profile in camera_profiles.items():
+        resolutions = [
+            (max(int(w * scale), 16), max(int(h * scale), 16))
+            for w, h in profile["resolutions"]
+        ]
+        backgrounds = dict()
+        for w, h in resolutions:
+            # a gray ground with a few darker structures, the same for all resolutions of the camera
+            background = np.full((h, w, 3), 90, dtype=np.uint8)
+            for x, y, object_w, object_h in [(10, 50, 25, 45), (60, 20, 15, 30)]:
+                cv2.rectangle(
+                    background,
+                    (x * w // 100, y * h // 100),
+                    ((x + object_w) * w // 100, (y + object_h) * h // 100),
+                    (40, 120, 60),
+                    -1,
+                )
+            backgrounds[(w, h)] = background
+
+        objects: List[Tuple[int, int, int, int]] = []
+        files: List[str] = []
+        for i in range(num_frames_per_camera):
+            resolution = resolutions[(i // 10) % len(resolutions)]
+
+            if i > 0 and rng.random() >= duplicate_ratio:
+                objects = [
+                    (
+                        int(rng.integers(5, 75)),
+                        int(rng.integers(20, 70)),
+                        int(rng.integers(10, 20)),
+                        int(rng.integers(10, 25)),
+                    )
+                    for _ in range(int(rng.integers(1, 3)))
+                ]
+
+            frame = _draw_scene(backgrounds[resolution], objects)
+            noise = rng.integers(0, 6, frame.shape, dtype=np.uint8)
+            frame = cv2.add(frame, noise)
+
+            filename = synthetic_filename(
+                camera_id,
+                _START_TIME + timedelta(seconds=2 * i),
+                profile["timestamp_format"],
+            )
+            cv2.imwrite(os.path.join(data_path, filename), frame)
+            files.append(filename)
+
+        files_by_camera_id[camera_id] = files
+
+    return files_by_camera_id
@@ -0,0 +1,354 @@
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from src.utils.handle_files import (
+    copy_images_parallel,
+    decide_frame,
+    load_preprocessed_frame,
+    remove_images,
+    scale_parameters_to_reduction,
+    score_frame_pair,
+)
+from src.utils.load_data import (
+    get_timestamp_from_filename,
+    parse_timestamp_ms,
+    scan_images,
+)
+from src.utils.preprocessing import CameraConfig, get_camera_settings
+
+
+class CameraState:
+    """The state of a camera between two ingests, which is all that is needed to continue the comparison."""
+
+    def __init__(
+        self,
+        watermark: int,
+        last_filename: Optional[str] = None,
+        last_frame: Optional[np.ndarray] = None,
+        prev_frame_same: bool = False,
+        watermark_filenames: Optional[Set[str]] = None,
+    ):
+        """
+        Args:
+            watermark (int): The timestamp in epoch milliseconds of the newest frame that has been processed.
+            last_filename (Optional[str], optional): The last frame, which waits for its successor to be decided. \
+                Defaults to None.
+            last_frame (Optional[np.ndarray], optional): The preprocessed last frame. Defaults to None.
+            prev_frame_same (bool, optional): The state of the keep/delete decisions. Defaults to False.
+            watermark_filenames (Optional[Set[str]], optional): The processed frames with the timestamp of the \
+                watermark, a frame with the same timestamp may arrive later. Defaults to None.
+        """
+        self.watermark = watermark
+        self.last_filename = last_filename
+        self.last_frame = last_frame
+        self.prev_frame_same = prev_frame_same
+        self.watermark_filenames = (
+            watermark_filenames if watermark_filenames is not None else set()
+        )
+
+    def is_processed(self, timestamp: int, filename: str) -> bool:
+        """The function checks if a frame is at or before the watermark and was processed.
+
+        Args:
+            timestamp (int): The timestamp of the frame in epoch milliseconds.
+            filename (str): The filename of the frame.
+
+        Returns:
+            bool: If the frame is older than the watermark or one of the frames at the watermark.
+        """
+        if timestamp == self.watermark:
+            return filename in self.watermark_filenames
+        return timestamp < self.watermark
+
+    def advance(self, timestamp: int, filename: str) -> None:
+        """The function moves the watermark to a processed frame.
+
+        Args:
+            timestamp (int): The timestamp of the frame in epoch milliseconds.
+            filename (str): The filename of the frame.
+        """
+        if timestamp != self.watermark:
+            self.watermark = timestamp
+            self.watermark_filenames = set()
+        self.watermark_filenames.add(filename)
+
+
+class IncrementalDeduplicator:
+    """Deduplicates a folder that frames are continuously added to.
+
+    The folder is scanned in intervals and only frames that are not older than the watermark of their camera \
+    and were not processed yet are compared. \
+    The last frame of every camera is kept preprocessed in memory, so a new frame is compared to it without \
+    reading it again, and its keep/delete decision is made as soon as its successor arrives. The decisions are \
+    the same as the batch comparison of all frames would make.
+    """
+
+    def __init__(
+        self,
+        data_path: Union[str, Path],
+        gaussian_blur_radius_list: Tuple[int] = (5, 11, 21),
+        min_contour_area: Union[int, float] = 500,
+        score_threshold: int = 100,
+        output_path: Union[str, Path] = None,
+        delete: bool = False,
+        copy_mode: str = "copy",
+        state_path: Union[str, Path] = None,
+        reduction_factor: int = 1,
+        settle_seconds: float = 2.0,
+        camera_config: CameraConfig = None,
+        scorer: str = "contours",
+    ):
+        """
+        Args:
+            data_path (Union[str, Path]): The data path to the folder the frames arrive in.
+            gaussian_blur_radius_list (Tuple[int], optional): A list with radii for gaussian blur. \
+                Defaults to (5, 11, 21).
+            min_contour_area (Union[int, float], optional): The min area for contours to be considered. \
+                Defaults to 500.
+            score_threshold (int, optional): The score threshold for the comparison. Defaults to 100.
+            output_path (Union[str, Path], optional): The path to copy the unique frames to, if delete is not \
+                set. Defaults to "./data/unique_images".
+            delete (bool, optional): Delete the frames that are not unique instead of copying the unique ones. \
+                Defaults to False.
+            copy_mode (str, optional): One of 'copy', 'hardlink' or 'reflink'. Defaults to "copy".
+            state_path (Union[str, Path], optional): The path to a folder to save the state of the cameras in, \
+                so that a restart continues where it stopped. Defaults to None.
+            reduction_factor (int, optional): The factor the images are reduced by while decoding. The blur \
+                radii, the min contour area and the score threshold are scaled to it. Defaults to 1.
+            settle_seconds (float, optional): Frames modified less than this many seconds ago may still be \
+                written and are picked up by a later scan. Defaults to 2.0.
+            camera_config (CameraConfig, optional): The mask and crop settings of the cameras. \
+                Defaults to None, which loads src/config/cameras.json.
+            scorer (str, optional): The name of the scorer, "contours" or "connected_components". \
+                Defaults to "contours".
+        """
+        self.data_path = data_path
+        self.gaussian_blur_radius_list, self.min_contour_area, self.score_threshold = (
+            scale_parameters_to_reduction(
+                gaussian_blur_radius_list,
+                min_contour_area,
+                score_threshold,
+                reduction_factor,
+            )
+        )
+        self.output_path = (
+            output_path
+            if output_path is not None
+            else os.path.join(".", "data", "unique_images")
+        )
+        self.delete = delete
+        self.copy_mode = copy_mode
+        self.state_path = state_path
+        self.reduction_factor = reduction_factor
+        self.settle_seconds = settle_seconds
+        self.camera_config = camera_config
+        self.scorer = scorer
+
+        self.states: Dict[str, CameraState] = dict()
+        if self.state_path is not None:
+            self.load_state()
+
+    def scan(self) -> Dict[str, List[str]]:
+        """The function lists the frames that are not older than the watermark of their camera and were not \
+        processed yet.
+
+        Returns:
+            Dict[str, List[str]]: The new filenames sorted by timestamp grouped by camera id.
+        """
+        now = time.time()
+        new_files: Dict[str, List[Tuple[int, bool, str]]] = dict()
+
+        for camera_id, timestamp, filename in scan_images(self.data_path):
+            state = self.states.get(camera_id)
+            if state is not None and state.is_processed(timestamp, filename):
+                continue
+
+            mtime = os.stat(os.path.join(self.data_path, filename)).st_mtime
+            settled = now - mtime >= self.settle_seconds
+            new_files.setdefault(camera_id, []).append((timestamp, settled, filename))
+
+        files_by_camera_id: Dict[str, List[str]] = dict()
+        for camera_id, files in new_files.items():
+            files.sort(key=lambda file: file[0])
+
+            # frames after one that is still written have to wait, the order of the comparison matters
+            settled_files = []
+            for _, settled, filename in files:
+                if not settled:
+                    break
+                settled_files.append(filename)
+
+            if settled_files:
+                files_by_camera_id[camera_id] = settled_files
+
+        return files_by_camera_id
+
+    def ingest(
+        self, files_by_camera_id: Dict[str, List[str]]
+    ) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
+        """The function compares new frames to the last frame of their camera and decides the frames that \
+        got a successor.
+
+        Args:
+            files_by_camera_id (Dict[str, List[str]]): The new filenames sorted by timestamp grouped by \
+                camera id, which were not processed yet and are not older than the watermark of their camera.
+
+        Returns:
+            Tuple[Dict[str, List[str]], Dict[str, List[str]]]: A tuple with two dictionaries. The first \
+                dictionary contains the filenames to delete and the second dictionary contains the filenames \
+                to keep grouped by camera id.
+        """
+        delete_images: Dict[str, List[str]] = dict()
+        keep_images: Dict[str, List[str]] = dict()
+
+        for camera_id, files in files_by_camera_id.items():
+            settings = get_camera_settings(camera_id, self.camera_config)
+
+            for filename in files:
+                timestamp = parse_timestamp_ms(get_timestamp_from_filename(filename))
+                state = self.states.setdefault(camera_id, CameraState(timestamp))
+                state.advance(timestamp, filename)
+
+                try:
+                    frame = load_preprocessed_frame(
+                        os.path.join(self.data_path, filename),
+                        self.gaussian_blur_radius_list,
+                        settings.mask,
+                        reduction_factor=self.reduction_factor,
+                        crop=settings.crop,
+                    )
+                except FileNotFoundError as e:
+                    logging.warning("Skipping frame %s: %s", filename, e)
+                    continue
+
+                if state.last_frame is not None:
+                    # the decision only needs to know if the score reaches the threshold
+                    score = score_frame_pair(
+                        state.last_frame,
+                        frame,
+                        self.min_contour_area,
+                        scorer=self.scorer,
+                        early_exit_score=self.score_threshold,
+                    )
+                    keep, state.prev_frame_same = decide_frame(
+                        score, self.score_threshold, state.prev_frame_same
+                    )
+
+                    decided_images = keep_images if keep else delete_images
+                    decided_images.setdefault(camera_id, []).append(state.last_filename)
+
+                state.last_filename = filename
+                state.last_frame = frame
+
+        return delete_images, keep_images
+
+    def poll(self) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
+        """The function scans the folder once, ingests the new frames and deletes or copies the decided frames.
+
+        Returns:
+            Tuple[Dict[str, List[str]], Dict[str, List[str]]]: The filenames to delete and to keep grouped by \
+                camera id that were decided in this poll.
+        """
+        delete_images, keep_images = self.ingest(self.scan())
+
+        if self.delete:
+            remove_images(delete_images, self.data_path)
+        else:
+            copy_images_parallel(
+                keep_images, self.data_path, self.output_path, copy_mode=self.copy_mode
+            )
+
+        num_keep = sum(len(files) for files in keep_images.values())
+        num_delete = sum(len(files) for files in delete_images.values())
+        if num_keep or num_delete:
+            logging.info(
+                "Ingested frames: %d to keep, %d to delete.", num_keep, num_delete
+            )
+
+        if self.state_path is not None:
+            self.save_state()
+
+        return delete_images, keep_images
+
+    def run(self, poll_interval: float = 5.0) -> None:
+        """The function polls the folder until it is interrupted.
+
+        Args:
+            poll_interval (float, optional): The seconds between two scans. Defaults to 5.0.
+        """
+        logging.info("Watching %s for new frames.", self.data_path)
+
+        try:
+            while True:
+                self.poll()
+                time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            logging.info("Stopped watching %s.", self.data_path)
+
+    def save_state(self) -> None:
+        """The function saves the state of all cameras to the state_path."""
+        os.makedirs(self.state_path, exist_ok=True)
+
+        states = dict()
+        frame_files = set()
+        for camera_id, state in self.states.items():
+            frame_file = None
+            if state.last_frame is not None:
+                # the frame is named after its image, so it is only written once
+                frame_file = f"{os.path.splitext(state.last_filename)[0]}.npy"
+                frame_files.add(frame_file)
+                if not os.path.exists(os.path.join(self.state_path, frame_file)):
+                    np.save(os.path.join(self.state_path, frame_file), state.last_frame)
+
+            states[camera_id] = {
+                "watermark": state.watermark,
+                "last_filename": state.last_filename,
+                "last_frame": frame_file,
+                "prev_frame_same": state.prev_frame_same,
+                "watermark_filenames": sorted(state.watermark_filenames),
+            }
+
+        # replace the state file at once, so that an interrupted save keeps the previous state
+        tmp_path = os.path.join(self.state_path, "state.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(states, f, indent=2)
+        os.replace(tmp_path, os.path.join(self.state_path, "state.json"))
+
+        # remove the frames of the previous state
+        for filename in os.listdir(self.state_path):
+            if filename.endswith(".npy") and filename not in frame_files:
+                os.remove(os.path.join(self.state_path, filename))
+
+    def load_state(self) -> None:
+        """The function loads the state of all cameras from the state_path, if it exists."""
+        state_file = os.path.join(self.state_path, "state.json")
+        if not os.path.exists(state_file):
+            return
+
+        with open(state_file) as f:
+            states = json.load(f)
+
+        for camera_id, state in states.items():
+            last_frame = None
+            if state["last_frame"] is not None:
+                last_frame = np.load(os.path.join(self.state_path, state["last_frame"]))
+
+            self.states[camera_id] = CameraState(
+                state["watermark"],
+                state["last_filename"],
+                last_frame,
+                state["prev_frame_same"],
+                # a state saved without them has processed its last frame at the watermark
+                set(state.get("watermark_filenames", [state["last_filename"]]))
+                - {None},
+            )
+
+        logging.info(
+            "Loaded the state of %d cameras from %s", len(self.states), self.state_path
+        )
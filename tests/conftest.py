@@ -0,0 +1,26 @@
+from typing import List
+
+import cv2
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def write_frames():
+    """Returns a function that writes a sequence of frames where a white box appears in the frames marked \
+    in changes and returns the filenames sorted by timestamp."""
+
+    def _write_frames(data_path, camera_id: str, changes: List[bool]) -> List[str]:
+        filenames = []
+        for i, changed in enumerate(changes):
+            frame = np.full((120, 160, 3), 90, dtype=np.uint8)
+            if changed:
+                cv2.rectangle(frame, (40, 60), (100, 110), (255, 255, 255), -1)
+
+            filename = f"{camera_id}-{1616778760501 + i * 1000}.png"
+            cv2.imwrite(str(data_path / filename), frame)
+            filenames.append(filename)
+
+        return filenames
+
+    return _write_frames
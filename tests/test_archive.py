@@ -0,0 +1,68 @@
+import tarfile
+import zipfile
+
+from src.utils.handle_files import ImageFileOperations, compare_images_parallel
+from src.utils.load_data import get_images_in_folder
+
+CHANGES = [False, True, True, False, False, True, False, True, True, True, False]
+
+
+def write_archives(tmp_path, write_frames):
+    """Writes the frames of two cameras into a folder, a tar and a zip archive, the members in a subfolder."""
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    files = write_frames(data_path, "c10", CHANGES) + write_frames(
+        data_path, "c20", CHANGES[::-1]
+    )
+
+    tar_path = tmp_path / "drop.tar"
+    with tarfile.open(tar_path, "w") as archive:
+        for filename in files:
+            archive.add(data_path / filename, arcname=f"drop/{filename}")
+
+    zip_path = tmp_path / "drop.zip"
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for filename in files[::-1]:
+            archive.write(data_path / filename, arcname=f"drop/{filename}")
+
+    return data_path, tar_path, zip_path
+
+
+def test_get_images_in_folder_from_archive(tmp_path, write_frames):
+    """Tests if the members of a tar and a zip are listed like the files of the extracted folder."""
+    data_path, tar_path, zip_path = write_archives(tmp_path, write_frames)
+    expected = get_images_in_folder(data_path)
+
+    assert get_images_in_folder(tar_path) == expected
+    assert get_images_in_folder(zip_path) == expected
+
+
+def test_compare_images_parallel_from_archive(tmp_path, write_frames):
+    """Tests if the images in an archive give the same decisions as the extracted images and the unique \
+    images are extracted."""
+    data_path, tar_path, zip_path = write_archives(tmp_path, write_frames)
+    files_by_camera_id = get_images_in_folder(data_path)
+    expected = compare_images_parallel(files_by_camera_id, data_path)
+
+    for archive_path in (tar_path, zip_path):
+        output_path = tmp_path / f"unique_{archive_path.suffix[1:]}"
+        file_operations = ImageFileOperations(
+            archive_path, unique_images_path=output_path
+        )
+
+        assert (
+            compare_images_parallel(
+                files_by_camera_id,
+                archive_path,
+                chunk_size=3,
+                on_decision=file_operations,
+            )
+            == expected
+        )
+        assert file_operations.close() == {}
+
+        kept = [f for filenames in expected[1].values() for f in filenames]
+        assert sorted(p.name for p in output_path.iterdir()) == sorted(kept)
+        assert all(
+            (output_path / f).read_bytes() == (data_path / f).read_bytes() for f in kept
+        )
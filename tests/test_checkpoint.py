@@ -0,0 +1,157 @@
+import os
+
+import pytest
+
+from src.utils.checkpoint import ComparisonCheckpoint
+from src.utils.handle_files import ImageFileOperations, compare_images_parallel
+from src.utils.load_data import get_images_in_folder
+
+CHANGES = [False, True, True, False, False, True, False, True, True, True, False]
+
+
+def test_compare_images_parallel_quarantines_unreadable_images(tmp_path, write_frames):
+    """Tests if unreadable images are skipped with the same decisions as without them, inside a chunk \
+    and at the edges of the chunks."""
+    expected_path = tmp_path / "expected"
+    expected_path.mkdir()
+    expected_files = write_frames(expected_path, "c20", CHANGES)
+
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    files = write_frames(data_path, "c20", CHANGES)
+    broken = [files[0], files[3], files[4], files[8]]
+    for filename in broken:
+        (data_path / filename).write_bytes(b"not a png")
+        (expected_path / filename).unlink()
+        expected_files.remove(filename)
+
+    expected = compare_images_parallel({"c20": expected_files}, expected_path)
+
+    for chunk_size in (1, 2, 3, 4):
+        quarantined_images = {}
+        assert (
+            compare_images_parallel(
+                {"c20": files},
+                data_path,
+                chunk_size=chunk_size,
+                quarantined_images=quarantined_images,
+            )
+            == expected
+        )
+        assert quarantined_images == {"c20": broken}
+
+
+def test_compare_images_parallel_resumes_from_checkpoint(tmp_path, write_frames):
+    """Tests if a run that crashed after a checkpoint continues with the same decisions and passes every \
+    decision to the callback, the restored ones included."""
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    files_by_camera_id = {
+        "c10": write_frames(data_path, "c10", CHANGES),
+        "c20": write_frames(data_path, "c20", CHANGES[::-1]),
+    }
+    expected = compare_images_parallel(files_by_camera_id, data_path)
+
+    def crash_after_four(camera_id, filename, keep):
+        if len(decided) == 4:
+            raise RuntimeError("crash")
+        decided.append(filename)
+
+    decided = []
+    checkpoint = ComparisonCheckpoint(tmp_path / "checkpoint", {}, interval_seconds=0)
+    with pytest.raises(RuntimeError):
+        compare_images_parallel(
+            files_by_camera_id,
+            data_path,
+            chunk_size=2,
+            on_decision=crash_after_four,
+            checkpoint=checkpoint,
+        )
+
+    redecided = []
+    checkpoint = ComparisonCheckpoint(tmp_path / "checkpoint", {}, resume=True)
+    assert (
+        compare_images_parallel(
+            files_by_camera_id,
+            data_path,
+            chunk_size=3,
+            on_decision=lambda camera_id, filename, keep: redecided.append(filename),
+            checkpoint=checkpoint,
+        )
+        == expected
+    )
+    assert sorted(redecided) == sorted(
+        f for files in files_by_camera_id.values() for f in files[:-1]
+    )
+
+
+@pytest.mark.parametrize("interval_seconds", [0, 60])
+def test_compare_images_parallel_resumes_deleting_images(
+    tmp_path, write_frames, interval_seconds
+):
+    """Tests if a run that deletes the images while it compares them can be resumed after a crash from the \
+    images that are left and keeps the same images as a run without a crash."""
+    for path in (tmp_path / "expected", tmp_path / "data"):
+        path.mkdir()
+        write_frames(path, "c10", CHANGES)
+        write_frames(path, "c20", CHANGES[::-1])
+
+    data_path = tmp_path / "data"
+    expected_path = tmp_path / "expected"
+    file_operations = ImageFileOperations(expected_path, delete=True)
+    expected = compare_images_parallel(
+        get_images_in_folder(expected_path),
+        expected_path,
+        on_decision=file_operations,
+    )
+    assert file_operations.close() == {}
+
+    def crash_after_three(camera_id, filename, keep):
+        if len(decided) == 3:
+            raise RuntimeError("crash")
+        decided.append(filename)
+        file_operations(camera_id, filename, keep)
+
+    decided = []
+    file_operations = ImageFileOperations(data_path, delete=True)
+    checkpoint = ComparisonCheckpoint(
+        tmp_path / "checkpoint", {}, interval_seconds=interval_seconds
+    )
+    with pytest.raises(RuntimeError):
+        compare_images_parallel(
+            get_images_in_folder(data_path),
+            data_path,
+            chunk_size=2,
+            on_decision=crash_after_three,
+            checkpoint=checkpoint,
+        )
+    assert file_operations.close() == {}
+
+    # the resumed run lists the images that were not deleted before the crash
+    file_operations = ImageFileOperations(data_path, delete=True, skip_done=True)
+    checkpoint = ComparisonCheckpoint(tmp_path / "checkpoint", {}, resume=True)
+    assert (
+        compare_images_parallel(
+            get_images_in_folder(data_path),
+            data_path,
+            chunk_size=3,
+            on_decision=file_operations,
+            checkpoint=checkpoint,
+        )
+        == expected
+    )
+    assert file_operations.close() == {}
+    assert sorted(os.listdir(data_path)) == sorted(os.listdir(expected_path))
+
+
+def test_comparison_checkpoint_rejects_other_parameters(tmp_path):
+    """Tests if a checkpoint cannot be resumed with other parameters and is discarded without resume."""
+    checkpoint = ComparisonCheckpoint(tmp_path, {"score_threshold": 100})
+    checkpoint.record_decision("c10", "c10-1616778760501.png", True)
+    checkpoint.close()
+
+    with pytest.raises(ValueError):
+        ComparisonCheckpoint(tmp_path, {"score_threshold": 250}, resume=True)
+
+    checkpoint = ComparisonCheckpoint(tmp_path, {"score_threshold": 250})
+    assert checkpoint.restored_decisions("c10") == []
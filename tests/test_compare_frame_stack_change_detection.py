@@ -0,0 +1,53 @@
+import cv2
+import numpy as np
+
+from src.utils.handle_files import compute_pair_scores
+from src.utils.kopernikus_func import (
+    compare_frame_stack_change_detection,
+    compare_frames_change_detection,
+)
+
+
+def test_compare_frame_stack_change_detection_matches_pairs():
+    """Tests if the scores of a stack are the same as comparing every pair on its own."""
+    rng = np.random.default_rng(0)
+    frames = np.full((6, 60, 80), 90, dtype=np.uint8)
+    frames[2, 10:40, 20:60] = 255
+    frames[3, 10:40, 20:60] = 255
+    frames[5, 30:35, 5:10] = 200
+    frames += rng.integers(0, 6, frames.shape, dtype=np.uint8)
+
+    for min_contour_area in (0, 30, 500):
+        expected = [
+            compare_frames_change_detection(frames[i], frames[i + 1], min_contour_area)[
+                0
+            ]
+            for i in range(len(frames) - 1)
+        ]
+        scores = compare_frame_stack_change_detection(frames, min_contour_area)
+
+        assert scores.tolist() == expected
+
+
+def test_compare_frame_stack_change_detection_with_single_frame():
+    """Tests if a stack with a single frame has no scores."""
+    assert (
+        compare_frame_stack_change_detection(np.zeros((1, 4, 4), np.uint8), 0).size == 0
+    )
+
+
+def test_compute_pair_scores_in_batches(tmp_path, write_frames):
+    """Tests if comparing stacks gives the same scores, also across a change of the resolution."""
+    files = write_frames(
+        tmp_path, "c10", [False, False, True, True, False, True, False]
+    )
+    cv2.imwrite(str(tmp_path / files[4]), np.full((240, 320, 3), 90, dtype=np.uint8))
+
+    expected = compute_pair_scores("c10", files, tmp_path, (5, 11, 21), 500)
+    for batch_size in (2, 3, 16):
+        assert (
+            compute_pair_scores(
+                "c10", files, tmp_path, (5, 11, 21), 500, batch_size=batch_size
+            )
+            == expected
+        )
@@ -0,0 +1,44 @@
+import cv2
+import numpy as np
+
+from src.utils.handle_files import compare_images_for_single_camera
+
+
+def test_compare_images_for_single_camera_reads_each_frame_once(
+    tmp_path, mocker, write_frames
+):
+    """Tests if every frame is only read from disk once."""
+    files = write_frames(tmp_path, "c20", [False, False, True, True, False])
+    mocked_imread = mocker.patch("cv2.imread", side_effect=cv2.imread)
+
+    compare_images_for_single_camera("c20", files, tmp_path, (5, 11, 21), 500, 100)
+
+    assert mocked_imread.call_count == len(files)
+
+
+def test_compare_images_for_single_camera_decisions(tmp_path, write_frames):
+    """Tests the keep and delete decisions for a sequence with one change."""
+    files = write_frames(tmp_path, "c20", [False, False, True, True, False])
+
+    delete_images, keep_images = compare_images_for_single_camera(
+        "c20", files, tmp_path, (5, 11, 21), 500, 100
+    )
+
+    assert delete_images == {"c20": [files[0], files[2], files[3]]}
+    assert keep_images == {"c20": [files[1]]}
+
+
+def test_compare_images_for_single_camera_with_different_resolutions(
+    tmp_path, write_frames
+):
+    """Tests if frames with a different resolution are resized before the comparison."""
+    files = write_frames(tmp_path, "c10", [False, False, False])
+    large_frame = np.full((240, 320, 3), 90, dtype=np.uint8)
+    cv2.imwrite(str(tmp_path / files[1]), large_frame)
+
+    delete_images, keep_images = compare_images_for_single_camera(
+        "c10", files, tmp_path, (5, 11, 21), 500, 100
+    )
+
+    assert delete_images == {"c10": files[:2]}
+    assert keep_images == {}
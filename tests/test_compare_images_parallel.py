@@ -0,0 +1,115 @@
+import os
+
+from src.utils.handle_files import (
+    FrameDecisions,
+    ImageFileOperations,
+    compare_images_for_single_camera,
+    compare_images_parallel,
+    split_into_chunks,
+)
+from src.utils.profiling import StageProfiler
+
+
+def test_split_into_chunks_overlap():
+    """Tests if the chunks overlap by one frame, so that every pair is part of exactly one chunk."""
+    assert split_into_chunks(7, 3) == [(0, 4), (3, 7)]
+    assert split_into_chunks(8, 3) == [(0, 4), (3, 7), (6, 8)]
+
+
+def test_split_into_chunks_with_single_file():
+    """Tests if a sequence without pairs results in no chunks."""
+    assert split_into_chunks(1, 3) == []
+    assert split_into_chunks(0, 3) == []
+
+
+def test_compare_images_parallel_matches_sequential(tmp_path, write_frames):
+    """Tests if splitting a camera into chunks gives the same result as the sequential comparison."""
+    changes = [False, True, True, False, False, True, False, True, True, True, False]
+    files = write_frames(tmp_path, "c20", changes)
+
+    expected = compare_images_for_single_camera(
+        "c20", files, tmp_path, (5, 11, 21), 500, 100
+    )
+
+    for chunk_size in (1, 2, 3, 4):
+        assert (
+            compare_images_parallel(
+                {"c20": files}, tmp_path, (5, 11, 21), 500, 100, chunk_size=chunk_size
+            )
+            == expected
+        )
+
+
+def test_frame_decisions_end_a_change_with_its_second_frame():
+    """Tests if a kept frame that differs from its successor makes the next differing frame the end of the change."""
+    decisions = FrameDecisions(100)
+
+    assert [decisions.decide(score) for score in (0, 500, 0, 500, 500, 0)] == [
+        False,
+        True,
+        False,
+        False,
+        True,
+        False,
+    ]
+    assert decisions.num_decided == 6
+
+
+def test_compare_images_parallel_streams_decisions(tmp_path, write_frames):
+    """Tests if every decision is passed to the callback in the order of the frames of its camera and the \
+    images are deleted while the comparison runs."""
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    files_by_camera_id = {
+        "c10": write_frames(data_path, "c10", [False, True, True, False, True]),
+        "c20": write_frames(data_path, "c20", [True, False, False, True]),
+    }
+
+    decisions = []
+    file_operations = ImageFileOperations(data_path, delete=True)
+
+    def on_decision(camera_id, filename, keep):
+        decisions.append((camera_id, filename, keep))
+        file_operations(camera_id, filename, keep)
+
+    delete_images, keep_images = compare_images_parallel(
+        files_by_camera_id, data_path, chunk_size=2, on_decision=on_decision
+    )
+    assert file_operations.close() == {}
+
+    for camera_id, files in files_by_camera_id.items():
+        camera_decisions = [d for d in decisions if d[0] == camera_id]
+        assert [filename for _, filename, _ in camera_decisions] == files[:-1]
+        assert [f for _, f, keep in camera_decisions if keep] == keep_images.get(
+            camera_id, []
+        )
+
+    deleted = [f for filenames in delete_images.values() for f in filenames]
+    assert sorted(os.listdir(data_path)) == sorted(
+        f for files in files_by_camera_id.values() for f in files if f not in deleted
+    )
+
+
+def test_compare_images_parallel_with_stride(tmp_path, write_frames):
+    """Tests if the stride gives the same decisions with fewer comparisons when every change lasts at least \
+    stride frames."""
+    changes = [False] * 12 + [True] * 8 + [False] * 8 + [True] * 9 + [False] * 10
+    files = write_frames(tmp_path, "c20", changes)
+
+    expected = compare_images_for_single_camera(
+        "c20", files, tmp_path, (5, 11, 21), 500, 100
+    )
+
+    for stride, chunk_size in ((4, None), (4, 7), (8, None)):
+        profiler = StageProfiler()
+        assert (
+            compare_images_parallel(
+                {"c20": files},
+                tmp_path,
+                chunk_size=chunk_size,
+                profiler=profiler,
+                stride=stride,
+            )
+            == expected
+        )
+        assert profiler.stats["compare"]["c20"]["calls"] < len(files) - 1
@@ -0,0 +1,131 @@
+from array import array
+
+from src.utils.handle_files import (
+    compare_images_for_single_camera,
+    compare_images_streaming,
+)
+from src.utils.load_data import get_images_in_folder
+from src.utils.manifest import (
+    DELETE_SUFFIX,
+    KEEP_SUFFIX,
+    QUARANTINE_SUFFIX,
+    IndexManifestWriter,
+    iter_manifest,
+    read_listing,
+    write_listing,
+)
+
+
+def test_write_listing_matches_get_images_in_folder(tmp_path, write_frames):
+    """Tests if the merged runs of the listing are sorted like get_images_in_folder."""
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    for camera_id in ("c10", "c20"):
+        write_frames(data_path, camera_id, [False] * 5)
+    (data_path / "c20-1616778750501.png").touch()
+
+    num_files_by_camera_id = write_listing(
+        data_path, tmp_path / "manifests", run_size=3
+    )
+
+    expected = get_images_in_folder(data_path)
+    assert num_files_by_camera_id == {"c10": 5, "c20": 6}
+    for camera_id, files in expected.items():
+        assert read_listing(tmp_path / "manifests", camera_id) == files
+        assert read_listing(tmp_path / "manifests", camera_id, 2, 4) == files[2:4]
+
+
+def test_iter_manifest_yields_indexed_filenames(tmp_path, write_frames):
+    """Tests if the filenames of the indices are read from the listing and a missing manifest is empty."""
+    files = write_frames(tmp_path, "c10", [False] * 6)
+    write_listing(tmp_path, tmp_path / "manifests")
+
+    with IndexManifestWriter(
+        tmp_path / "manifests", "c10", KEEP_SUFFIX, buffer_size=2
+    ) as manifest:
+        for index in (0, 3, 4):
+            manifest.append(index)
+
+    assert list(iter_manifest(tmp_path / "manifests", "c10", KEEP_SUFFIX)) == [
+        files[0],
+        files[3],
+        files[4],
+    ]
+    assert list(iter_manifest(tmp_path / "manifests", "c10", DELETE_SUFFIX)) == []
+
+
+def test_compare_images_streaming_matches_sequential(tmp_path, write_frames):
+    """Tests if the streamed decisions are the same as the sequential comparison."""
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    changes = [False, True, True, False, False, True, False, True, True, True, False]
+    files = write_frames(data_path, "c20", changes)
+
+    delete_images, keep_images = compare_images_for_single_camera(
+        "c20", files, data_path, (5, 11, 21), 500, 100
+    )
+
+    write_listing(data_path, tmp_path / "manifests")
+    for chunk_size in (1, 3):
+        counts = compare_images_streaming(
+            tmp_path / "manifests",
+            data_path,
+            (5, 11, 21),
+            500,
+            100,
+            chunk_size=chunk_size,
+        )
+
+        assert counts == {"c20": (len(keep_images["c20"]), len(delete_images["c20"]))}
+        assert (
+            list(iter_manifest(tmp_path / "manifests", "c20", KEEP_SUFFIX))
+            == keep_images["c20"]
+        )
+        assert (
+            list(iter_manifest(tmp_path / "manifests", "c20", DELETE_SUFFIX))
+            == delete_images["c20"]
+        )
+
+
+def test_compare_images_streaming_quarantines_chunk_edges_once(tmp_path, write_frames):
+    """Tests if unreadable images on the chunk edges are written to the quarantine manifest once and in order \
+    and the other images get the decisions of a comparison without them."""
+    changes = [False, True, True, False, False, True, False, True, True, True] * 2
+    expected_path = tmp_path / "expected"
+    expected_path.mkdir()
+    expected_files = write_frames(expected_path, "c20", changes[:16])
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    files = write_frames(data_path, "c20", changes[:16])
+
+    # the chunks of 5 pairs are (0, 6), (5, 11) and (10, 16)
+    broken = [files[5], files[10]]
+    for filename in broken:
+        (data_path / filename).write_bytes(b"not a png")
+        (expected_path / filename).unlink()
+        expected_files.remove(filename)
+
+    delete_images, keep_images = compare_images_for_single_camera(
+        "c20", expected_files, expected_path, (5, 11, 21), 500, 100
+    )
+
+    write_listing(data_path, tmp_path / "manifests")
+    compare_images_streaming(
+        tmp_path / "manifests", data_path, (5, 11, 21), 500, 100, chunk_size=5
+    )
+
+    # every index is written once, in ascending order
+    quarantine = array("q")
+    quarantine.frombytes((tmp_path / "manifests" / "c20.quarantine").read_bytes())
+    assert quarantine.tolist() == [5, 10]
+    assert (
+        list(iter_manifest(tmp_path / "manifests", "c20", QUARANTINE_SUFFIX)) == broken
+    )
+    assert (
+        list(iter_manifest(tmp_path / "manifests", "c20", KEEP_SUFFIX))
+        == keep_images["c20"]
+    )
+    assert (
+        list(iter_manifest(tmp_path / "manifests", "c20", DELETE_SUFFIX))
+        == delete_images["c20"]
+    )
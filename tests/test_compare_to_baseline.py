@@ -0,0 +1,44 @@
+from src.utils.benchmark import compare_to_baseline
+
+BASELINE = {
+    "compare": {
+        "frames_per_second": 100.0,
+        "bytes_per_second": 1000.0,
+        "peak_rss_bytes": 1000,
+    }
+}
+
+
+def test_compare_to_baseline_within_tolerance():
+    """Tests if changes within the tolerance are no regressions."""
+    results = {
+        "compare": {
+            "frames_per_second": 95.0,
+            "bytes_per_second": 950.0,
+            "peak_rss_bytes": 1050,
+        },
+        "copy": {
+            "frames_per_second": 1.0,
+            "bytes_per_second": 1.0,
+            "peak_rss_bytes": 1,
+        },
+    }
+
+    assert compare_to_baseline(results, BASELINE, tolerance=0.1) == []
+
+
+def test_compare_to_baseline_with_regressions():
+    """Tests if slower stages and more memory are reported."""
+    results = {
+        "compare": {
+            "frames_per_second": 50.0,
+            "bytes_per_second": 1000.0,
+            "peak_rss_bytes": 2000,
+        }
+    }
+
+    regressions = compare_to_baseline(results, BASELINE, tolerance=0.1)
+
+    assert len(regressions) == 2
+    assert regressions[0].startswith("compare frames_per_second")
+    assert regressions[1].startswith("compare peak_rss_bytes")
@@ -0,0 +1,83 @@
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.utils.frame_cache import FrameCache
+from src.utils.handle_files import compute_pair_scores
+
+
+def test_frame_cache_roundtrip(tmp_path):
+    """Tests if a stored frame is loaded memory-mapped from the cache."""
+    image_path = tmp_path / "c20-1616778760501.png"
+    image_path.write_bytes(b"not an image")
+    cache = FrameCache(tmp_path / "cache")
+
+    key = cache.key(image_path, (5, 11, 21), (0, 29, 0, 0))
+    assert cache.get(key) is None
+
+    frame = np.arange(12, dtype=np.uint8).reshape(3, 4)
+    cache.put(key, frame)
+
+    cached_frame = cache.get(key)
+    assert isinstance(cached_frame, np.memmap)
+    assert np.array_equal(cached_frame, frame)
+
+
+def test_frame_cache_key_changes(tmp_path):
+    """Tests if the key changes with the image and the preprocessing parameters."""
+    image_path = tmp_path / "c20-1616778760501.png"
+    image_path.write_bytes(b"not an image")
+    cache = FrameCache(tmp_path / "cache")
+
+    key = cache.key(image_path, (5, 11, 21), (0, 29, 0, 0))
+    assert key == cache.key(image_path, [5, 11, 21], [0, 29, 0, 0])
+    assert key != cache.key(image_path, (5, 11), (0, 29, 0, 0))
+    assert key != cache.key(image_path, (5, 11, 21), (0, 0, 0, 0))
+
+    image_path.write_bytes(b"another image")
+    assert key != cache.key(image_path, (5, 11, 21), (0, 29, 0, 0))
+
+
+def test_frame_cache_evicts_least_recently_used(tmp_path):
+    """Tests if the least recently used entries are evicted first."""
+    frame = np.zeros((10, 10), dtype=np.uint8)
+    cache = FrameCache(tmp_path / "cache", max_bytes=10 * frame.nbytes)
+
+    for i, key in enumerate(["a1", "b2", "c3"]):
+        cache.put(key, frame)
+        os.utime(cache._entry_path(key), ns=(i, i))
+
+    # an entry uses more than frame.nbytes because of the .npy header
+    cache.max_bytes = 2 * os.path.getsize(cache._entry_path("a1"))
+    cache.evict()
+
+    assert cache.get("a1") is None
+    assert cache.get("b2") is not None
+    assert cache.get("c3") is not None
+
+
+def test_frame_cache_counts_written_bytes_of_all_threads(tmp_path):
+    """Tests if the bytes written by concurrent threads are all counted and a pickled cache works."""
+    frame = np.zeros((10, 10), dtype=np.uint8)
+    cache = pickle.loads(pickle.dumps(FrameCache(tmp_path / "cache")))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda i: cache.put(f"{i:04d}", frame), range(200)))
+
+    assert cache._written_bytes == 200 * frame.nbytes
+
+
+def test_compute_pair_scores_skips_decode_with_cache(tmp_path, mocker, write_frames):
+    """Tests if a second run with a cache does not decode the images again."""
+    files = write_frames(tmp_path, "c20", [False, True, False])
+    cache = FrameCache(tmp_path / "cache")
+
+    scores = compute_pair_scores("c20", files, tmp_path, (5, 11, 21), 500, cache)
+
+    mocked_imread = mocker.patch("cv2.imread")
+    assert (
+        compute_pair_scores("c20", files, tmp_path, (5, 11, 21), 500, cache) == scores
+    )
+    mocked_imread.assert_not_called()
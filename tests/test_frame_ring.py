@@ -0,0 +1,119 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.utils.frame_ring import SharedFrameRing, shared_memory_prefetch
+from src.utils.handle_files import compare_images_parallel
+
+
+def make_frame(i: int):
+    """Returns a frame whose size and values depend on i and no frame for every fifth i."""
+    if i % 5 == 4:
+        return None
+    return np.full((4 + i % 3, 6), i, dtype=np.uint8)
+
+
+def fail_at_three(i: int):
+    if i == 3:
+        raise FileNotFoundError(i)
+    return make_frame(i)
+
+
+def decoding_pid(i: int):
+    """Returns a frame with i in the first row and the id of the process that made it in the second row."""
+    frame = np.zeros((2, 8), dtype=np.uint8)
+    frame[0] = i
+    frame[1] = np.frombuffer(os.getpid().to_bytes(8, "little"), dtype=np.uint8)
+    return frame
+
+
+def test_shared_memory_prefetch_keeps_the_order_and_the_previous_frame():
+    """Tests if the frames are yielded in order and the previous frame with data stays valid, also when the \
+    frames without data in between are skipped."""
+    for num_workers, depth in ((1, 1), (2, 4), (3, 8)):
+        prev_frame, prev_i = None, None
+        for i, frame in enumerate(
+            shared_memory_prefetch(
+                make_frame, [(i,) for i in range(30)], num_workers, 6 * 6, depth=depth
+            )
+        ):
+            expected = make_frame(i)
+            if expected is None:
+                assert frame is None
+                continue
+
+            np.testing.assert_array_equal(frame, expected)
+            if prev_frame is not None:
+                np.testing.assert_array_equal(prev_frame, make_frame(prev_i))
+            prev_frame, prev_i = frame, i
+
+
+def test_shared_memory_prefetch_falls_back_to_the_consumer():
+    """Tests if frames that do not fit into a slot are computed by the consumer and errors are raised at the \
+    failed call."""
+    results = shared_memory_prefetch(make_frame, [(i,) for i in range(10)], 2, 4 * 6)
+    for i, frame in enumerate(results):
+        if make_frame(i) is not None:
+            np.testing.assert_array_equal(frame, make_frame(i))
+
+    results = shared_memory_prefetch(fail_at_three, [(i,) for i in range(10)], 2, 36)
+    assert [next(results).shape for _ in range(3)] == [(4, 6), (5, 6), (6, 6)]
+    with pytest.raises(FileNotFoundError):
+        next(results)
+    results.close()
+
+
+def test_compare_images_parallel_with_decode_workers(tmp_path, write_frames):
+    """Tests if decoding the frames on other processes gives the same decisions and quarantines the same \
+    unreadable images."""
+    files = write_frames(
+        tmp_path, "c20", [False, True, True, False, False, True, False, True, False]
+    )
+    for filename in (files[0], files[4]):
+        (tmp_path / filename).write_bytes(b"not a png")
+
+    expected_quarantined = {}
+    expected = compare_images_parallel(
+        {"c20": files}, tmp_path, quarantined_images=expected_quarantined
+    )
+
+    for chunk_size in (None, 3):
+        quarantined_images = {}
+        assert (
+            compare_images_parallel(
+                {"c20": files},
+                tmp_path,
+                chunk_size=chunk_size,
+                quarantined_images=quarantined_images,
+                decode_workers=2,
+            )
+            == expected
+        )
+        assert quarantined_images == expected_quarantined
+
+
+def test_shared_memory_prefetch_sizes_the_slots_by_the_first_frame():
+    """Tests if only the first frame is decoded by the consumer, if the size of the frames is unknown."""
+    pids = []
+    for i, frame in enumerate(
+        shared_memory_prefetch(decoding_pid, [(i,) for i in range(10)], 2, 0)
+    ):
+        assert (frame[0] == i).all()
+        pids.append(int.from_bytes(frame[1].tobytes(), "little"))
+
+    assert len(pids) == 10
+    assert pids[0] == os.getpid()
+    assert os.getpid() not in pids[1:]
+
+
+def test_shared_frame_ring_rejects_frames_out_of_order():
+    """Tests if reading a frame of a writer before its previous frame raises an error."""
+    ring = SharedFrameRing(1, 2, 24)
+    try:
+        ring.put(0, make_frame(0))
+        ring.put(1, make_frame(1))
+        with pytest.raises(RuntimeError):
+            ring.get(1, timeout=1)
+    finally:
+        ring.close()
@@ -0,0 +1,32 @@
+import cv2
+import numpy as np
+
+from src.utils.load_data import get_images_in_folder
+from src.utils.synthetic_data import generate_camera_dataset
+
+
+def test_generate_camera_dataset_is_sorted_like_the_dataset(tmp_path):
+    """Tests if the generated filenames of both timestamp formats are sorted like get_images_in_folder sorts."""
+    files_by_camera_id = generate_camera_dataset(tmp_path, 12, scale=0.05)
+
+    assert files_by_camera_id == get_images_in_folder(tmp_path)
+    assert files_by_camera_id["c20"][0].startswith("c20-")
+    assert files_by_camera_id["c21"][0].startswith("c21_")
+
+
+def test_generate_camera_dataset_duplicate_ratio(tmp_path):
+    """Tests if a duplicate ratio of 1 only adds noise to the first scene and 0 changes every scene."""
+
+    def max_mean_abs_diff(data_path, files):
+        frames = [
+            cv2.imread(str(data_path / filename)).astype(np.int16) for filename in files
+        ]
+        return max(np.mean(np.abs(frame - frames[0])) for frame in frames[1:])
+
+    only_duplicates = generate_camera_dataset(
+        tmp_path / "duplicates", 5, 1.0, scale=0.1
+    )
+    no_duplicates = generate_camera_dataset(tmp_path / "unique", 5, 0.0, scale=0.1)
+
+    assert max_mean_abs_diff(tmp_path / "duplicates", only_duplicates["c20"]) < 5
+    assert max_mean_abs_diff(tmp_path / "unique", no_duplicates["c20"]) > 5
@@ -25,3 +25,30 @@ def test_get_images_in_folder_with_empty_dir(tmp_path):
 
     with pytest.raises(ValueError):
         get_images_in_folder(data_path)
+
+
+def test_get_images_in_folder_skips_other_files(tmp_path):
+    """Tests if directories, files with other extensions and filenames without a timestamp are skipped."""
+    (tmp_path / "c20-1616778760501.png").touch()
+    (tmp_path / "c20-1616778760502.PNG").touch()
+    (tmp_path / "c20-1616778760503.txt").touch()
+    (tmp_path / "c20-notatimestamp.png").touch()
+    (tmp_path / "c21-1616778760501.png").mkdir()
+
+    assert get_images_in_folder(tmp_path) == {
+        "c20": ["c20-1616778760501.png", "c20-1616778760502.PNG"]
+    }
+
+
+def test_get_images_in_folder_with_both_formats(tmp_path):
+    """Tests if unix timestamps and dates of a camera are sorted together, the dates in UTC."""
+    filenames = [
+        "c21_2021_03_26__17_12_39.png",
+        "c21-1616778760501.png",
+        "c21_2021_03_26__17_12_41.png",
+        "c21-1616778762000.png",
+    ]
+    for filename in reversed(filenames):
+        (tmp_path / filename).touch()
+
+    assert get_images_in_folder(tmp_path) == {"c21": filenames}
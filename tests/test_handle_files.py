@@ -1,40 +1,114 @@
-from src.utils.handle_files import copy_images, remove_images
+import errno
+import os
 
+import pytest
+
+from src.utils.file_ops import FileOperationStage, copy_file
+from src.utils.handle_files import copy_images, copy_images_parallel, remove_images
 
-def test_remove_images(mocker):
-    """Tests the removal of images from a folder."""
 
-    # create fake os.path.join and subprocess.run
-    mocker.patch("os.path.join", return_value="mocked_path")
-    mocked_subprocess_run = mocker.patch("subprocess.run")
+def test_remove_images(tmp_path):
+    """Tests the removal of images from a folder."""
 
     # create test data
+    for filename in ["image1.jpg", "image2.jpg", "image3.jpg"]:
+        (tmp_path / filename).write_bytes(b"image")
     delete_images = {"camera1": ["image1.jpg", "image2.jpg"]}
-    data_path = "/fake/data_path"
 
-    remove_images(delete_images, data_path)
+    errors = remove_images(delete_images, tmp_path)
 
-    assert mocked_subprocess_run.call_count == 2
-    mocked_subprocess_run.assert_any_call(["rm", "mocked_path"], check=True)
+    assert errors == {}
+    assert os.listdir(tmp_path) == ["image3.jpg"]
 
 
-def test_copy_images(mocker):
-    """Tests the copying of images to a new folder."""
+def test_remove_images_reports_errors(tmp_path):
+    """Tests if a missing image is reported and does not stop the removal of the others."""
+    (tmp_path / "image1.jpg").write_bytes(b"image")
+    delete_images = {"camera1": ["missing.jpg", "image1.jpg"]}
+
+    errors = remove_images(delete_images, tmp_path)
+
+    assert list(errors) == [os.path.join(tmp_path, "missing.jpg")]
+    assert isinstance(errors[os.path.join(tmp_path, "missing.jpg")], FileNotFoundError)
+    assert os.listdir(tmp_path) == []
+
 
-    # create fake os.path.join, os.makedirs, and subprocess.run
-    mocker.patch("os.path.join", return_value="mocked_path")
-    mocker.patch("os.makedirs")
-    mocked_subprocess_run = mocker.patch("subprocess.run")
+def test_copy_images(tmp_path):
+    """Tests the copying of images to a new folder."""
 
     # create test data
+    data_path = tmp_path / "data"
+    data_path.mkdir()
     filenames = ["unique_image1.jpg", "unique_image2.jpg"]
-    data_path = "/fake/data_path"
-    unique_images_path = "/fake/unique_images_path"
+    for filename in filenames:
+        (data_path / filename).write_bytes(filename.encode() * 1000)
+    unique_images_path = tmp_path / "unique_images"
 
-    copy_images(filenames, data_path, unique_images_path)
+    errors = copy_images(filenames, data_path, unique_images_path)
 
     # Assertions
-    assert mocked_subprocess_run.call_count == len(filenames)
-    mocked_subprocess_run.assert_any_call(
-        ["cp", "mocked_path", "mocked_path"], check=True
+    assert errors == {}
+    for filename in filenames:
+        assert (unique_images_path / filename).read_bytes() == filename.encode() * 1000
+
+
+def test_copy_images_parallel_with_hardlinks(tmp_path):
+    """Tests if hardlinked images share the data with the source."""
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    (data_path / "c20-1.png").write_bytes(b"image")
+    (data_path / "c21-1.png").write_bytes(b"image")
+    unique_images_path = tmp_path / "unique_images"
+
+    errors = copy_images_parallel(
+        {"c20": ["c20-1.png"], "c21": ["c21-1.png"]},
+        data_path,
+        unique_images_path,
+        copy_mode="hardlink",
     )
+
+    assert errors == {}
+    for filename in ["c20-1.png", "c21-1.png"]:
+        assert os.path.samefile(data_path / filename, unique_images_path / filename)
+
+
+def test_copy_file_with_reflink(tmp_path):
+    """Tests if the data is copied if the filesystem does not support reflinks."""
+    (tmp_path / "src.png").write_bytes(b"image")
+
+    copy_file(tmp_path / "src.png", tmp_path / "dst.png", mode="reflink")
+
+    assert (tmp_path / "dst.png").read_bytes() == b"image"
+
+
+def test_copy_file_with_failed_reflink(tmp_path, mocker):
+    """Tests if a clone that fails with an unexpected error leaves no empty file behind."""
+    (tmp_path / "src.png").write_bytes(b"image")
+    mocker.patch(
+        "src.utils.file_ops.fcntl.ioctl",
+        side_effect=OSError(errno.EIO, os.strerror(errno.EIO)),
+    )
+
+    with pytest.raises(OSError):
+        copy_file(tmp_path / "src.png", tmp_path / "dst.png", mode="reflink")
+
+    assert not (tmp_path / "dst.png").exists()
+
+
+def test_copy_file_with_unknown_mode(tmp_path):
+    """Tests if the function raises ValueError for an unknown copy mode."""
+    with pytest.raises(ValueError):
+        copy_file(tmp_path / "src.png", tmp_path / "dst.png", mode="symlink")
+
+
+def test_file_operation_stage_reports_errors(tmp_path):
+    """Tests if the stage runs the operation for every submitted file and reports the failed ones."""
+    (tmp_path / "image1.jpg").write_bytes(b"image")
+
+    stage = FileOperationStage(os.remove, max_workers=2)
+    stage.submit(str(tmp_path / "image1.jpg"))
+    stage.submit(str(tmp_path / "missing.jpg"))
+    errors = stage.close()
+
+    assert list(errors) == [str(tmp_path / "missing.jpg")]
+    assert os.listdir(tmp_path) == []
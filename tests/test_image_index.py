@@ -0,0 +1,51 @@
+import cv2
+import numpy as np
+import pytest
+
+from src.utils.image_index import index_images, read_png_header
+
+
+def _write_image(path, width, height):
+    cv2.imwrite(str(path), np.full((height, width, 3), 90, dtype=np.uint8))
+
+
+def test_read_png_header(tmp_path):
+    """Tests if the dimensions are read from the header and truncated or foreign files are rejected."""
+    _write_image(tmp_path / "c10-1616778760501.png", 160, 120)
+    header = read_png_header(tmp_path / "c10-1616778760501.png")
+
+    assert (header.width, header.height) == (160, 120)
+    assert header.file_size == (tmp_path / "c10-1616778760501.png").stat().st_size
+
+    data = (tmp_path / "c10-1616778760501.png").read_bytes()
+    (tmp_path / "truncated.png").write_bytes(data[:-20])
+    (tmp_path / "jpeg.png").write_bytes(b"\xff\xd8\xff\xe0" + data[4:])
+
+    for filename in ("truncated.png", "jpeg.png"):
+        with pytest.raises(ValueError):
+            read_png_header(tmp_path / filename)
+
+
+def test_index_images_with_segments(tmp_path):
+    """Tests if invalid and too small images are sorted out and the dimension segments are found."""
+    sizes = [(160, 120), (160, 120), (200, 150), (160, 120), (40, 30), (160, 120)]
+    files = []
+    for i, (width, height) in enumerate(sizes):
+        files.append(f"c10-{1616778760501 + i * 1000}.png")
+        _write_image(tmp_path / files[-1], width, height)
+    files.append("c10-1616778769501.png")
+    (tmp_path / files[-1]).write_bytes(b"not a png")
+
+    index_by_camera_id, invalid = index_images(
+        tmp_path, {"c10": files}, min_size=(64, 48)
+    )
+    index = index_by_camera_id["c10"]
+
+    assert invalid == {"c10": [files[4], files[6]]}
+    assert index.filenames == files[:4] + files[5:6]
+    assert index.dimensions() == {(160, 120): 4, (200, 150): 1}
+    assert index.segments() == [
+        (0, 2, (160, 120)),
+        (2, 3, (200, 150)),
+        (3, 5, (160, 120)),
+    ]
@@ -0,0 +1,96 @@
+import shutil
+
+from src.utils.handle_files import compare_images_for_single_camera
+from src.utils.watch import IncrementalDeduplicator
+
+
+def test_incremental_deduplicator_matches_batch_decisions(tmp_path, write_frames):
+    """Tests if frames ingested over several polls get the same decisions as the batch comparison."""
+    changes = [False, False, True, True, False, False, True, False]
+    files = write_frames(tmp_path, "c20", changes)
+    batch_delete, batch_keep = compare_images_for_single_camera(
+        "c20", files, tmp_path, (5, 11, 21), 500, 100
+    )
+
+    deduplicator = IncrementalDeduplicator(tmp_path, settle_seconds=0)
+    delete_images, keep_images = {"c20": []}, {"c20": []}
+    for start, stop in [(0, 3), (3, 4), (4, 8)]:
+        new_delete, new_keep = deduplicator.ingest({"c20": files[start:stop]})
+        delete_images["c20"] += new_delete.get("c20", [])
+        keep_images["c20"] += new_keep.get("c20", [])
+
+    assert delete_images == {"c20": batch_delete.get("c20", [])}
+    assert keep_images == {"c20": batch_keep.get("c20", [])}
+
+
+def test_incremental_deduplicator_scan_skips_processed_frames(tmp_path, write_frames):
+    """Tests if a scan only lists the frames newer than the last ingested frame."""
+    files = write_frames(tmp_path, "c21", [False, True, False])
+    deduplicator = IncrementalDeduplicator(tmp_path, settle_seconds=0)
+
+    assert deduplicator.scan() == {"c21": files}
+    deduplicator.ingest({"c21": files[:2]})
+    assert deduplicator.scan() == {"c21": files[2:]}
+
+
+def test_incremental_deduplicator_scan_finds_late_frames_at_the_watermark(
+    tmp_path, write_frames
+):
+    """Tests if a frame with the timestamp of the last ingested frame that arrives later is still ingested, \
+    also after a restart, but only once."""
+    frames_path = tmp_path / "frames"
+    frames_path.mkdir()
+    frames = write_frames(frames_path, "c21", [False, True, False])
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    files = ["c21-1616778760000.png", "c21-1616778761000.png"]
+    for frame, filename in zip(frames, files):
+        shutil.copy(frames_path / frame, data_path / filename)
+
+    deduplicator = IncrementalDeduplicator(
+        data_path,
+        output_path=tmp_path / "unique_images",
+        state_path=tmp_path / "state",
+        settle_seconds=0,
+    )
+    deduplicator.poll()
+    assert deduplicator.scan() == {}
+
+    # the same second as the last frame, in the other naming scheme
+    late_file = "c21_2021_03_26__17_12_41.png"
+    shutil.copy(frames_path / frames[2], data_path / late_file)
+    restarted = IncrementalDeduplicator(
+        data_path, state_path=tmp_path / "state", settle_seconds=0
+    )
+    assert restarted.scan() == {"c21": [late_file]}
+    delete_images, keep_images = restarted.ingest(restarted.scan())
+    assert delete_images.get("c21", []) + keep_images.get("c21", []) == [files[1]]
+    assert restarted.scan() == {}
+
+
+def test_incremental_deduplicator_restores_state(tmp_path, write_frames):
+    """Tests if a restarted deduplicator continues with the saved state."""
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    files = write_frames(data_path, "c20", [False, False, True, True, False])
+    batch_delete, batch_keep = compare_images_for_single_camera(
+        "c20", files, data_path, (5, 11, 21), 500, 100
+    )
+
+    deduplicator = IncrementalDeduplicator(
+        data_path, state_path=tmp_path / "state", settle_seconds=0
+    )
+    first_delete, first_keep = deduplicator.ingest({"c20": files[:3]})
+    deduplicator.save_state()
+
+    restarted = IncrementalDeduplicator(
+        data_path, state_path=tmp_path / "state", settle_seconds=0
+    )
+    assert restarted.scan() == {"c20": files[3:]}
+    second_delete, second_keep = restarted.ingest(restarted.scan())
+
+    assert (
+        first_delete.get("c20", []) + second_delete.get("c20", [])
+        == batch_delete["c20"]
+    )
+    assert first_keep.get("c20", []) + second_keep.get("c20", []) == batch_keep["c20"]
@@ -0,0 +1,89 @@
+import random
+
+import cv2
+import numpy as np
+
+from src.utils.kopernikus_func import hamming_distance
+from src.utils.near_duplicates import (
+    BKTree,
+    NearDuplicateIndex,
+    filter_near_duplicates,
+    image_signature,
+)
+
+
+def test_bk_tree_search_matches_brute_force():
+    """Tests if the tree finds the same hashes within the distance as comparing all of them."""
+    rng = random.Random(0)
+    hashes = [rng.getrandbits(64) for _ in range(500)]
+    # near copies of the first hashes
+    hashes += [h ^ (1 << rng.randrange(64)) for h in hashes[:50]]
+
+    tree = BKTree()
+    for i, h in enumerate(hashes):
+        tree.add(h, str(i))
+
+    for query in hashes[:20] + [rng.getrandbits(64) for _ in range(20)]:
+        expected = sorted(
+            (hamming_distance(query, h), str(i))
+            for i, h in enumerate(hashes)
+            if hamming_distance(query, h) <= 3
+        )
+        assert tree.search(query, 3) == expected
+
+    assert len(tree) == len(hashes)
+
+
+def _write_scene(path, scene: int):
+    """Writes a coarse random pattern, which is the same for the same scene."""
+    pattern = np.random.default_rng(scene).integers(0, 255, (12, 16, 3), dtype=np.uint8)
+    cv2.imwrite(
+        str(path), cv2.resize(pattern, (320, 240), interpolation=cv2.INTER_NEAREST)
+    )
+
+
+def test_filter_near_duplicates_finds_returning_scenes(tmp_path):
+    """Tests if a kept image that returns to an earlier scene is deleted and the saved signatures are used \
+    by the next run."""
+    files = []
+    for i, scene in enumerate([0, 1, 2, 0, 1]):
+        files.append(f"c10-{1616778760501 + i * 1000}.png")
+        _write_scene(tmp_path / files[-1], scene)
+
+    delete_images = {"c10": []}
+    keep_images = {"c10": list(files)}
+    index = NearDuplicateIndex(max_distance=2)
+
+    near_duplicates = filter_near_duplicates(
+        delete_images, keep_images, tmp_path, index
+    )
+
+    assert near_duplicates == {"c10": {files[3]: files[0], files[4]: files[1]}}
+    assert keep_images == {"c10": files[:3]}
+    assert delete_images == {"c10": files[3:]}
+
+    index.save(tmp_path / "signatures.npz")
+    loaded = NearDuplicateIndex.load(tmp_path / "signatures.npz", max_distance=2)
+    assert len(loaded) == 3
+
+    new_file = "c10-1616778770501.png"
+    _write_scene(tmp_path / new_file, 2)
+    keep_images = {"c10": files[:3] + [new_file]}
+    filter_near_duplicates({}, keep_images, tmp_path, loaded)
+
+    assert keep_images == {"c10": files[:3]}
+
+
+def test_image_signature_of_unreadable_images(tmp_path, mocker):
+    """Tests if a missing, a corrupt and an image OpenCV fails on have no signature instead of an error."""
+    (tmp_path / "c10-1616778760501.png").write_bytes(b"not a png")
+    _write_scene(tmp_path / "c10-1616778761501.png", 0)
+
+    assert image_signature(tmp_path / "c10-1616778759501.png", "c10") is None
+    assert image_signature(tmp_path / "c10-1616778760501.png", "c10") is None
+
+    mocker.patch(
+        "src.utils.near_duplicates.load_preprocessed_frame",
+        side_effect=cv2.error("corrupt"),
+    )
+    assert image_signature(tmp_path / "c10-1616778761501.png", "c10") is None
@@ -0,0 +1,32 @@
+import pytest
+
+from src.utils.load_data import parse_timestamp_ms
+
+
+def test_parse_timestamp_ms_with_timestamp():
+    """Tests if a unix timestamp in milliseconds is returned as it is."""
+    assert parse_timestamp_ms("1616778760501") == 1616778760501
+
+
+def test_parse_timestamp_ms_with_custom_format():
+    """Tests if a date is converted to epoch milliseconds in UTC."""
+    assert parse_timestamp_ms("2021_03_26__17_12_40") == 1616778760000
+    assert parse_timestamp_ms("2024_02_29__00_00_00") == 1709164800000
+
+
+@pytest.mark.parametrize(
+    "timestamp_str",
+    [
+        "",
+        "invalid_date_string",
+        "-1616778760501",
+        "2021_02_29__00_00_00",
+        "2021_13_01__00_00_00",
+        "2021_03_26__24_00_00",
+        "2021-03-26__17_12_40",
+    ],
+)
+def test_parse_timestamp_ms_with_invalid_string(timestamp_str):
+    """Tests if strings in neither format raise a ValueError."""
+    with pytest.raises(ValueError):
+        parse_timestamp_ms(timestamp_str)
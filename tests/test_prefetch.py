@@ -0,0 +1,53 @@
+import threading
+
+import pytest
+
+from src.utils.handle_files import compute_pair_scores
+from src.utils.prefetch import prefetch
+
+
+def test_prefetch_keeps_the_order():
+    """Tests if the results are yielded in the order of the arguments."""
+    assert list(prefetch(lambda x: x * 2, ((i,) for i in range(20)), depth=3)) == [
+        i * 2 for i in range(20)
+    ]
+
+
+def test_prefetch_is_bounded():
+    """Tests if no more than depth calls are started ahead of the consumer."""
+    started = []
+    lock = threading.Lock()
+
+    def record(i):
+        with lock:
+            started.append(i)
+        return i
+
+    results = prefetch(record, ((i,) for i in range(100)), depth=4)
+    assert next(results) == 0
+    results.close()
+
+    assert len(started) <= 5
+
+
+def test_prefetch_raises_at_the_failed_call():
+    """Tests if an exception is raised when the result of the failed call is reached."""
+
+    def fail_at_three(i):
+        if i == 3:
+            raise FileNotFoundError(i)
+        return i
+
+    results = prefetch(fail_at_three, ((i,) for i in range(10)), depth=4)
+    assert [next(results) for _ in range(3)] == [0, 1, 2]
+    with pytest.raises(FileNotFoundError):
+        next(results)
+
+
+def test_compute_pair_scores_with_read_ahead(tmp_path, write_frames):
+    """Tests if reading ahead gives the same scores as reading every frame when it is compared."""
+    files = write_frames(tmp_path, "c20", [False, True, True, False, False, True])
+
+    assert compute_pair_scores(
+        "c20", files, tmp_path, (5, 11, 21), 500, read_ahead=2
+    ) == compute_pair_scores("c20", files, tmp_path, (5, 11, 21), 500)
@@ -0,0 +1,50 @@
+import numpy as np
+
+from src.utils.handle_files import compare_images_parallel
+from src.utils.kopernikus_func import difference_hash, hamming_distance
+from src.utils.prefilter import PrefilterCascade
+
+
+def test_difference_hash():
+    """Tests if the hash has a bit for every pixel that is brighter than its right neighbour."""
+    gradient = np.tile(np.arange(9, dtype=np.uint8) * 20, (8, 1))
+
+    assert difference_hash(gradient) == 2**64 - 1
+    assert difference_hash(gradient[:, ::-1].copy()) == 0
+    assert hamming_distance(2**64 - 1, 0) == 64
+
+
+def test_prefilter_cascade_settles_obvious_pairs():
+    """Tests if identical and clearly different pairs are settled and ambiguous pairs are not."""
+    prefilter = PrefilterCascade(identical_mean_abs_diff=1, different_mean_abs_diff=50)
+    dark = prefilter.signature(np.full((64, 64), 10, dtype=np.uint8))
+    gray = prefilter.signature(np.full((64, 64), 30, dtype=np.uint8))
+    bright = prefilter.signature(np.full((64, 64), 200, dtype=np.uint8))
+
+    assert prefilter.settle(dark, dark) == 0
+    assert prefilter.settle(dark, bright) == float("inf")
+    assert prefilter.settle(dark, gray) is None
+    assert prefilter.counts["thumbnail_identical"] == 1
+    assert prefilter.counts["thumbnail_different"] == 1
+    assert prefilter.counts["contours"] == 1
+
+
+def test_compare_images_parallel_with_prefilter(tmp_path, write_frames):
+    """Tests if the prefilter keeps the decisions and counts the pairs of all workers."""
+    files = write_frames(tmp_path, "c20", [False, False, True, True, False, False])
+    expected = compare_images_parallel({"c20": files}, tmp_path, (5, 11, 21), 500, 100)
+
+    prefilter = PrefilterCascade(identical_mean_abs_diff=0.5)
+    result = compare_images_parallel(
+        {"c20": files},
+        tmp_path,
+        (5, 11, 21),
+        500,
+        100,
+        chunk_size=2,
+        prefilter=prefilter,
+    )
+
+    assert result == expected
+    assert prefilter.counts["thumbnail_identical"] == 3
+    assert prefilter.counts["contours"] == 2
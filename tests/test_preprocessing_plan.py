@@ -0,0 +1,92 @@
+import json
+
+import numpy as np
+import pytest
+
+from src.utils.handle_files import compute_pair_scores, get_camera_mask
+from src.utils.kopernikus_func import draw_color_mask, preprocess_image_change_detection
+from src.utils.preprocessing import (
+    MAX_PLANS,
+    PreprocessingPlan,
+    _compile_plan,
+    get_camera_settings,
+    get_preprocessing_plan,
+    load_camera_config,
+    unmasked_region,
+)
+
+
+@pytest.mark.parametrize("black_mask", [(0, 0, 0, 0), (0, 29, 0, 0), (5, 10, 5, 3)])
+def test_unmasked_region_matches_draw_color_mask(black_mask):
+    """Tests if the region is exactly the part of the image draw_color_mask leaves untouched."""
+    img = np.full((97, 131), 255, dtype=np.uint8)
+    y_start, y_stop, x_start, x_stop = unmasked_region(img.shape, black_mask)
+
+    expected = np.zeros_like(img)
+    expected[y_start:y_stop, x_start:x_stop] = 255
+
+    assert np.array_equal(draw_color_mask(img, black_mask), expected)
+
+
+@pytest.mark.parametrize("shape", [(90, 120, 3), (90, 120)])
+def test_preprocessing_plan_matches_preprocess_image_change_detection(shape):
+    """Tests if the plan gives the same frames for BGR and GRAY images, also when the buffers are reused."""
+    rng = np.random.default_rng(0)
+    plan = PreprocessingPlan(shape, (5, 11, 21), (0, 29, 0, 0))
+
+    for _ in range(3):
+        img = rng.integers(0, 256, shape, dtype=np.uint8)
+        expected = preprocess_image_change_detection(img, (5, 11, 21), (0, 29, 0, 0))
+
+        assert np.array_equal(plan.apply(img), expected)
+
+
+def test_preprocessing_plan_with_crop():
+    """Tests if crop cuts off the masked rows."""
+    plan = PreprocessingPlan((100, 120, 3), (5,), (0, 29, 0, 0), crop=True)
+
+    assert plan.apply(np.zeros((100, 120, 3), np.uint8)).shape == (70, 119)
+
+
+def test_get_preprocessing_plan_is_cached_and_bounded():
+    """Tests if equal settings share a plan and the number of plans of a process is bounded."""
+    plan = get_preprocessing_plan((120, 160), [5, 11], [0, 29, 0, 0])
+    assert get_preprocessing_plan((120, 160), (5, 11), (0, 29, 0, 0)) is plan
+
+    for width in range(MAX_PLANS + 10):
+        get_preprocessing_plan((120, width + 1), (5,), (0, 0, 0, 0))
+
+    assert _compile_plan.cache_info().currsize == MAX_PLANS
+
+
+def test_load_camera_config(tmp_path):
+    """Tests if cameras that are not listed get the default settings."""
+    config_path = tmp_path / "cameras.json"
+    config_path.write_text(
+        json.dumps(
+            {
+                "default": {"mask": [0, 0, 0, 0]},
+                "cameras": {"c20": {"mask": [0, 40, 0, 0], "crop": True}},
+            }
+        )
+    )
+    camera_config = load_camera_config(config_path)
+
+    assert get_camera_settings("c20", camera_config) == ((0, 40, 0, 0), True)
+    assert get_camera_settings("c99", camera_config) == ((0, 0, 0, 0), False)
+    assert get_camera_mask("c21") == (0, 30, 0, 0)
+
+
+def test_compute_pair_scores_with_crop(tmp_path, write_frames):
+    """Tests if a change below the cropped rows is still found."""
+    files = write_frames(tmp_path, "c20", [False, True, False])
+    camera_config = {
+        "default": get_camera_settings("c10"),
+        "c20": get_camera_settings("c20")._replace(crop=True),
+    }
+
+    scores = compute_pair_scores(
+        "c20", files, tmp_path, (5, 11, 21), 500, camera_config=camera_config
+    )
+
+    assert scores[0] > 500 and scores[1] > 500
@@ -0,0 +1,86 @@
+import cv2
+import numpy as np
+import pytest
+
+from src.utils.handle_files import (
+    compare_images_parallel,
+    count_decision_differences,
+    scale_parameters_to_reduction,
+)
+
+
+def test_scale_parameters_to_reduction():
+    """Tests if the radii stay odd and the min contour area and the score threshold are scaled with the square \
+    of the factor."""
+    assert scale_parameters_to_reduction((5, 11, 21), 500, 100, 1) == (
+        (5, 11, 21),
+        500,
+        100,
+    )
+    assert scale_parameters_to_reduction((5, 11, 21), 500, 100, 2) == (
+        (3, 5, 11),
+        125,
+        25,
+    )
+    assert scale_parameters_to_reduction((5, 11, 21), 500, 100, 8) == (
+        (1, 1, 3),
+        7.8125,
+        1.5625,
+    )
+    assert scale_parameters_to_reduction(None, None, None, 4) == (None, None, None)
+
+
+def test_compare_images_parallel_with_reduction_factor_4(tmp_path):
+    """Tests if a factor of 4 keeps the same images as the full resolution, with boxes of several sizes whose \
+    reduced scores are all below the unscaled score threshold."""
+    box_sizes = [0, 0, 80, 80, 0, 20, 20, 0, 60, 0, 0, 30, 0]
+    files = []
+    for i, box_size in enumerate(box_sizes):
+        frame = np.full((240, 320, 3), 90, dtype=np.uint8)
+        if box_size:
+            cv2.rectangle(
+                frame, (100, 60), (100 + box_size, 60 + box_size), (255, 255, 255), -1
+            )
+
+        filename = f"c20-{1616778760501 + i * 1000}.png"
+        cv2.imwrite(str(tmp_path / filename), frame)
+        files.append(filename)
+
+    full_resolution = compare_images_parallel(
+        {"c20": files}, tmp_path, (5, 11, 21), 100, 2500
+    )
+    reduced = compare_images_parallel(
+        {"c20": files}, tmp_path, (5, 11, 21), 100, 2500, reduction_factor=4
+    )
+
+    # the large boxes are kept, the small ones are not
+    assert full_resolution[1]["c20"] == [files[1], files[7]]
+    assert count_decision_differences(full_resolution, reduced) == {"c20": (12, 0)}
+
+
+def test_compare_images_parallel_with_reduction_factor(tmp_path, write_frames):
+    """Tests if the reduced resolution finds the same changes as the full resolution."""
+    files = write_frames(tmp_path, "c20", [False, True, True, False, False, True])
+
+    full_resolution = compare_images_parallel(
+        {"c20": files}, tmp_path, (5, 11, 21), 500, 100
+    )
+    reduced = compare_images_parallel(
+        {"c20": files}, tmp_path, (5, 11, 21), 500, 100, reduction_factor=2
+    )
+
+    assert count_decision_differences(full_resolution, reduced) == {"c20": (5, 0)}
+
+
+def test_compare_images_parallel_with_invalid_reduction_factor(tmp_path):
+    """Tests if the function raises ValueError for a factor OpenCV cannot decode with."""
+    with pytest.raises(ValueError):
+        compare_images_parallel({}, tmp_path, reduction_factor=3)
+
+
+def test_count_decision_differences():
+    """Tests if a frame that moved from keep to delete is counted once."""
+    reference = ({"c20": ["a", "b"]}, {"c20": ["c"]})
+    candidate = ({"c20": ["a"]}, {"c20": ["b", "c"]})
+
+    assert count_decision_differences(reference, candidate) == {"c20": (3, 1)}
@@ -0,0 +1,66 @@
+import numpy as np
+
+from src.utils.kopernikus_func import (
+    compare_frames_change_detection,
+    score_frames_change_detection,
+)
+
+
+def _changed_frames():
+    """Returns two frames that differ in three regions of different size."""
+    prev_frame = np.full((120, 160), 90, dtype=np.uint8)
+    next_frame = prev_frame.copy()
+    next_frame[10:50, 20:80] = 255
+    next_frame[70:110, 100:150] = 200
+    next_frame[60:63, 5:8] = 180
+
+    return prev_frame, next_frame
+
+
+def test_score_frames_change_detection_matches_contours():
+    """Tests if the score is the same as the score of compare_frames_change_detection."""
+    prev_frame, next_frame = _changed_frames()
+
+    for min_contour_area in (0, 30, 500, 5000):
+        expected = compare_frames_change_detection(
+            prev_frame, next_frame, min_contour_area
+        )[0]
+
+        assert (
+            score_frames_change_detection(prev_frame, next_frame, min_contour_area)
+            == expected
+        )
+
+
+def test_score_frames_change_detection_with_early_exit():
+    """Tests if the early exit keeps the score on the same side of the threshold."""
+    prev_frame, next_frame = _changed_frames()
+    expected = compare_frames_change_detection(prev_frame, next_frame, 0)[0]
+
+    for score_threshold in (1, 100, expected, expected + 1):
+        score = score_frames_change_detection(
+            prev_frame, next_frame, 0, score_threshold=score_threshold
+        )
+
+        assert score <= expected
+        assert (score >= score_threshold) == (expected >= score_threshold)
+
+
+def test_score_frames_change_detection_with_connected_components():
+    """Tests if the components are filtered by their pixel count and unchanged frames score 0."""
+    prev_frame, next_frame = _changed_frames()
+
+    all_components = score_frames_change_detection(
+        prev_frame, next_frame, 0, scorer="connected_components"
+    )
+    large_components = score_frames_change_detection(
+        prev_frame, next_frame, 500, scorer="connected_components"
+    )
+
+    assert all_components > large_components > 0
+    assert (
+        score_frames_change_detection(
+            prev_frame, prev_frame, 0, scorer="connected_components"
+        )
+        == 0
+    )
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from src.utils.handle_files import compare_images_from_scores, compare_images_parallel
+from src.utils.score_store import load_scores, save_scores
+
+
+def test_save_and_load_scores(tmp_path):
+    """Tests if the saved filenames and scores are loaded again."""
+    files = ["c20-1616778760501.png", "c20-1616778761501.png", "c20-1616778762501.png"]
+    save_scores(tmp_path, "c20", files, [0.0, 1337.5], (5, 11, 21), 500)
+
+    files_by_camera_id, scores_by_camera_id = load_scores(tmp_path)
+
+    assert files_by_camera_id == {"c20": files}
+    assert scores_by_camera_id["c20"].dtype == np.float32
+    assert scores_by_camera_id["c20"].tolist() == [0.0, 1337.5]
+
+
+def test_save_scores_with_wrong_number_of_scores(tmp_path):
+    """Tests if the function raises ValueError if the scores do not match the pairs."""
+    with pytest.raises(ValueError):
+        save_scores(tmp_path, "c20", ["c20-1616778760501.png"], [0.0])
+
+
+def test_load_scores_with_empty_dir(tmp_path):
+    """Tests if the function raises ValueError if given an empty directory."""
+    with pytest.raises(ValueError):
+        load_scores(tmp_path)
+
+
+def test_compare_images_from_scores_matches_comparison(tmp_path, write_frames):
+    """Tests if applying a threshold to the saved scores gives the same result as the comparison."""
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    files = write_frames(data_path, "c20", [False, True, True, False, True, False])
+    scores_path = tmp_path / "scores"
+
+    for score_threshold in (100, 10**6):
+        expected = compare_images_parallel(
+            {"c20": files},
+            data_path,
+            (5, 11, 21),
+            500,
+            score_threshold,
+            scores_path=scores_path,
+        )
+        assert compare_images_from_scores(scores_path, score_threshold) == expected
@@ -0,0 +1,106 @@
+import errno
+import os
+import tarfile
+
+from src.utils.handle_files import compare_images_parallel
+from src.utils.shards import ShardedImageWriter, ShardWriter, read_shard_index
+
+
+def test_shard_writer_splits_by_size_and_indexes_the_images(tmp_path):
+    """Tests if the shards stay below the max size, are valid tars and the index points at the data."""
+    images = {
+        f"c10-{1616778760501 + i * 1000}.png": os.urandom(100 + i * 300)
+        for i in range(12)
+    }
+
+    writer = ShardWriter(tmp_path, "c10", max_shard_bytes=8 * 1024)
+    for i, (filename, data) in enumerate(images.items()):
+        writer.add(filename, data, 1616778760501 + i * 1000)
+    shard_paths = writer.close()
+
+    assert len(shard_paths) > 1
+    # no temporary file is left
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        os.path.basename(path[:-4]) + extension
+        for path in shard_paths
+        for extension in (".tar", ".csv")
+    )
+
+    written = []
+    for shard_path in shard_paths:
+        assert os.path.getsize(shard_path) <= 8 * 1024
+        with tarfile.open(shard_path) as shard:
+            members = [info.name for info in shard]
+
+        entries = read_shard_index(shard_path[:-4] + ".csv")
+        assert [entry.filename for entry in entries] == members
+        with open(shard_path, "rb") as f:
+            for entry in entries:
+                f.seek(entry.offset)
+                assert f.read(entry.size) == images[entry.filename]
+        written.extend(entries)
+
+    assert [entry.filename for entry in written] == list(images)
+    assert [entry.timestamp for entry in written] == [
+        1616778760501 + i * 1000 for i in range(12)
+    ]
+
+
+def test_compare_images_parallel_writes_shards(tmp_path, write_frames):
+    """Tests if the kept images of every camera are written into its shards in the order of their timestamps."""
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    files_by_camera_id = {
+        "c10": write_frames(data_path, "c10", [False, True, True, False, True]),
+        "c20": write_frames(data_path, "c20", [True, False, False, True, True]),
+    }
+
+    file_operations = ShardedImageWriter(data_path, tmp_path / "shards")
+    _, keep_images = compare_images_parallel(
+        files_by_camera_id, data_path, chunk_size=2, on_decision=file_operations
+    )
+    assert file_operations.close() == {}
+
+    for camera_id, kept in keep_images.items():
+        entries = read_shard_index(tmp_path / "shards" / f"{camera_id}-000000.csv")
+        assert [entry.filename for entry in entries] == kept
+        with tarfile.open(tmp_path / "shards" / f"{camera_id}-000000.tar") as shard:
+            assert all(
+                shard.extractfile(entry.filename).read()
+                == (data_path / entry.filename).read_bytes()
+                for entry in entries
+            )
+
+
+def test_sharded_image_writer_discards_a_failed_shard(tmp_path, mocker, write_frames):
+    """Tests if an image that cannot be read is reported and a failed write discards the shard with its \
+    images and temporary files, while the later images go into a new shard."""
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    files = write_frames(data_path, "c10", [False] * 7)
+    (data_path / files[1]).unlink()
+
+    add = ShardWriter.add
+
+    def fail_at_four(writer, filename, data, timestamp):
+        if filename == files[4]:
+            writer._tar.write(data[:10])
+            raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC))
+        add(writer, filename, data, timestamp)
+
+    mocker.patch.object(ShardWriter, "add", fail_at_four)
+
+    file_operations = ShardedImageWriter(data_path, tmp_path / "shards")
+    for filename in files:
+        file_operations("c10", filename, True)
+    errors = file_operations.close()
+
+    assert sorted(errors) == [
+        os.path.join(data_path, filename) for filename in files[:5]
+    ]
+    assert sorted(os.listdir(tmp_path / "shards")) == [
+        "c10-000000.csv",
+        "c10-000000.tar",
+    ]
+    entries = read_shard_index(tmp_path / "shards" / "c10-000000.csv")
+    assert [entry.filename for entry in entries] == files[5:]
@@ -0,0 +1,39 @@
+import os
+
+from src.utils.handle_files import compare_images_parallel
+from src.utils.profiling import StageProfiler, profile_stage
+
+
+def test_stage_profiler_merges_worker_stats(tmp_path, write_frames):
+    """Tests if the stats recorded in the worker processes are merged per stage and camera."""
+    files_by_camera_id = {
+        "c20": write_frames(tmp_path, "c20", [False, True, True, False]),
+        "c21": write_frames(tmp_path, "c21", [False, False, True]),
+    }
+    profiler = StageProfiler()
+
+    compare_images_parallel(
+        files_by_camera_id, tmp_path, chunk_size=100, profiler=profiler
+    )
+
+    for camera_id, files in files_by_camera_id.items():
+        assert profiler.stats["imread"][camera_id]["calls"] == len(files)
+        assert profiler.stats["imread"][camera_id]["bytes"] == sum(
+            os.path.getsize(tmp_path / filename) for filename in files
+        )
+        assert profiler.stats["preprocess"][camera_id]["calls"] == len(files)
+        assert profiler.stats["compare"][camera_id]["calls"] == len(files) - 1
+
+
+def test_profile_stage_without_profiler():
+    """Tests if no stats are recorded without a profiler and the stats add up with one."""
+    with profile_stage(None, "imread", "c20"):
+        pass
+
+    profiler = StageProfiler()
+    with profile_stage(profiler, "copy", "all", calls=3, num_bytes=10):
+        pass
+    profiler.merge(profiler.stats)
+
+    assert profiler.stats["copy"]["all"]["calls"] == 6
+    assert profiler.stats["copy"]["all"]["bytes"] == 20
@@ -0,0 +1,50 @@
+import cv2
+import numpy as np
+
+from src.utils.handle_files import compare_images_parallel
+from src.utils.kopernikus_func import preprocess_image_change_detection
+from src.utils.sweep import preprocess_image_for_blur_lists, sweep_parameters
+
+
+def test_preprocess_image_for_blur_lists_matches_single_list():
+    """Tests if the shared blur stages give the same images as preprocessing every list on its own."""
+    rng = np.random.default_rng(0)
+    img = rng.integers(0, 256, (60, 80, 3), dtype=np.uint8)
+    radius_lists = [(5, 11, 21), (5, 11), (3,), ()]
+
+    preprocessed = preprocess_image_for_blur_lists(img, radius_lists, (0, 29, 0, 0))
+
+    for radius_list in radius_lists:
+        expected = preprocess_image_change_detection(img, radius_list, (0, 29, 0, 0))
+        assert np.array_equal(preprocessed[radius_list], expected)
+
+
+def test_sweep_parameters_matches_comparison(tmp_path, write_frames):
+    """Tests if the counts of the sweep are the same as the ones of single comparisons."""
+    files = write_frames(
+        tmp_path, "c20", [False, True, True, False, True, False, False]
+    )
+    # a smaller change, which is only detected with a low min contour area
+    small_change = np.full((120, 160, 3), 90, dtype=np.uint8)
+    cv2.rectangle(small_change, (40, 60), (55, 75), (255, 255, 255), -1)
+    cv2.imwrite(str(tmp_path / files[5]), small_change)
+
+    rows = sweep_parameters(
+        {"c20": files}, tmp_path, [(5, 11, 21), (5, 11)], [100, 500], [100, 600]
+    )
+
+    assert len(rows) == 2 * 2 * 2 * 2
+    for row in rows:
+        if row["camera_id"] != "c20":
+            continue
+
+        radius_list = tuple(int(r) for r in row["gaussian_blur_radius_list"].split())
+        delete_images, keep_images = compare_images_parallel(
+            {"c20": files},
+            tmp_path,
+            radius_list,
+            row["min_contour_area"],
+            row["score_threshold"],
+        )
+        assert row["keep"] == len(keep_images.get("c20", []))
+        assert row["delete"] == len(delete_images.get("c20", []))